@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Throughput benchmarks for trace_binary and the JSON writer."""
+
+# Every case runs in a fresh interpreter so peak RSS is per case:
+#   python benchmarks/bench_trace.py run --suite quick -o bench.json
+#   python benchmarks/bench_trace.py compare benchmarks/baseline.json bench.json
+# Timings depend on the machine, so no baseline is shipped: record one on
+# the reference machine first (run ... -o benchmarks/baseline.json) and
+# compare later runs from the same machine against it.
+# A case is one workload (example ELF or synthetic raw x86 loop) with a
+# max_steps / stack_entries / arch combination. The example ELFs run on the
+# libc stubs from _start to main's return (a few dozen steps whatever
+# max_steps is); a case whose trace ends with meta.error fails. Reported
+# separately:
+#   steps_per_second    executed instructions / trace_binary wall time
+#   serialize_seconds   write_trace_json wall time
+#   output_bytes        size of the written trace
+#   peak_rss_kb         ru_maxrss of the case process
+# Times are the best of --repeat runs. The synthetic loops are assembled
+# here from fixed bytes, so nothing outside the repository is needed.
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+RESULTS_VERSION = 1
+
+# Infinite loops (max_steps ends them). "alu": inc/push/pop/xor/jmp;
+# "call": call f; jmp back; f: push bp; mov bp, sp; pop bp; ret.
+_LOOPS: Dict[str, Dict[int, bytes]] = {
+    "alu": {
+        64: bytes.fromhex("48ffc0" "50" "5b" "4831d8" "ebf6"),
+        32: bytes.fromhex("40" "50" "5b" "31d8" "ebf9"),
+    },
+    "call": {
+        64: bytes.fromhex("e802000000" "ebf9" "55" "4889e5" "5d" "c3"),
+        32: bytes.fromhex("e802000000" "ebf9" "55" "89e5" "5d" "c3"),
+    },
+}
+
+# Example binaries and the input that drives them through main:
+# stack3 read()s stdin, stack3_64 copies argv[1].
+_EXAMPLES = {
+    "stack3": ("examples/stack3.elf", 32, {"stdin": "A" * 64}),
+    "stack3_64": ("examples/stack3_64.elf", 64, {"argv1": "A" * 32}),
+}
+
+SUITES = {
+    "quick": {"max_steps": [1000, 10000], "stack_entries": [16], "repeat": 3},
+    "full": {"max_steps": [1000, 10000, 100000, 1000000], "stack_entries": [16, 64], "repeat": 3},
+}
+
+# Metric, direction that is better.
+METRICS = [
+    ("steps_per_second", "higher"),
+    ("serialize_seconds", "lower"),
+    ("output_bytes", "lower"),
+    ("peak_rss_kb", "lower"),
+]
+
+
+def build_cases(suite: str) -> List[dict]:
+    spec = SUITES[suite]
+    cases = []
+    for name, (_path, bits, _inputs) in _EXAMPLES.items():
+        for entries in spec["stack_entries"]:
+            cases.append(
+                {
+                    "name": f"{name}/e{entries}",
+                    "workload": name,
+                    "arch_bits": bits,
+                    "max_steps": max(spec["max_steps"]),
+                    "stack_entries": entries,
+                }
+            )
+    for loop in _LOOPS:
+        for bits in (64, 32):
+            for steps in spec["max_steps"]:
+                for entries in spec["stack_entries"]:
+                    cases.append(
+                        {
+                            "name": f"{loop}{bits}/n{steps}/e{entries}",
+                            "workload": loop,
+                            "arch_bits": bits,
+                            "max_steps": steps,
+                            "stack_entries": entries,
+                        }
+                    )
+    return cases
+
+
+# Run one case in this process (called in the child interpreter).
+def run_case(case: dict, repeat: int, schema: int) -> dict:
+    from unicorn_trace import add_trace_arguments, config_from_args, trace_binary, write_trace_json
+
+    parser = argparse.ArgumentParser(add_help=False)
+    add_trace_arguments(parser)
+    args = parser.parse_args([])
+    args.max_steps = case["max_steps"]
+    args.stack_entries = case["stack_entries"]
+    args.arch_bits = case["arch_bits"]
+    args.schema = schema
+    args.no_cache = True
+    binary_path = None
+    if case["workload"] in _EXAMPLES:
+        path, _bits, inputs = _EXAMPLES[case["workload"]]
+        binary_path = os.path.join(ROOT, path)
+        args.libc_stubs = True
+        for key, value in inputs.items():
+            setattr(args, key, value)
+        with open(binary_path, "rb") as handle:
+            code = handle.read()
+    else:
+        code = _LOOPS[case["workload"]][case["arch_bits"]]
+    config = config_from_args(args)
+
+    trace_seconds = serialize_seconds = float("inf")
+    steps = output_bytes = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "trace.json")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            trace = trace_binary(code, config, binary_path)
+            trace_seconds = min(trace_seconds, time.perf_counter() - started)
+            steps = int(trace["meta"].get("steps") or 0)
+            if trace["meta"].get("error"):
+                raise RuntimeError(f"trace failed after {steps} steps: {trace['meta']['error']}")
+
+            started = time.perf_counter()
+            write_trace_json(trace, output_path)
+            serialize_seconds = min(serialize_seconds, time.perf_counter() - started)
+            output_bytes = os.path.getsize(output_path)
+            del trace
+
+    return {
+        **case,
+        "schema": schema,
+        "steps": steps,
+        "trace_seconds": round(trace_seconds, 6),
+        "steps_per_second": round(steps / trace_seconds, 1) if trace_seconds > 0 else None,
+        "serialize_seconds": round(serialize_seconds, 6),
+        "output_bytes": output_bytes,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _machine() -> dict:
+    try:
+        import unicorn
+
+        unicorn_version = unicorn.__version__
+    except (ImportError, AttributeError):
+        unicorn_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "unicorn": unicorn_version,
+    }
+
+
+def run_suite(suite: str, repeat: int, schema: int, pattern: Optional[str] = None) -> dict:
+    results = []
+    for case in build_cases(suite):
+        if pattern and pattern not in case["name"]:
+            continue
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_case", json.dumps(case), str(repeat), str(schema)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            result = {**case, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+        else:
+            result = json.loads(proc.stdout)
+        results.append(result)
+        _print_case(result)
+    return {
+        "version": RESULTS_VERSION,
+        "suite": suite,
+        "repeat": repeat,
+        "schema": schema,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": _machine(),
+        "cases": results,
+    }
+
+
+def _print_case(result: dict) -> None:
+    if "error" in result:
+        print(f"{result['name']:<24} ERROR {result['error']}", flush=True)
+        return
+    print(
+        f"{result['name']:<24} {result['steps']:>8} steps  {result['steps_per_second']:>10.0f} steps/s  "
+        f"json {result['serialize_seconds']:.3f}s  {result['output_bytes'] / 1e6:8.2f} MB  "
+        f"rss {result['peak_rss_kb'] / 1024:.0f} MB",
+        flush=True,
+    )
+
+
+# Cases whose metrics moved in the wrong direction by more than `threshold`
+# (relative). Cases missing from either side are listed but not flagged.
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    before = {case["name"]: case for case in baseline.get("cases", []) if "error" not in case}
+    rows = []
+    for case in current.get("cases", []):
+        old = before.get(case["name"])
+        if old is None or "error" in case:
+            rows.append({"name": case["name"], "metric": None, "regression": "error" in case})
+            continue
+        for metric, better in METRICS:
+            a, b = old.get(metric), case.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            worse = -change if better == "higher" else change
+            rows.append(
+                {
+                    "name": case["name"],
+                    "metric": metric,
+                    "baseline": a,
+                    "current": b,
+                    "change": round(change, 4),
+                    "regression": worse > threshold,
+                }
+            )
+    return rows
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tracing pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run a suite and write the results JSON")
+    run.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    run.add_argument("-o", "--output", default=None, help="Results JSON (default: stdout summary only)")
+    run.add_argument("--repeat", type=int, default=None, help="Runs per case, best time kept")
+    run.add_argument("--schema", type=int, choices=[1, 2], default=2, help="Trace schema to benchmark")
+    run.add_argument("--filter", default=None, help="Only cases whose name contains this text")
+
+    cmp_parser = sub.add_parser("compare", help="Flag regressions against a stored baseline")
+    cmp_parser.add_argument("baseline", help="Baseline results JSON")
+    cmp_parser.add_argument("current", help="New results JSON")
+    cmp_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Relative change counted as a regression"
+    )
+
+    case_parser = sub.add_parser("_case")
+    case_parser.add_argument("case")
+    case_parser.add_argument("repeat", type=int)
+    case_parser.add_argument("schema", type=int)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "_case":
+        print(json.dumps(run_case(json.loads(args.case), args.repeat, args.schema)))
+        return 0
+
+    if args.command == "run":
+        repeat = args.repeat or SUITES[args.suite]["repeat"]
+        results = run_suite(args.suite, repeat, args.schema, args.filter)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                json.dump(results, handle, indent=2)
+            print(f"{len(results['cases'])} cases -> {args.output}")
+        return 1 if any("error" in case for case in results["cases"]) else 0
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"{args.baseline}: no baseline yet; record one with `run -o {args.baseline}`",
+            file=sys.stderr,
+        )
+        return 2
+    with open(args.baseline, "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    with open(args.current, "r", encoding="utf-8") as handle:
+        current = json.load(handle)
+    rows = compare(baseline, current, args.threshold)
+    regressions = 0
+    for row in rows:
+        if row["metric"] is None:
+            status = "REGRESSION" if row["regression"] else "new"
+            print(f"{row['name']:<24} {'':<18} {status}")
+        else:
+            status = "REGRESSION" if row["regression"] else "ok"
+            print(
+                f"{row['name']:<24} {row['metric']:<18} {row['baseline']:>14} -> {row['current']:>14} "
+                f"{row['change']:+8.1%}  {status}"
+            )
+        regressions += row["regression"]
+    print(f"{regressions} regression(s) at threshold {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
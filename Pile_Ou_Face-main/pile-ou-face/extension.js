@@ -9,6 +9,56 @@ const logChannel = vscode.window.createOutputChannel('Stack Visualizer');
 
 const decorationTypes = new Map();
 
+/**
+ * Les traces au schéma v2 (tools/trace_schema.py) stockent des entiers ;
+ * au-delà de 2^53 JSON.parse perd des bits, donc ces littéraux sont
+ * passés en chaînes avant le parse puis convertis via BigInt. Les chaînes
+ * JSON sont reconnues en entier par la regex et recopiées telles quelles :
+ * les chiffres qu'elles contiennent ne sont jamais modifiés.
+ */
+const BIG_INTEGER_OR_STRING = /"(?:[^"\\]|\\.)*"|(?<=[[,:]\s*)(-?\d{16,})(?=\s*[,\]}])/g;
+
+// Parse a trace file, keeping 64-bit integers exact.
+function parseTrace(raw) {
+  return JSON.parse(raw.replace(BIG_INTEGER_OR_STRING, (match, number) => (number ? `"${number}"` : match)));
+}
+
+function toHex(value) {
+  if (value === null || value === undefined) {
+    return value;
+  }
+  return '0x' + BigInt(value).toString(16);
+}
+
+// Expand a schema v2 trace to the per-step layout the webview renders.
+function expandCompactTrace(snapshots, meta) {
+  const names = Array.isArray(meta.registers) ? meta.registers : [];
+  const wordSize = meta.word_size || 8;
+  return snapshots.map((snap) => {
+    const base = BigInt(snap.stack_base ?? 0);
+    const written = Array.isArray(snap.written) ? snap.written : null;
+    const out = { ...snap, rip: toHex(snap.rip), rsp: toHex(snap.rsp) };
+    delete out.regs;
+    delete out.stack_base;
+    delete out.written;
+    out.registers = (snap.regs || []).map((value, pos) => ({ name: names[pos], value: toHex(value), pos }));
+    out.stack = (snap.stack || []).map((value, id) => {
+      const item = {
+        id,
+        addr: '0x' + (base + BigInt(id * wordSize)).toString(16),
+        pos: id * wordSize,
+        size: wordSize,
+        value: toHex(value)
+      };
+      if (written) {
+        item.written_at = written[id];
+      }
+      return item;
+    });
+    return out;
+  });
+}
+
 /**
  * Lit output.json à la racine du workspace.
  * Retourne { snapshots, risks, meta }.
@@ -31,15 +81,16 @@ function loadTraceFromWorkspace() {
 
   try {
     const raw = fs.readFileSync(jsonPath, 'utf8');
-    const data = JSON.parse(raw);
+    const data = parseTrace(raw);
     if (Array.isArray(data)) {
       return { snapshots: data, risks: [], meta: {} };
     }
     if (data && Array.isArray(data.snapshots)) {
+      const meta = data.meta && typeof data.meta === 'object' ? data.meta : {};
       return {
-        snapshots: data.snapshots,
+        snapshots: meta.schema === 2 ? expandCompactTrace(data.snapshots, meta) : data.snapshots,
         risks: Array.isArray(data.risks) ? data.risks : [],
-        meta: data.meta && typeof data.meta === 'object' ? data.meta : {}
+        meta
       };
     }
     vscode.window.showErrorMessage('output.json doit contenir un tableau JSON de snapshots ou un objet { snapshots, risks }.');
@@ -281,6 +281,7 @@
           <div class="block-meta">
             ${offsetsHtml}
             ${viewMode === 'expert' ? `<div class="block-offset">Taille: ${item.size ?? 0} bytes</div>` : ''}
+            ${typeof item.written_at === 'number' ? `<div class="block-offset secondary" title="Dernière écriture de ce mot (hook mémoire)">Écrit à l'étape ${item.written_at}</div>` : ''}
           </div>
         </div>
         ${note ? `<div class="block-note">${note}</div>` : ''}
@@ -1192,10 +1193,22 @@
     const spLabel = rsp !== null ? `SP=${toHex(rsp)}` : '';
     const bpLabel = rbp !== null ? `BP=${toHex(rbp)}` : '';
     const effect = explainStackEffect(instr);
-    const parts = [spLabel, bpLabel].filter(Boolean).join(' • ');
+    const parts = [describeCallFrame(snap), spLabel, bpLabel].filter(Boolean).join(' • ');
     elFrameContext.textContent = parts ? `${parts} • ${effect}` : effect;
   }
 
+  // Frame of meta.call_tree the step runs in (nodes are indexed by id).
+  function describeCallFrame(snap) {
+    if (typeof snap.frame !== 'number') return '';
+    const nodes = meta.call_tree && Array.isArray(meta.call_tree.nodes) ? meta.call_tree.nodes : [];
+    const node = nodes[snap.frame];
+    const label = `Frame #${snap.frame} (profondeur ${snap.depth ?? 0})`;
+    if (!node || node.id !== snap.frame || node.parent === null) return label;
+    const target = node.target ?? '?';
+    const exit = node.exit_step !== null ? `, sortie pas ${node.exit_step} (${node.exit})` : '';
+    return `${label} • appel ${target} au pas ${node.entry_step}${exit}`;
+  }
+
   // Simple heuristics for stack-related instructions (generic, no C-specific logic).
   function explainStackEffect(instr) {
     if (!instr) return 'Instruction courante inconnue.';
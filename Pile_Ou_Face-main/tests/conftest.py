@@ -0,0 +1,54 @@
+"""Shared setup for the tools/ tests: sibling imports and example binaries."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.join(ROOT, "tools")
+EXAMPLES = os.path.join(ROOT, "examples")
+
+# The tools are flat modules importing each other by name.
+if TOOLS not in sys.path:
+    sys.path.insert(0, TOOLS)
+
+
+@pytest.fixture
+def example():
+    """Absolute path of a file in examples/."""
+
+    def path(name: str) -> str:
+        return os.path.join(EXAMPLES, name)
+
+    return path
+
+
+@pytest.fixture
+def trace_config():
+    """TraceConfig from unicorn_trace CLI options (artifact cache off)."""
+    from unicorn_trace import add_trace_arguments, config_from_args
+
+    def build(*argv: str):
+        parser = argparse.ArgumentParser()
+        add_trace_arguments(parser)
+        return config_from_args(parser.parse_args(["--no-cache", *argv]))
+
+    return build
+
+
+@pytest.fixture
+def run_trace(example, trace_config):
+    """Trace an example binary with CLI options; returns {snapshots, meta}."""
+    from unicorn_trace import trace_binary
+
+    def run(name: str, *argv: str) -> dict:
+        path = example(name)
+        with open(path, "rb") as handle:
+            code = handle.read()
+        return trace_binary(code, trace_config(*argv), path)
+
+    return run
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import os
+from collections import OrderedDict
+
+import pytest
+
+import artifact_cache
+from artifact_cache import ArtifactCache, digest_bytes
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo(monkeypatch):
+    monkeypatch.setattr(artifact_cache, "_MEMO", OrderedDict())
+
+
+def test_fetch_builds_once_then_hits_disk(tmp_path, monkeypatch):
+    digest = digest_bytes(b"binary")
+    built = []
+
+    def build():
+        built.append(1)
+        return {"value": 42}
+
+    first = ArtifactCache(str(tmp_path))
+    assert first.fetch(digest, "kind", build) == {"value": 42}
+    assert first.fetch(digest, "kind", build) == {"value": 42}
+    assert first.stats()["misses"] == 1
+    assert first.stats()["stores"] == 1
+    assert first.stats()["memory_hits"] == 1
+
+    # A new process starts with an empty memo and reads the disk entry.
+    monkeypatch.setattr(artifact_cache, "_MEMO", OrderedDict())
+    second = ArtifactCache(str(tmp_path))
+    assert second.fetch(digest, "kind", build) == {"value": 42}
+    assert second.stats()["hits"] == 1
+    assert second.stats()["misses"] == 0
+    assert len(built) == 1
+
+
+def test_encode_and_decode(tmp_path, monkeypatch):
+    digest = digest_bytes(b"pairs")
+
+    def decode(data):
+        return {tuple(pair) for pair in data}
+
+    ArtifactCache(str(tmp_path)).fetch(digest, "pairs", lambda: {(1, 2)}, sorted, decode)
+    monkeypatch.setattr(artifact_cache, "_MEMO", OrderedDict())
+    again = ArtifactCache(str(tmp_path))
+    assert again.fetch(digest, "pairs", set, sorted, decode) == {(1, 2)}
+    assert again.stats()["hits"] == 1
+
+
+def test_corrupt_entry_is_rebuilt(tmp_path):
+    digest = digest_bytes(b"corrupt")
+    cache = ArtifactCache(str(tmp_path))
+    path = cache._path(digest, "kind")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as handle:
+        handle.write(b"not zlib")
+    assert cache.fetch(digest, "kind", lambda: [1, 2]) == [1, 2]
+    assert cache.stats()["misses"] == 1
+    assert cache.load(digest, "kind") == [1, 2]
+
+
+def test_disabled_cache_never_touches_disk(tmp_path):
+    cache = ArtifactCache(None)
+    cache.store(digest_bytes(b"off"), "kind", [1])
+    assert cache.load(digest_bytes(b"off"), "kind") is None
+    assert cache.fetch(digest_bytes(b"off"), "kind", lambda: [2]) == [2]
+    assert cache.stats()["enabled"] is False
+    assert cache.stats()["stores"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=10_000)
+    payload = list(os.urandom(3000))  # does not compress much
+    digests = [digest_bytes(bytes([index])) for index in range(4)]
+    for index, digest in enumerate(digests):
+        cache.store(digest, "kind", payload)
+        os.utime(cache._path(digest, "kind"), (index, index))
+    assert cache.stats()["evicted"] >= 1
+    assert cache.load(digests[0], "kind") is None
+    assert cache.load(digests[-1], "kind") == payload
+
+
+def _trace_with_cache(example, cache_dir: str) -> dict:
+    from unicorn_trace import add_trace_arguments, config_from_args, trace_binary
+
+    parser = argparse.ArgumentParser()
+    add_trace_arguments(parser)
+    config = config_from_args(parser.parse_args(["--cache-dir", cache_dir, "--max-steps", "50"]))
+    path = example("stack3_64.elf")
+    with open(path, "rb") as handle:
+        return trace_binary(handle.read(), config, path)
+
+
+def test_trace_reuses_cached_layout(example, tmp_path, monkeypatch):
+    cold = _trace_with_cache(example, str(tmp_path))["meta"]["cache"]
+    assert cold["stores"] >= 1
+    monkeypatch.setattr(artifact_cache, "_MEMO", OrderedDict())
+    warm = _trace_with_cache(example, str(tmp_path))["meta"]["cache"]
+    assert warm["misses"] == 0
+    assert warm["hits"] == cold["stores"]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from ast_risks import analyze_python_source
+from ast_rules import RuleSet, load_rules
+
+SOURCE = """\
+import os as o
+import subprocess
+from pickle import loads
+import yaml
+import ctypes.util
+
+o.system("ls")
+subprocess.run("ls", shell=True)
+subprocess.run(["ls"], shell=1)
+subprocess("not a call into the module")
+loads(b"")
+yaml.load(data)
+yaml.load(data, Loader=yaml.SafeLoader)
+ctypes.util.find_library("c")
+print("harmless")
+"""
+
+
+def _found(source, rules=None):
+    return [(risk["line"], risk["rule"], risk["kind"]) for risk in analyze_python_source(source, "x.py", rules)]
+
+
+def test_builtin_rules():
+    assert _found(SOURCE) == [
+        (7, "os-system", "os.system"),
+        (8, "subprocess-shell", "subprocess.run"),
+        (9, "subprocess", "subprocess.run"),  # shell=1 is not shell=True
+        (11, "pickle-load", "pickle.loads"),
+        (12, "yaml-load", "yaml.load"),
+        (13, "yaml-load", "yaml.load"),  # as before the rule table
+        (14, "ctypes", "ctypes.util.find_library"),
+    ]
+
+
+def test_yaml_rule_needs_a_missing_loader():
+    rules = RuleSet.from_specs(
+        [
+            {
+                "id": "yaml-load",
+                "names": ["yaml.load"],
+                "missing_keywords": ["Loader"],
+                "severity": "medium",
+                "message": "YAML load without a Loader",
+            }
+        ]
+    )
+    assert _found("import yaml\nyaml.load(a)\nyaml.load(a, Loader=L)\n", rules) == [(2, "yaml-load", "yaml.load")]
+    assert rules.hits == {"yaml-load": 1}
+
+
+def test_rule_file_extends_builtin_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    rules = [
+        {"id": "requests-get", "names": ["requests.get"], "kind": "http", "severity": "low", "message": "HTTP"},
+        {"id": "os-first", "prefixes": ["os"], "severity": "low", "message": "any os call"},
+    ]
+    path.write_text(json.dumps({"rules": rules}))
+    found = _found("import os, requests\nrequests.get(u)\nos.system('x')\neval('1')\n", load_rules(str(path)))
+    # File rules are checked first; the built-in ones still apply.
+    assert found == [(2, "requests-get", "http"), (3, "os-first", "os.system"), (4, "dynamic-exec", "eval")]
+
+    path.write_text(json.dumps({"rules": rules, "builtin": False}))
+    assert [rule for _line, rule, _kind in _found("eval('1')\nimport os\nos.getcwd()\n", load_rules(str(path)))] == [
+        "os-first"
+    ]
+
+
+def test_toml_rule_file(tmp_path):
+    path = tmp_path / "rules.toml"
+    path.write_text(
+        '[[rules]]\nid = "shell-env"\nnames = ["os.popen"]\nseverity = "high"\nmessage = "popen"\n'
+    )
+    rules = load_rules(str(path))
+    assert rules.source == str(path)
+    assert _found("import os\nos.popen('x')\n", rules) == [(2, "shell-env", "os.popen")]
+
+
+@pytest.mark.parametrize(
+    "specs",
+    [
+        [{"id": "a", "severity": "low", "message": "m"}],
+        [{"id": "a", "names": ["x"], "severity": "low"}],
+        [{"id": "a", "names": ["x"], "severity": "low", "message": "m", "typo": 1}],
+        [{"id": "a", "names": ["x"], "severity": "low", "message": "m"}] * 2,
+    ],
+)
+def test_invalid_rules_are_rejected(specs):
+    with pytest.raises(ValueError):
+        RuleSet.from_specs(specs)
+
+
+def test_digest_follows_the_rules():
+    spec = {"id": "a", "names": ["x"], "severity": "low", "message": "m"}
+    assert RuleSet.from_specs([spec]).digest == RuleSet.from_specs([dict(spec)]).digest
+    assert RuleSet.from_specs([spec]).digest != RuleSet.from_specs([{**spec, "severity": "high"}]).digest
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+
+import pytest
+
+import artifact_cache
+from artifact_cache import ArtifactCache
+from ast_scan import expand_sources, scan_python_sources
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "pkg"
+    (root / "sub").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    (root / "__pycache__").mkdir()
+    (root / "a.py").write_text("import os\nos.system('ls')\n")
+    (root / "sub" / "b.py").write_text("x = 1\neval('x')\n")
+    (root / "sub" / "copy.py").write_text("x = 1\neval('x')\n")
+    (root / "broken.py").write_text("def (:\n")
+    (root / ".hidden" / "c.py").write_text("eval('1')\n")
+    (root / "__pycache__" / "d.py").write_text("eval('1')\n")
+    (root / "notes.txt").write_text("eval('1')\n")
+    return root
+
+
+def _scan(root, cache_dir, jobs=1):
+    return scan_python_sources(str(root), ArtifactCache(str(cache_dir)), jobs)
+
+
+def test_tree_scan_finds_risks_and_errors(tree, tmp_path):
+    paths = expand_sources(str(tree))
+    assert [os.path.relpath(path, tree) for path in paths] == ["a.py", "broken.py", "sub/b.py", "sub/copy.py"]
+    risks, report = _scan(tree, tmp_path / "cache")
+    assert sorted((os.path.basename(risk["file"]), risk["line"], risk["rule"]) for risk in risks) == [
+        ("a.py", 2, "os-system"),
+        ("b.py", 2, "dynamic-exec"),
+        ("copy.py", 2, "dynamic-exec"),
+    ]
+    assert report["files"] == 4
+    assert report["rule_hits"] == {"os-system": 1, "dynamic-exec": 2}
+    assert [os.path.basename(error["file"]) for error in report["errors"]] == ["broken.py"]
+    # The two identical files are parsed once.
+    assert report["parsed"] == 3
+
+
+def test_rescan_only_parses_changed_files(tree, tmp_path, monkeypatch):
+    first, _ = _scan(tree, tmp_path / "cache")
+    monkeypatch.setattr(artifact_cache, "_MEMO", OrderedDict())
+
+    again, report = _scan(tree, tmp_path / "cache")
+    assert again == first
+    assert (report["parsed"], report["reused"], report["rehashed"]) == (0, 4, 0)
+
+    stat = os.stat(tree / "a.py")
+    os.utime(tree / "a.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    (tree / "sub" / "b.py").write_text("x = 1\n")
+    risks, report = _scan(tree, tmp_path / "cache")
+    assert (report["parsed"], report["rehashed"]) == (1, 2)
+    assert {os.path.basename(risk["file"]) for risk in risks} == {"a.py", "copy.py"}
+    parsed = [os.path.basename(entry["file"]) for entry in report["per_file"] if not entry["cached"]]
+    assert parsed == ["b.py"]
+
+
+def test_pool_scan_matches_inline_scan(tmp_path):
+    root = tmp_path / "many"
+    root.mkdir()
+    for index in range(40):
+        body = "import subprocess\nsubprocess.run('ls', shell=True)\n" if index % 3 else "x = 1\n"
+        (root / f"m{index:02d}.py").write_text(f"# {index}\n{body}")
+    inline, inline_report = scan_python_sources(str(root), None, jobs=1)
+    pooled, pooled_report = scan_python_sources(str(root), None, jobs=2)
+    assert inline_report["jobs"] == 1
+    assert pooled_report["jobs"] == 2
+    assert pooled == inline
+    assert len(inline) == 26
+    assert {risk["rule"] for risk in inline} == {"subprocess-shell"}
+
+
+def test_glob_sources(tree):
+    risks, report = scan_python_sources(str(tree / "sub" / "*.py"), None)
+    assert report["files"] == 2
+    assert len(risks) == 2
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from batch_trace import load_payloads, run_batch
+
+
+def test_load_payloads(tmp_path):
+    path = tmp_path / "payloads.txt"
+    path.write_text('# comment\nhello\n\n{"name": "long", "argv1": "AAAA"}\n{"stdin_hex": "41 42"}\n')
+    payloads = load_payloads(str(path))
+    assert payloads == [
+        {"stdin": "hello", "name": "payload_0000"},
+        {"name": "long", "argv1": "AAAA"},
+        {"stdin_hex": "41 42", "name": "payload_0002"},
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_matches_single_runs(run_trace, example, trace_config, tmp_path, jobs):
+    payloads = [{"name": "short", "argv1": "AAAA"}, {"name": "long/one", "argv1": "A" * 100}]
+    config = trace_config("--libc-stubs", "--max-steps", "3000")
+    manifest = run_batch(example("stack3_64.elf"), payloads, config, str(tmp_path), jobs)
+    runs = manifest["runs"]
+    assert [run["name"] for run in runs] == ["short", "long/one"]
+    assert [run["ret_overwritten"] for run in runs] == [False, True]
+    assert runs[1]["output"] == "0001_long_one.json"
+    assert json.loads((tmp_path / "manifest.json").read_text())["count"] == 2
+    for run, payload in zip(runs, payloads):
+        written = json.loads((tmp_path / run["output"]).read_text())
+        single = run_trace("stack3_64.elf", "--libc-stubs", "--max-steps", "3000", "--argv1", payload["argv1"])
+        assert written["snapshots"] == single["snapshots"]
+        assert written["meta"]["payload"] == payload
+        assert run["steps"] == single["meta"]["steps"]
+
+
+@pytest.mark.parametrize(
+    "line,problem",
+    [
+        ('{"stdin": 5}', "'stdin' must be a string"),
+        ('{"name": ["a"]}', "'name' must be a string"),
+        ('{"stdin_hex": "4g"}', "'stdin_hex'"),
+    ],
+)
+def test_load_payloads_rejects_bad_fields(tmp_path, line, problem):
+    path = tmp_path / "payloads.txt"
+    path.write_text(f'{{"stdin": "ok"}}\n{line}\n')
+    with pytest.raises(SystemExit) as info:
+        load_payloads(str(path))
+    assert str(info.value).startswith(f"{path}:2: ")
+    assert problem in str(info.value)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_failed_run_does_not_abort_the_batch(example, trace_config, tmp_path, jobs):
+    payloads = [{"name": "good", "argv1": "AAAA"}, {"name": "bad", "stdin": 5}]
+    config = trace_config("--libc-stubs", "--max-steps", "3000")
+    manifest = run_batch(example("stack3_64.elf"), payloads, config, str(tmp_path), jobs)
+    good, bad = manifest["runs"]
+    assert good["error"] is None
+    assert (tmp_path / good["output"]).exists()
+    assert bad["output"] is None
+    assert bad["error"].startswith("AttributeError: ")
+    assert json.loads((tmp_path / "manifest.json").read_text())["count"] == 2
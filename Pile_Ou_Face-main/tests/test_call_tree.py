@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+ARGS = ("--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+
+
+def test_main_and_its_calls(run_trace):
+    trace = run_trace("stack3_64.elf", *ARGS)
+    tree = trace["meta"]["call_tree"]
+    nodes = {node["id"]: node for node in tree["nodes"]}
+    assert tree["frames"] == len(nodes)
+    assert not tree["truncated"]
+
+    main = next(node for node in nodes.values() if node["target"] == "0x4011e9")
+    assert main["exit"] == "ret"
+    assert main["frame_base"] == hex(int(main["ret_slot"], 16) - 8)  # push rbp; mov rbp, rsp
+    assert main["leave_step"] == main["exit_step"] - 1
+    calls = [node for node in nodes.values() if node["parent"] == main["id"]]
+    assert [node["site"] for node in calls] == ["0x401232", "0x401266"]  # strcpy, then printf
+    for call in calls:
+        assert call["exit"] == "ret"
+        assert call["depth"] == main["depth"] + 1
+        assert call["return_to"] == hex(int(call["site"], 16) + 5)
+    assert tree["max_depth"] == max(node["depth"] for node in nodes.values())
+
+
+@pytest.mark.parametrize(
+    "name,argv",
+    [
+        ("stack3_64.elf", ARGS),
+        ("stack3_64.elf", ("--libc-stubs", "--argv1", "A" * 100, "--max-steps", "3000")),
+        ("stack3.elf", ("--stdin", "A" * 40, "--max-steps", "3000")),
+    ],
+)
+def test_steps_add_up_and_match_the_snapshots(run_trace, name, argv):
+    trace = run_trace(name, *argv)
+    snapshots = trace["snapshots"]
+    nodes = trace["meta"]["call_tree"]["nodes"]
+    by_id = {node["id"]: node for node in nodes}
+    assert sum(node["self_steps"] for node in nodes) == trace["meta"]["steps"]
+    for node in nodes:
+        children = [child["steps"] for child in nodes if child["parent"] == node["id"]]
+        assert node["self_steps"] == node["steps"] - sum(children)
+        if node["snapshots"] is not None:
+            first, last = node["snapshots"]
+            assert snapshots[first]["frame"] == node["id"]
+            assert snapshots[last]["frame"] == node["id"]
+    for snap in snapshots:
+        assert snap["depth"] == by_id[snap["frame"]]["depth"]
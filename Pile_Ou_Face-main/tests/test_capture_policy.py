@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+
+import pytest
+
+from capture_policy import CapturePolicy
+from unicorn_trace import add_trace_arguments, config_from_args
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    add_trace_arguments(parser)
+    return parser
+
+
+@pytest.mark.parametrize("spec", ["every:x", "every:0", "on:jump", "when:rax in main", "nope"])
+def test_bad_capture_rule_is_a_usage_error(spec, capsys):
+    with pytest.raises(SystemExit) as exc:
+        _parser().parse_args(["--capture", spec])
+    assert exc.value.code == 2
+    assert "argument --capture" in capsys.readouterr().err
+
+
+def test_policy_matching():
+    policy = CapturePolicy.parse(
+        ["every:10", "on:call,stack-write", "when:rip in 0x1000-0x1010"],
+        lambda spec: tuple(int(part, 0) for part in spec.split("-")),
+    )
+    assert not policy.captures_all and policy.wants_stack_writes
+    assert policy.wants(1, 0, "nop") and policy.wants(11, 0, "nop")
+    assert not policy.wants(2, 0, "nop")
+    assert policy.wants(2, 0, "call 0x401000")
+    assert not policy.wants(2, 0, "ret")
+    assert policy.wants(2, 0, "nop", stack_written=True)
+    assert policy.wants(2, 0x100F, "nop") and not policy.wants(2, 0x1010, "nop")
+
+
+def test_prefixed_branches_match():
+    policy = CapturePolicy.parse(["on:call,ret"], lambda _range: (0, 0))
+    for instr in ("bnd ret", "rep ret", "notrack call rax", "bnd call 0x401000"):
+        assert policy.wants(2, 0, instr), instr
+    assert not policy.wants(2, 0, "bnd jmp 0x401000")
+    assert not policy.wants(2, 0, "rep stosq qword ptr [rdi], rax")
+
+
+def test_repeated_interval_is_rejected():
+    with pytest.raises(ValueError, match="Duplicate capture interval"):
+        CapturePolicy.parse(["every:5", "every:10"], lambda _range: (0, 0))
+    with pytest.raises(SystemExit, match="Duplicate capture interval"):
+        config_from_args(_parser().parse_args(["--capture", "every:5", "--capture", "every:10"]))
+
+
+def test_capture_keeps_true_step_numbers(run_trace):
+    full = run_trace("stack3_64.elf", "--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+    sparse = run_trace(
+        "stack3_64.elf", "--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000",
+        "--capture", "every:5", "--capture", "on:ret",
+    )
+    by_step = {snap["step"]: snap for snap in full["snapshots"]}
+    steps = [snap["step"] for snap in sparse["snapshots"]]
+    assert sparse["meta"]["steps"] == full["meta"]["steps"]
+    assert sparse["meta"]["capture"] == ["every:5", "on:ret"]
+    assert 0 < len(steps) < len(by_step)
+    for snap in sparse["snapshots"]:
+        assert (snap["step"] - 1) % 5 == 0 or snap["instr"].startswith("ret")
+        assert snap["rip"] == by_step[snap["step"]]["rip"]
+        assert snap["stack"] == by_step[snap["step"]]["stack"]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from cyclic import cyclic, cyclic_find
+
+
+def test_pattern_windows_are_unique():
+    pattern = cyclic(400, 4)
+    windows = {pattern[i : i + 4] for i in range(len(pattern) - 3)}
+    assert len(windows) == len(pattern) - 3
+    assert cyclic_find(pattern[86:90], pattern, 4) == 86
+    wide = cyclic(200, 8)
+    assert cyclic_find(int.from_bytes(wide[88:96], "little"), wide, 8) == 88
+    assert cyclic_find(b"zzzz", pattern, 4) is None
+
+
+def test_stdin_overflow_32_stops_at_pivoting_ret(run_trace):
+    trace = run_trace("stack3.elf", "--cyclic", "200", "--max-steps", "3000")
+    meta = trace["meta"]
+    overflow = meta["overflow"]
+    assert meta.get("libc_stubs") is not None  # implied by --cyclic
+    assert overflow["hijack_kind"] == "stack_pivot"
+    assert overflow["hijack_step"] == meta["steps"]
+    assert trace["snapshots"][-1]["rip"] == 0x804923B  # main's ret
+    assert overflow["pivot_offset"] == 78
+    assert overflow["pivot_delta"] == -4  # lea esp, [ecx-4]
+    assert overflow["controlled_registers"]["ecx"] == 78
+    assert overflow["rbp_offset"] == 86
+
+
+def test_argv1_overflow_64_recovers_ret_offset(run_trace):
+    trace = run_trace(
+        "stack3_64.elf", "--cyclic", "200", "--cyclic-into", "argv1", "--max-steps", "3000"
+    )
+    meta = trace["meta"]
+    overflow = meta["overflow"]
+    assert overflow["hijack_kind"] == "overwrite"
+    assert overflow["hijack_step"] == meta["steps"]
+    assert trace["snapshots"][-1]["rip"] == 0x401271
+    assert overflow["ret_offset"] == 88
+    assert overflow["rbp_offset"] == 80
+    assert overflow["pivot_offset"] is None
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from unicorn_trace import DecodeEngine
+
+pytest.importorskip("capstone")
+
+
+def test_decodes_are_cached_until_the_code_is_written():
+    engine = DecodeEngine(64)
+    assert engine.format(b"\x90", 0x401000) == "nop"
+    assert engine.format(b"\x90", 0x401000) == "nop"
+    assert (engine.hits, engine.misses) == (1, 1)
+    # Same bytes elsewhere decode separately (rip-relative text differs).
+    engine.format(b"\x90", 0x402000)
+    engine.invalidate(0x401000, 1)
+    assert engine.stats()["invalidations"] == 1
+    engine.format(b"\x90", 0x401000)
+    assert engine.misses == 3 and engine.stats()["entries"] == 2
+
+
+def test_trace_reuses_decodes(run_trace):
+    meta = run_trace("stack3_64.elf", "--libc-stubs", "--argv1", "A" * 16, "--max-steps", "3000")["meta"]
+    stats = meta["decode_cache"]
+    assert stats["hits"] + stats["misses"] == meta["steps_traced"]
+    assert stats["misses"] == stats["entries"]
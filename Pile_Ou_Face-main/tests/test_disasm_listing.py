@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from disasm_listing import CodeRegion, DisasmBuilder, build_listing
+
+pytest.importorskip("capstone")
+
+# Address / label / "..." / section skeleton of a listing line.
+_SKELETON = re.compile(r"^( *[0-9a-f]+:|[0-9a-f]+ <[^>]*>:|\t\.\.\.|Disassembly of section \S+|.*file format \S+)")
+
+
+def _skeleton(text: str) -> list:
+    result = []
+    for line in text.splitlines():
+        match = _SKELETON.match(line)
+        result.append(match.group(1) if match else line)
+    return result
+
+
+@pytest.mark.parametrize("name", ["stack3.elf", "stack3_64.elf"])
+def test_listing_has_objdumps_layout(example, name):
+    if shutil.which("objdump") is None:
+        pytest.skip("objdump not installed")
+    path = example(name)
+    with open(path, "rb") as handle:
+        listing = build_listing(handle.read(), path)
+    objdump = subprocess.run(
+        ["objdump", "-d", "-M", "intel", path], check=True, capture_output=True, text=True
+    ).stdout
+    # Same sections, labels, zero folding and byte wrapping on every line.
+    assert _skeleton(listing["text"]) == _skeleton(objdump)
+
+
+def test_lines_point_at_their_instruction(example):
+    path = example("stack3.elf")
+    with open(path, "rb") as handle:
+        listing = build_listing(handle.read(), path)
+    text = listing["text"].splitlines()
+    for entry in listing["lines"]:
+        assert text[entry["line"] - 1] == f"{int(entry['addr'], 16):8x}:\t{entry['text']}"
+    assert "\t..." in text  # zero padding right before __libc_start_main@plt
+
+
+class _CountingCs:
+    """Capstone handle counting disasm_lite passes."""
+
+    def __init__(self, cs) -> None:
+        self.cs = cs
+        self.passes = 0
+
+    def disasm_lite(self, data, addr):
+        self.passes += 1
+        return self.cs.disasm_lite(data, addr)
+
+
+def test_large_range_is_decoded_in_one_pass(example):
+    with open(example("stack3_64.elf"), "rb") as handle:
+        builder = DisasmBuilder(handle.read())
+    builder._cs = counting = _CountingCs(builder._cs)
+    # 200k instructions, one undecodable byte and a folded zero run.
+    data = b"\x90" * 100_000 + b"\x06" + b"\x90" * 50_000 + b"\x00" * 16 + b"\x90" * 50_000
+    region = CodeRegion(".text", 0x1000, data)
+    lines = list(builder._decode(region, 0x1000, 0x1000 + len(data)))
+    assert len(lines) == 200_002
+    assert lines[100_000][0].startswith(f"{0x1000 + 100_000:8x}:\t06 ")
+    assert lines[100_000][0].endswith("\t(bad)")
+    assert lines[150_001] == ("\t...", None)
+    # Restarted after the bad byte and after the zero run only.
+    assert counting.passes == 3
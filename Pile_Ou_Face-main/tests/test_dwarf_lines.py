@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+
+from dwarf_lines import DwarfInfo
+from elf_format import build_symbol_index
+
+
+def _info(example, name: str) -> DwarfInfo:
+    with open(example(name), "rb") as handle:
+        return DwarfInfo(handle.read())
+
+
+def test_lookup_on_stack3_64(example):
+    info = _info(example, "stack3_64.elf")
+    assert info.available
+    entry = info.lookup(0x4011E9)
+    assert entry["func"] == "main"
+    assert entry["file"].endswith("stack3.c")
+    assert entry["line"] == 12
+    assert info.lookup(0x401232)["line"] == 21  # the strcpy call
+    assert info.lookup(0x4011B6)["func"] == "err"
+    assert info.lookup(0x401000) is None  # _init has no debug info
+
+
+def test_without_debug_info():
+    info = DwarfInfo()
+    assert not info.available
+    assert info.lookup(0x401000) is None
+
+
+def test_cache_form_round_trips(example):
+    info = _info(example, "stack3.elf")
+    restored = DwarfInfo.from_data(info.to_data())
+    assert restored.available
+    for addr in range(0x8049000, 0x8049300):
+        assert restored.lookup(addr) == info.lookup(addr)
+
+
+@pytest.mark.parametrize("name", ["stack3.elf", "stack3_64.elf"])
+def test_lookup_matches_addr2line(example, name):
+    if shutil.which("addr2line") is None:
+        pytest.skip("addr2line not installed")
+    path = example(name)
+    with open(path, "rb") as handle:
+        symbols = build_symbol_index(handle.read())
+    addrs = []
+    for func in ("main", "err", "win", "sys_read"):
+        if symbols.get(func) is not None:
+            start, size = symbols.get(func)
+            addrs.extend(range(start, start + size))
+    output = subprocess.run(
+        ["addr2line", "-f", "-e", path, *(hex(addr) for addr in addrs)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    info = _info(example, name)
+    for addr, func, location in zip(addrs, output[::2], output[1::2]):
+        entry = info.lookup(addr)
+        file_path, _, line = location.rpartition(":")
+        line = line.split()[0]
+        assert entry["func"] == func, hex(addr)
+        assert entry["file"] == file_path, hex(addr)
+        assert entry["line"] == (int(line) if line.isdigit() and line != "0" else None), hex(addr)
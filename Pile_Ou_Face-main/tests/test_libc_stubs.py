@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+
+def test_stubs_reach_main_quickly(run_trace):
+    trace = run_trace("stack3_64.elf", "--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+    meta = trace["meta"]
+    assert meta["error"] is None
+    assert meta["libc_stubs"]["exit_reason"] == "main returned"
+    assert meta["steps"] < 100
+    assert "strcpy" in meta["libc_stubs"]["patched"]
+    assert meta["ret_hijack"] is None
+
+
+def test_main_entered_by_libc_start_main_has_a_checked_frame(run_trace):
+    trace = run_trace(
+        "stack3_64.elf", "--libc-stubs", "--argv1", "A" * 100, "--max-steps", "3000"
+    )
+    meta = trace["meta"]
+    main = next(node for node in meta["call_tree"]["nodes"] if node["target"] == "0x4011e9")
+    assert main["return_to"] == meta["libc_stubs"]["stub_base"]
+    assert main["exit"] == "hijack"
+    hijack = meta["ret_hijack"]
+    assert hijack["kind"] == "overwrite"
+    assert hijack["rip"] == "0x401271"  # main's ret
+    assert hijack["slot"] == main["ret_slot"]
+    assert hijack["target"] == "0x4141414141414141"
+
+
+def test_cyclic_argv1_stops_at_main_ret(run_trace):
+    trace = run_trace(
+        "stack3_64.elf",
+        "--libc-stubs",
+        "--cyclic",
+        "200",
+        "--cyclic-into",
+        "argv1",
+        "--max-steps",
+        "3000",
+    )
+    meta = trace["meta"]
+    overflow = meta["overflow"]
+    assert overflow["hijack_step"] == meta["steps"]
+    assert trace["snapshots"][-1]["rip"] == 0x401271
+    assert overflow["ret_offset"] == 88
+    assert overflow["rbp_offset"] == 80
+    assert meta["error"] is None
+
+
+def test_call_log_is_capped():
+    from unicorn import UC_ARCH_X86, UC_MODE_64, Uc
+
+    from libc_stubs import MAX_LOGGED_CALLS, LibcStubs
+
+    uc = Uc(UC_ARCH_X86, UC_MODE_64)
+    stubs = LibcStubs(uc, 64)
+    for _ in range(MAX_LOGGED_CALLS + 100):
+        stubs._dispatch(uc, "fflush")
+    stubs._dispatch(uc, "setbuf")
+    meta = stubs.meta()
+    assert len(meta["calls"]) == MAX_LOGGED_CALLS
+    assert meta["calls"][-1]["name"] == "setbuf"  # the most recent calls are kept
+    assert meta["calls_dropped"] == 101
+    assert meta["call_counts"] == {"fflush": MAX_LOGGED_CALLS + 100, "setbuf": 1}
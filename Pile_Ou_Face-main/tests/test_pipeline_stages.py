@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import multiprocessing
+
+import pytest
+
+from pipeline_stages import StageExecutor
+from run_pipeline import run_pipeline
+
+ARGS = ("--libc-stubs", "--argv1", "A" * 30, "--max-steps", "3000")
+
+
+def _run(example, trace_config, tmp_path, workers: int) -> dict:
+    out = tmp_path / f"workers{workers}" / "trace.json"
+    out.parent.mkdir()
+    return run_pipeline(
+        example("stack3_64.elf"), example("demo.py"), trace_config(*ARGS), str(out), stage_workers=workers
+    )
+
+
+def test_concurrent_stages_match_serial_run(example, trace_config, tmp_path):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("worker stages need fork")
+    serial = _run(example, trace_config, tmp_path, 0)
+    concurrent = _run(example, trace_config, tmp_path, 2)
+
+    assert serial["meta"]["stages"]["workers"] == 0
+    assert concurrent["meta"]["stages"]["workers"] == 2
+    stages = concurrent["meta"]["stages"]["stages"]
+    assert {stages[name]["where"] for name in ("disasm", "debug_info", "ast")} == {"worker"}
+    assert stages["emulate"]["where"] == "inline"
+
+    assert concurrent["snapshots"] == serial["snapshots"]
+    assert concurrent["risks"] == serial["risks"]
+    assert concurrent["risks"]
+    assert concurrent["meta"]["disasm"] == serial["meta"]["disasm"]
+    ignored = {"stages", "disasm_path", "cache"}  # the memo is shared by both runs
+    assert {k: v for k, v in concurrent["meta"].items() if k not in ignored} == {
+        k: v for k, v in serial["meta"].items() if k not in ignored
+    }
+
+
+def test_stage_errors_surface_on_result():
+    with StageExecutor(0) as stages:
+        stage = stages.submit("boom", int, "not a number")
+        with pytest.raises(ValueError):
+            stage.result()
+        assert stages.submit("ok", int, "12").result() == 12
+        assert stages.run("inline", sum, [1, 2]) == 3
+    report = stages.report()
+    assert set(report["stages"]) == {"ok", "inline"}
+    assert report["stages"]["ok"]["where"] == "inline"
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import pytest
+
+import unicorn_trace
+
+CASES = [
+    ("stack3_64.elf", ("--libc-stubs", "--argv1", "A" * 100, "--max-steps", "3000")),
+    ("stack3.elf", ("--stdin", "A" * 40, "--max-steps", "3000")),
+]
+
+
+@pytest.mark.parametrize("schema", ["1", "2"])
+@pytest.mark.parametrize("name,argv", CASES)
+def test_context_capture_matches_reg_read(run_trace, monkeypatch, name, argv, schema):
+    bulk = run_trace(name, *argv, "--schema", schema)
+    assert bulk["meta"]["register_capture"] == "context"
+
+    monkeypatch.setattr(unicorn_trace, "_context_gpr_offset", lambda _arch_bits: None)
+    fallback = run_trace(name, *argv, "--schema", schema)
+    assert fallback["meta"]["register_capture"] == "reg_read"
+    assert bulk["snapshots"] == fallback["snapshots"]
+    assert len(bulk["snapshots"]) > 10
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+
+from elf_format import SymbolIndex, build_symbol_index
+
+
+def _index(example, name: str) -> SymbolIndex:
+    with open(example(name), "rb") as handle:
+        return build_symbol_index(handle.read())
+
+
+def test_function_lookup_on_stack3_64(example):
+    index = _index(example, "stack3_64.elf")
+    assert index.get("main")[0] == 0x4011E9
+    assert index.get("err")[0] == 0x4011B6
+    assert index.get("no_such_symbol") is None
+    assert index.function_at(0x4011E9) == "main"
+    assert index.function_at(0x401232) == "main"  # the strcpy call
+    assert index.function_at(0x401271) == "main"  # main's ret
+    assert index.function_at(0x4011B6) == "err"
+    assert index.function_at(0x400000) is None
+
+
+def test_cache_form_round_trips(example):
+    index = _index(example, "stack3.elf")
+    restored = SymbolIndex.from_data(index.to_data())
+    assert len(restored) == len(index)
+    assert restored.addresses == index.addresses
+    for addr in (0x804923B, *(value for value, _size in index.addresses.values())):
+        assert restored.function_at(addr) == index.function_at(addr)
+
+
+@pytest.mark.parametrize("name", ["stack3.elf", "stack3_64.elf"])
+def test_addresses_match_nm(example, name):
+    if shutil.which("nm") is None:
+        pytest.skip("nm not installed")
+    output = subprocess.run(
+        ["nm", "-n", example(name)], capture_output=True, text=True, check=True
+    ).stdout
+    index = _index(example, name)
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) != 3 or parts[1] not in "TtDdBbRr":
+            continue
+        value, _kind, symbol = parts
+        assert index.get(symbol) is not None, symbol
+        assert index.get(symbol)[0] == int(value, 16), symbol
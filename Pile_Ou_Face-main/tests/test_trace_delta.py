@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from trace_delta import DeltaTraceReader, decode_trace, encode_trace, is_delta_trace
+
+ARGS = ("--libc-stubs", "--stdin", "A" * 40, "--max-steps", "3000")
+
+
+def test_tracer_delta_output_decodes_to_the_full_trace(run_trace):
+    full = run_trace("stack3.elf", *ARGS, "--schema", "1")
+    encoded = run_trace("stack3.elf", *ARGS, "--delta-keyframes", "8")
+    assert is_delta_trace(encoded) and "snapshots" not in encoded
+    frames = encoded["frames"]
+    assert [idx for idx, frame in enumerate(frames) if frame.get("key")] == list(range(0, len(frames), 8))
+    # Deltas only carry what changed.
+    assert all("registers" not in frame for frame in frames if not frame.get("key"))
+    assert decode_trace(encoded)["snapshots"] == full["snapshots"]
+
+
+@pytest.mark.parametrize("interval", [1, 5, 1000])
+def test_random_access_matches_sequential_decode(run_trace, interval):
+    full = run_trace("stack3.elf", *ARGS, "--schema", "1")
+    reader = DeltaTraceReader(encode_trace(full, interval))
+    snapshots = full["snapshots"]
+    assert len(reader) == len(snapshots)
+    for index in (0, 1, len(snapshots) // 2, len(snapshots) - 1, -1):
+        assert reader.snapshot(index) == snapshots[index]
+    assert reader.at_step(snapshots[7]["step"]) == snapshots[7]
+    with pytest.raises(KeyError):
+        reader.at_step(10**9)
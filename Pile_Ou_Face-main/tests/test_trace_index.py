@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from trace_delta import decode_trace, is_delta_trace
+from trace_index import IndexedTrace, build_index, index_path_for
+from unicorn_trace import read_trace_ndjson, trace_iter, write_trace_ndjson
+
+ARGS = ("--libc-stubs", "--argv1", "A" * 30, "--max-steps", "3000")
+
+
+def _write(example, trace_config, tmp_path, *argv) -> str:
+    path = example("stack3_64.elf")
+    with open(path, "rb") as handle:
+        stream = trace_iter(handle.read(), trace_config(*ARGS, *argv), path)
+    out = str(tmp_path / "trace.ndjson")
+    write_trace_ndjson(stream, out, [{"risks": []}], index_path=index_path_for(out))
+    return out
+
+
+def test_sidecar_matches_a_rescan(example, trace_config, tmp_path):
+    out = _write(example, trace_config, tmp_path)
+    with open(index_path_for(out), encoding="utf-8") as handle:
+        written = json.load(handle)
+    assert build_index(out) == written
+    assert set(written["records"]) == {"risks", "meta"}
+
+
+@pytest.mark.parametrize("argv", [(), ("--delta-keyframes", "5")])
+def test_slices_match_the_full_trace(example, trace_config, tmp_path, argv):
+    out = _write(example, trace_config, tmp_path, *argv)
+    payload = read_trace_ndjson(out)
+    if is_delta_trace(payload):
+        payload = decode_trace(payload)
+    full = payload["snapshots"]
+    build_index(out, chunk_steps=7)  # slices cross several chunks
+    with IndexedTrace(out) as trace:
+        assert len(trace) == len(full)
+        assert trace.chunk_steps == 7
+        assert trace.meta["steps"] == len(full)
+        assert trace.record("risks") == []
+        for start in (0, 3, 6, 7, 13, len(full) - 4):
+            assert trace.steps(start, 9) == full[start : start + 9], start
+        assert trace.step(-1) == full[-1]
+        assert trace.steps(len(full), 5) == []
+        with pytest.raises(IndexError):
+            trace.step(len(full))
+
+
+def test_stale_sidecar_is_rebuilt(example, trace_config, tmp_path):
+    out = _write(example, trace_config, tmp_path)
+    with open(out, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"note": "appended"}) + "\n")
+    with IndexedTrace(out) as trace:
+        assert trace.record("note") == "appended"
+    with open(index_path_for(out), encoding="utf-8") as handle:
+        assert "note" in json.load(handle)["records"]
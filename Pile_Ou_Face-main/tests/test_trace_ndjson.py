@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+
+from unicorn_trace import read_trace_ndjson, trace_iter, write_trace_ndjson
+
+ARGS = ("--libc-stubs", "--argv1", "A" * 30, "--max-steps", "3000")
+
+
+def _stream(example, trace_config, *argv):
+    path = example("stack3_64.elf")
+    with open(path, "rb") as handle:
+        return trace_iter(handle.read(), trace_config(*argv), path)
+
+
+def test_ndjson_holds_the_same_steps_as_json(run_trace, example, trace_config, tmp_path):
+    full = run_trace("stack3_64.elf", *ARGS)
+    out = tmp_path / "trace.ndjson"
+    meta = write_trace_ndjson(_stream(example, trace_config, *ARGS), str(out), [{"risks": []}])
+    lines = out.read_text().splitlines()
+    # One step per line, then the extra records, meta last.
+    assert len(lines) == len(full["snapshots"]) + 2
+    assert json.loads(lines[-1]) == {"meta": meta}
+    payload = read_trace_ndjson(str(out))
+    assert payload["snapshots"] == full["snapshots"]
+    assert payload["risks"] == []
+    assert payload["meta"]["steps"] == full["meta"]["steps"]
+
+
+def test_stream_yields_steps_lazily(example, trace_config):
+    stream = _stream(example, trace_config, *ARGS)
+    steps = iter(stream)
+    assert next(steps)["step"] == 1
+    assert stream.meta == {}  # meta is only known once the run ends
+    rest = list(steps)
+    assert rest[-1]["step"] == stream.meta["steps"]
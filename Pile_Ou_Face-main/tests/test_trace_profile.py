@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+
+from trace_profile import HOOK_PHASES, TraceProfiler, format_profile
+from unicorn_trace import trace_binary, write_trace_json
+
+ARGS = ("--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+
+
+def _trace(example, trace_config, profiler):
+    path = example("stack3_64.elf")
+    with open(path, "rb") as handle:
+        return trace_binary(handle.read(), trace_config(*ARGS), path, profiler=profiler)
+
+
+def test_profile_reports_phases_without_changing_steps(example, trace_config, run_trace, tmp_path):
+    profiler = TraceProfiler()
+    profiler.start()
+    trace = _trace(example, trace_config, profiler)
+    out = tmp_path / "trace.json"
+    write_trace_json(trace, str(out), profiler)
+    profiler.stop()
+
+    plain = run_trace("stack3_64.elf", *ARGS)
+    assert "profile" not in plain["meta"]
+    assert trace["snapshots"] == plain["snapshots"]
+    report = json.loads(out.read_text())["meta"]["profile"]
+    assert report["steps"] == plain["meta"]["steps"]
+    assert {"load", "emulate", "registers", "serialize"} <= set(report["phases"])
+    assert list(report["hook"]) == list(HOOK_PHASES)
+    assert report["peak_traced_bytes"] > 0
+    assert format_profile(report).startswith("profile: ")
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = TraceProfiler.disabled()
+    profiler.start()
+    with profiler.phase("emulate"):
+        pass
+    assert list(profiler.consumer([1, 2], "serialize")) == [1, 2]
+    assert profiler.phases == {}
+    assert profiler.report(10) == {}
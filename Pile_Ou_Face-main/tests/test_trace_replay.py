@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+
+from trace_checkpoint import CheckpointFile
+from trace_replay import ReplayTrace
+from unicorn_trace import trace_binary
+
+
+def _record(monkeypatch, example, trace_config, tmp_path, name, *argv):
+    ckpt = str(tmp_path / "trace.ckpt")
+    config = trace_config(
+        *argv, "--schema", "1", "--checkpoint-every", "7", "--checkpoints", ckpt
+    )
+    # Relative path: it is argv[0] on the stack, and replay must cope with it.
+    monkeypatch.chdir(example(""))
+    with open(name, "rb") as handle:
+        trace = trace_binary(handle.read(), config, name)
+    monkeypatch.chdir(tmp_path)
+    return trace, ckpt
+
+
+@pytest.mark.parametrize(
+    "name, argv",
+    [
+        ("stack3_64.elf", ("--libc-stubs", "--argv1", "A" * 100)),
+        ("stack3.elf", ("--libc-stubs", "--stdin", "A" * 12)),
+    ],
+)
+def test_replay_rebuilds_every_snapshot(monkeypatch, example, trace_config, tmp_path, name, argv):
+    trace, ckpt = _record(monkeypatch, example, trace_config, tmp_path, name, *argv, "--max-steps", "3000")
+    checkpoints = CheckpointFile(ckpt)
+    assert checkpoints.header["binary_arg"] == name
+    assert len(checkpoints.checkpoints) == trace["meta"]["checkpoints"]["count"] > 1
+    replay = ReplayTrace(ckpt)
+    for snap in trace["snapshots"]:
+        state = replay.state_at(snap["step"]).snapshot()
+        assert state["rip"] == snap["rip"]
+        assert state["registers"] == snap["registers"]
+        assert [item["value"] for item in state["stack"]] == [item["value"] for item in snap["stack"]]
+
+
+def test_checkpoints_store_only_written_pages(monkeypatch, example, trace_config, tmp_path):
+    _trace, ckpt = _record(
+        monkeypatch, example, trace_config, tmp_path, "stack3_64.elf", "--libc-stubs", "--argv1", "AAAA"
+    )
+    checkpoints = CheckpointFile(ckpt)
+    # Nothing has run at the first checkpoint; later ones hold the pages
+    # written in between (stack, heap), not the whole address space.
+    assert checkpoints.checkpoints[0]["pages"] == []
+    written = {addr for ckpt in checkpoints.checkpoints for addr, _offset, _size in ckpt["pages"]}
+    assert 0 < len(written) <= 4
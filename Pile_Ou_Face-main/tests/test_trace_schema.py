@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from trace_schema import snapshot_to_v1, snapshot_to_v2, trace_to_v1, trace_to_v2
+
+RUNS = [
+    # Ends on a stack pivot: the last snapshot has an empty stack window.
+    ("stack3.elf", ("--cyclic", "200")),
+    ("stack3_64.elf", ("--libc-stubs", "--argv1", "A" * 100, "--max-steps", "3000")),
+]
+
+
+@pytest.mark.parametrize("name, argv", RUNS)
+def test_converters_reproduce_the_tracer(run_trace, name, argv):
+    v1 = run_trace(name, *argv, "--schema", "1")
+    v2 = run_trace(name, *argv, "--schema", "2")
+    # Byte for byte, key order included.
+    assert json.dumps(trace_to_v2(v1)) == json.dumps(v2)
+    assert json.dumps(trace_to_v1(v2)) == json.dumps(v1)
+
+
+def test_empty_stack_window_keeps_written(run_trace):
+    v1 = run_trace("stack3.elf", "--cyclic", "200", "--schema", "1")
+    last = trace_to_v2(v1)["snapshots"][-1]
+    assert last["stack"] == [] and last["written"] == []
+    assert last["stack_base"] == last["rsp"]
+
+
+def test_v1_without_provenance_has_no_written():
+    snap = {
+        "step": 1,
+        "rip": "0x401000",
+        "rsp": "0x7ff0",
+        "instr": "nop",
+        "stack": [{"id": 0, "addr": "0x7ff0", "pos": 0, "size": 8, "value": "0x2a"}],
+        "registers": [{"name": "rax", "value": "0x1", "pos": 0}],
+    }
+    compact = snapshot_to_v2(snap)
+    assert "written" not in compact
+    assert snapshot_to_v1(compact, ["rax"], 8) == snap
+
+
+def test_v2_without_stack_base_falls_back_to_rsp():
+    snap = {"step": 1, "rip": 0x401000, "rsp": 0x7FF0, "regs": [1], "stack": [5, 6]}
+    expanded = snapshot_to_v1(snap, ["rax"], 8)
+    assert [item["addr"] for item in expanded["stack"]] == ["0x7ff0", "0x7ff8"]
+    del snap["rsp"]
+    assert snapshot_to_v1(snap, ["rax"], 8)["stack"][1]["addr"] is None
+
+
+def test_config_default_schema_matches_the_cli():
+    import argparse
+
+    from unicorn_trace import TraceConfig, add_trace_arguments
+
+    parser = argparse.ArgumentParser()
+    add_trace_arguments(parser)
+    assert TraceConfig.schema == parser.parse_args([]).schema == 2
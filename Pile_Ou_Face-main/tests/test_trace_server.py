@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import io
+import json
+
+from trace_server import INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, TraceServer, _StdioTransport
+
+
+# Send request lines to a fresh server, one at a time (each after the traces
+# started so far have finished); replies by id.
+def _session(*requests) -> dict:
+    writer = io.StringIO()
+    server = TraceServer()
+    transport = _StdioTransport(server, io.StringIO(), writer)
+    try:
+        for request in requests:
+            if not isinstance(request, str):
+                request = json.dumps({"jsonrpc": "2.0", **request})
+            if not transport.handle(request):
+                break
+            for trace in list(server._traces.values()):
+                assert trace.done.wait(60)
+    finally:
+        server.close()
+    replies = {}
+    for line in writer.getvalue().splitlines():
+        reply = json.loads(line)
+        assert reply["jsonrpc"] == "2.0"
+        replies[reply["id"]] = reply
+    return replies
+
+
+def _config(**options) -> dict:
+    return {"no_cache": True, "libc_stubs": True, "max_steps": 3000, **options}
+
+
+def test_trace_then_page_through_steps(example):
+    binary = example("stack3_64.elf")
+    replies = _session(
+        {"id": 1, "method": "trace", "params": {"binary": binary, "config": _config(argv1="AAAA")}},
+        {"id": 2, "method": "get_meta", "params": {"trace_id": "t1"}},
+        {"id": 3, "method": "get_steps", "params": {"trace_id": "t1", "start": 2, "count": 5}},
+    )
+    summary = replies[1]["result"]
+    assert summary["trace_id"] == "t1"
+    assert summary["done"] is True
+    assert summary["error"] is None
+    assert summary["steps"] > 5
+    meta = replies[2]["result"]
+    assert meta["trace_id"] == "t1"
+    page = replies[3]["result"]
+    assert page["start"] == 2
+    assert len(page["steps"]) == 5
+    assert all(set(step) >= {"step", "regs"} for step in page["steps"])
+
+
+def test_results_match_the_cli_trace(example, run_trace):
+    binary = example("stack3_64.elf")
+    replies = _session(
+        {"id": 1, "method": "trace", "params": {"binary": binary, "config": _config(argv1="AAAA")}},
+        {"id": 2, "method": "get_steps", "params": {"trace_id": "t1", "count": 100000}},
+    )
+    expected = run_trace("stack3_64.elf", "--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+    assert replies[2]["result"]["total"] == len(expected["snapshots"])
+    assert replies[2]["result"]["steps"] == expected["snapshots"]
+
+
+def test_no_wait_returns_the_id_at_once(example):
+    binary = example("stack3.elf")
+    params = {"binary": binary, "config": _config(max_steps=50), "wait": False}
+    replies = _session(
+        {"id": 1, "method": "trace", "params": params},
+        {"id": 2, "method": "trace", "params": params},
+        {"id": 3, "method": "stats"},
+    )
+    assert replies[1]["result"]["trace_id"] == "t1"
+    assert replies[2]["result"]["trace_id"] == "t2"
+    assert [trace["trace_id"] for trace in replies[3]["result"]["traces"]] == ["t1", "t2"]
+    assert len(replies[3]["result"]["binaries"]) == 1
+
+
+def test_errors(example):
+    replies = _session(
+        "{not json",
+        {"id": 1, "method": "nope"},
+        {"id": 2, "method": "trace", "params": {}},
+        {"id": 3, "method": "get_steps", "params": {"trace_id": "t9"}},
+        {"id": 4, "method": "trace", "params": {"binary": example("stack3.elf"), "config": {"bogus": 1}}},
+        {"id": 5, "method": "trace", "params": {"binary": example("stack3.elf"), "config": {"capture": ["bad"]}}},
+        {"id": 6, "method": "shutdown"},
+        {"id": 7, "method": "stats"},
+    )
+    assert replies[None]["error"]["code"] == PARSE_ERROR
+    assert replies[1]["error"]["code"] == METHOD_NOT_FOUND
+    for request_id in (2, 3, 4, 5):
+        assert replies[request_id]["error"]["code"] == INVALID_PARAMS, request_id
+    assert replies[6]["result"] is None
+    assert 7 not in replies  # nothing is read after shutdown
+
+
+def test_config_values_go_through_the_cli_parser(example):
+    binary = example("stack3.elf")
+    replies = _session(
+        {"id": 1, "method": "trace", "params": {"binary": binary, "config": _config(max_steps="40")}},
+        {"id": 2, "method": "get_meta", "params": {"trace_id": "t1"}},
+        {"id": 3, "method": "trace", "params": {"binary": binary, "config": _config(capture="every:2")}},
+        {"id": 4, "method": "get_steps", "params": {"trace_id": "t2", "count": 3}},
+        {"id": 5, "method": "trace", "params": {"binary": binary, "config": _config(max_steps="many")}},
+        {"id": 6, "method": "trace", "params": {"binary": binary, "config": _config(max_steps=True)}},
+        {"id": 7, "method": "trace", "params": {"binary": binary, "config": _config(libc_stubs="yes")}},
+        {"id": 8, "method": "trace", "params": {"binary": binary, "config": _config(capture=[2])}},
+        {"id": 9, "method": "trace", "params": {"binary": binary, "config": _config(capture=["every:2", "every:3"])}},
+        {"id": 10, "method": "trace", "params": {"binary": binary, "config": _config(stdin_hex="zz")}},
+    )
+    assert replies[1]["result"]["error"] is None
+    assert replies[2]["result"]["meta"]["steps"] == 40
+    assert [step["step"] for step in replies[4]["result"]["steps"]] == [1, 3, 5]
+    for request_id in (5, 6, 7, 8, 9, 10):
+        assert replies[request_id]["error"]["code"] == INVALID_PARAMS, request_id
+
+
+def test_worker_survives_an_unexpected_error(example, monkeypatch):
+    import trace_server
+
+    def broken(*_args, **_kwargs):
+        raise RuntimeError("boom")
+
+    binary = example("stack3.elf")
+    real = trace_server.trace_iter
+    monkeypatch.setattr(trace_server, "trace_iter", broken)
+    writer = io.StringIO()
+    server = TraceServer()
+    transport = _StdioTransport(server, io.StringIO(), writer)
+    try:
+        request = {"jsonrpc": "2.0", "id": 1, "method": "trace", "params": {"binary": binary, "config": _config()}}
+        transport.handle(json.dumps(request))
+        assert server._traces["t1"].done.wait(60)
+        monkeypatch.setattr(trace_server, "trace_iter", real)
+        transport.handle(json.dumps({**request, "id": 2}))
+        assert server._traces["t2"].done.wait(60)
+    finally:
+        server.close()
+    replies = {reply["id"]: reply for reply in map(json.loads, writer.getvalue().splitlines())}
+    assert replies[1]["error"]["message"] == "RuntimeError: boom"
+    assert replies[2]["result"]["steps"] > 0
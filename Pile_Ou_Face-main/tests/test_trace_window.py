@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+ARGS = ("--libc-stubs", "--argv1", "AAAA", "--max-steps", "3000")
+
+
+@pytest.mark.parametrize("window", [("--trace-from", "main"), ("--trace-range", "main")])
+def test_window_steps_match_the_full_trace(run_trace, window):
+    full = {snap["step"]: snap for snap in run_trace("stack3_64.elf", *ARGS)["snapshots"]}
+    trace = run_trace("stack3_64.elf", *ARGS, *window)
+    assert trace["meta"]["trace_window"]
+    snapshots = trace["snapshots"]
+    assert snapshots[0]["rip"] == 0x4011E9  # main
+    for snap in snapshots:
+        reference = full[snap["step"]]
+        assert snap["rip"] == reference["rip"]
+        assert snap["stack"] == reference["stack"]
+        # Writes made before the window keep their own step.
+        assert snap["written"] == reference["written"]
+
+
+def test_from_until_window_meta(run_trace):
+    trace = run_trace("stack3_64.elf", *ARGS, "--trace-from", "main", "--trace-until", "0x401232")
+    meta = trace["meta"]
+    steps = [snap["step"] for snap in trace["snapshots"]]
+    assert meta["trace_window"] == {"from": "0x4011e9", "until": "0x401232", "ranges": [], "reached": True}
+    assert trace["snapshots"][0]["rip"] == 0x4011E9
+    assert trace["snapshots"][-1]["rip"] < 0x401232  # stops before the strcpy call
+    assert steps == list(range(steps[0], steps[-1] + 1))
+    assert meta["steps_outside"] == steps[0] - 1
+    assert meta["steps_traced"] == len(steps)
+    assert meta["steps"] == meta["steps_outside"] + meta["steps_traced"]
+
+
+def test_window_never_reached(run_trace):
+    trace = run_trace("stack3_64.elf", *ARGS, "--trace-from", "err")
+    assert trace["snapshots"] == []
+    assert trace["meta"]["trace_window"]["reached"] is False
+    assert trace["meta"]["steps_outside"] == trace["meta"]["steps"] > 0
+    assert trace["meta"]["error"] == "Trace window never reached"
+
+
+@pytest.mark.parametrize("window", [("--trace-from", "0x400100"), ("--trace-range", "0x400100-0x400110")])
+def test_outside_steps_are_bounded(trace_config, tmp_path, window):
+    from unicorn_trace import trace_binary
+
+    loop = tmp_path / "loop.bin"
+    loop.write_bytes(b"\xeb\xfe")  # jmp $
+    config = trace_config("--max-steps", "100", "--max-outside-steps", "5000", *window)
+    trace = trace_binary(loop.read_bytes(), config, str(loop))
+    meta = trace["meta"]
+    assert trace["snapshots"] == []
+    assert meta["trace_window"]["reached"] is False
+    assert meta["steps_outside"] == meta["steps"] == 5001
+    assert "--max-outside-steps" in meta["error"]
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache for per-binary derived artifacts."""
+
+# Artifacts (ELF layout, symbol index, DWARF tables, disassembly) are keyed
+# by the SHA-256 of the file they were derived from, so an unchanged binary
+# is never re-parsed or re-disassembled between runs:
+#   <root>/<sha256>/<kind>.v<VERSION>.json.z   zlib-compressed JSON
+# Reads refresh the file mtime; when the directory grows past max_bytes the
+# least recently used entries are removed. A small in-process memo keeps the
+# decoded objects for batch/server runs in the same process.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_MEMO_SIZE = 32
+
+T = TypeVar("T")
+
+# (digest, kind) -> decoded artifact, shared by every cache in the process.
+_MEMO: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+# (path, size, mtime_ns) -> sha256
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def default_cache_dir() -> str:
+    explicit = os.environ.get("POF_CACHE_DIR")
+    if explicit:
+        return explicit
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pile-ou-face")
+
+
+def digest_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# SHA-256 of a file, remembered while its size and mtime are unchanged.
+def digest_file(path: str) -> str:
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _DIGESTS.get(key)
+    if digest is None:
+        with open(path, "rb") as handle:
+            digest = digest_bytes(handle.read())
+        _DIGESTS[key] = digest
+    return digest
+
+
+class ArtifactCache:
+    """One run's view of the cache; `root=None` disables the disk layer."""
+
+    def __init__(self, root: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    # Artifact `kind` of the content `digest`: memo, then disk, then build().
+    # `encode`/`decode` convert between the object and its JSON form.
+    def fetch(
+        self,
+        digest: str,
+        kind: str,
+        build: Callable[[], T],
+        encode: Callable[[T], object] = lambda value: value,
+        decode: Callable[[object], T] = lambda data: data,
+    ) -> T:
+        key = (digest, kind)
+        if key in _MEMO:
+            _MEMO.move_to_end(key)
+            self.memory_hits += 1
+            return _MEMO[key]
+        value = None
+        data = self._load(digest, kind)
+        if data is not None:
+            try:
+                value = decode(data)
+                self.hits += 1
+            except (KeyError, TypeError, ValueError):
+                value = None
+        if value is None:
+            self.misses += 1
+            value = build()
+            self._store(digest, kind, encode(value))
+        _MEMO[key] = value
+        if len(_MEMO) > _MEMO_SIZE:
+            _MEMO.popitem(last=False)
+        return value
+
+    # Raw JSON entry, for state a caller updates in place between runs
+    # (ast_scan's per-tree index); None when absent or the cache is off.
+    def load(self, digest: str, kind: str) -> Optional[object]:
+        return self._load(digest, kind)
+
+    def store(self, digest: str, kind: str, data: object) -> None:
+        self._store(digest, kind, data)
+
+    # Add the counters of a copy of this cache used elsewhere (a worker process).
+    def merge(self, other: "ArtifactCache") -> None:
+        self.hits += other.hits
+        self.memory_hits += other.memory_hits
+        self.misses += other.misses
+        self.stores += other.stores
+        self.evicted += other.evicted
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "dir": self.root,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evicted": self.evicted,
+        }
+
+    def _path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.root, digest, f"{kind}.v{VERSION}.json.z")
+
+    def _load(self, digest: str, kind: str) -> Optional[object]:
+        if self.root is None:
+            return None
+        path = self._path(digest, kind)
+        try:
+            with open(path, "rb") as handle:
+                data = json.loads(zlib.decompress(handle.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return None
+        try:
+            os.utime(path)  # LRU: reads count as uses
+        except OSError:
+            pass
+        return data
+
+    def _store(self, digest: str, kind: str, data: object) -> None:
+        if self.root is None:
+            return
+        blob = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        path = self._path(digest, kind)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Atomic publish: parallel batch workers may store the same entry.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self.stores += 1
+        self._evict()
+
+    # Drop least recently used entries until the cache fits in max_bytes.
+    def _evict(self) -> None:
+        entries: List[Tuple[float, int, str]] = []
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
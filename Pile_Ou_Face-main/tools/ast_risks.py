@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 """AST-based risk detection for Python sources."""
 
-# Static analysis helper focused on a small set of risky calls.
+# Static analysis helper focused on risky calls; which calls are risky is
+# decided by the rule table in ast_rules (built-in or loaded from a file).
 
 from __future__ import annotations
 
 import ast
 import os
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from ast_rules import RuleSet, load_rules
 
 
 @dataclass
@@ -18,24 +21,29 @@ class Risk:
     severity: str
     message: str
     file: str
+    rule: Optional[str] = None
 
     def to_json(self) -> dict:
-        return {
+        payload = {
             "line": self.line,
             "kind": self.kind,
             "severity": self.severity,
             "message": self.message,
             "file": self.file,
         }
+        if self.rule is not None:
+            payload["rule"] = self.rule
+        return payload
 
 
 class RiskyCallDetector(ast.NodeVisitor):
-    """Detects a small set of risky call patterns."""
+    """Detects risky call patterns described by a RuleSet."""
 
     # We track imports to resolve names like os.system or subprocess.run.
 
-    def __init__(self, source_path: str) -> None:
+    def __init__(self, source_path: str, rules: Optional[RuleSet] = None) -> None:
         self._source_path = source_path
+        self._rules = rules or load_rules()
         self._imports: Dict[str, str] = {}
         self._from_imports: Dict[str, str] = {}
         self._risks: List[Risk] = []
@@ -90,37 +98,13 @@ class RiskyCallDetector(ast.NodeVisitor):
         return None
 
     def _check_call(self, node: ast.Call, full_name: str) -> None:
-        if full_name in {"eval", "exec"}:
-            self._add(node, full_name, "high", "Dynamic code execution")
-            return
-        if full_name in {"os.system"}:
-            self._add(node, "os.system", "high", "Shell execution")
-            return
-        if full_name.startswith("subprocess."):
-            if self._has_shell_true(node):
-                self._add(node, full_name, "high", "subprocess with shell=True")
-            else:
-                self._add(node, full_name, "medium", "subprocess execution")
-            return
-        if full_name.startswith("pickle.") and full_name in {"pickle.load", "pickle.loads"}:
-            self._add(node, full_name, "medium", "Pickle deserialization")
-            return
-        if full_name in {"yaml.load", "ruamel.yaml.load"}:
-            self._add(node, full_name, "medium", "YAML load without SafeLoader")
-            return
-        if full_name.startswith("ctypes."):
-            self._add(node, full_name, "medium", "ctypes native call")
-            return
-
-    def _has_shell_true(self, node: ast.Call) -> bool:
-        for keyword in node.keywords:
-            if keyword.arg == "shell":
-                value = keyword.value
-                if isinstance(value, ast.Constant) and value.value is True:
-                    return True
-        return False
+        rule = self._rules.match(full_name, node)
+        if rule is not None:
+            self._add(node, rule.kind or full_name, rule.severity, rule.message, rule.id)
 
-    def _add(self, node: ast.AST, kind: str, severity: str, message: str) -> None:
+    def _add(
+        self, node: ast.AST, kind: str, severity: str, message: str, rule: Optional[str] = None
+    ) -> None:
         line = getattr(node, "lineno", 1)
         self._risks.append(
             Risk(
@@ -129,20 +113,28 @@ class RiskyCallDetector(ast.NodeVisitor):
                 severity=severity,
                 message=message,
                 file=self._source_path,
+                rule=rule,
             )
         )
 
 
 # Analyze one Python file and return a list of risk dicts.
-def analyze_python_ast(source_path: str) -> List[dict]:
+def analyze_python_ast(source_path: str, rules: Optional[RuleSet] = None) -> List[dict]:
     if not os.path.exists(source_path):
         raise FileNotFoundError(source_path)
 
     with open(source_path, "r", encoding="utf-8") as handle:
         source = handle.read()
 
+    return analyze_python_source(source, source_path, rules)
+
+
+# Same, for source already in memory (bytes honour PEP 263 coding lines).
+def analyze_python_source(
+    source: Union[str, bytes], source_path: str, rules: Optional[RuleSet] = None
+) -> List[dict]:
     tree = ast.parse(source, filename=source_path)
-    detector = RiskyCallDetector(source_path)
+    detector = RiskyCallDetector(source_path, rules)
     detector.visit(tree)
 
     risks = [risk.to_json() for risk in detector.risks]
@@ -156,10 +148,12 @@ def _main(argv: Optional[Iterable[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Detect risky Python AST patterns.")
     parser.add_argument("source", help="Python source file to analyze")
     parser.add_argument("-o", "--output", help="Optional JSON output path")
+    parser.add_argument("--rules", help="JSON/TOML rule file (see ast_rules)")
     args = parser.parse_args(argv)
 
-    risks = analyze_python_ast(args.source)
-    payload = {"risks": risks}
+    rules = load_rules(args.rules)
+    risks = analyze_python_ast(args.source, rules)
+    payload = {"risks": risks, "rule_hits": dict(rules.hits)}
 
     if args.output:
         with open(args.output, "w", encoding="utf-8") as handle:
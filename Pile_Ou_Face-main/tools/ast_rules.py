@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Declarative risky-call rules and their compiled lookup tables."""
+
+# A rule matches the dotted call name resolved by RiskyCallDetector, either
+# exactly ("names") or by leading components ("prefixes": "subprocess"
+# matches subprocess.run, not subprocess itself), optionally only when some
+# keyword arguments are literal constants ("keywords": {"shell": true}) or
+# absent ("missing_keywords": ["Loader"]):
+#   {"id": "subprocess-shell", "prefixes": ["subprocess"],
+#    "keywords": {"shell": true}, "severity": "high",
+#    "message": "subprocess with shell=True"}
+# "kind" defaults to the resolved call name. A rule file (JSON, or TOML
+# with [[rules]] tables) lists its rules under "rules"; they are checked
+# before the built-in ones unless "builtin" is false. Rules compile into an
+# exact-name dict and a prefix trie on name components, so a call costs one
+# dict lookup plus one trie step per component whatever the rule count. When
+# several rules match, the first declared one wins.
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+BUILTIN_RULES: List[dict] = [
+    {"id": "dynamic-exec", "names": ["eval", "exec"], "severity": "high", "message": "Dynamic code execution"},
+    {"id": "os-system", "names": ["os.system"], "severity": "high", "message": "Shell execution"},
+    {
+        "id": "subprocess-shell",
+        "prefixes": ["subprocess"],
+        "keywords": {"shell": True},
+        "severity": "high",
+        "message": "subprocess with shell=True",
+    },
+    {"id": "subprocess", "prefixes": ["subprocess"], "severity": "medium", "message": "subprocess execution"},
+    {
+        "id": "pickle-load",
+        "names": ["pickle.load", "pickle.loads"],
+        "severity": "medium",
+        "message": "Pickle deserialization",
+    },
+    {
+        "id": "yaml-load",
+        "names": ["yaml.load", "ruamel.yaml.load"],
+        "severity": "medium",
+        "message": "YAML load without SafeLoader",
+    },
+    {"id": "ctypes", "prefixes": ["ctypes"], "severity": "medium", "message": "ctypes native call"},
+]
+
+_RULE_KEYS = {"id", "names", "prefixes", "keywords", "missing_keywords", "severity", "message", "kind"}
+
+_MISSING = object()
+
+
+@dataclass
+class RiskRule:
+    id: str
+    severity: str
+    message: str
+    kind: Optional[str] = None
+    names: List[str] = field(default_factory=list)
+    prefixes: List[str] = field(default_factory=list)
+    keywords: Dict[str, object] = field(default_factory=dict)
+    missing_keywords: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "RiskRule":
+        unknown = set(spec) - _RULE_KEYS
+        if unknown:
+            raise ValueError(f"rule {spec.get('id')!r}: unknown keys {sorted(unknown)}")
+        for key in ("id", "severity", "message"):
+            if not isinstance(spec.get(key), str):
+                raise ValueError(f"rule {spec.get('id')!r}: {key!r} must be a string")
+        if not spec.get("names") and not spec.get("prefixes"):
+            raise ValueError(f"rule {spec['id']!r}: needs 'names' or 'prefixes'")
+        return cls(
+            id=spec["id"],
+            severity=spec["severity"],
+            message=spec["message"],
+            kind=spec.get("kind"),
+            names=list(spec.get("names", [])),
+            prefixes=[prefix.rstrip(".") for prefix in spec.get("prefixes", [])],
+            keywords=dict(spec.get("keywords", {})),
+            missing_keywords=list(spec.get("missing_keywords", [])),
+        )
+
+    # Keyword predicates against the call's literal keyword arguments.
+    def accepts(self, keywords: Dict[str, object]) -> bool:
+        for name, expected in self.keywords.items():
+            value = keywords.get(name, _MISSING)
+            # type() check: shell=1 is not shell=True.
+            if value is _MISSING or type(value) is not type(expected) or value != expected:
+                return False
+        return not any(name in keywords for name in self.missing_keywords)
+
+
+class _PrefixNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _PrefixNode] = {}
+        self.rules: List[Tuple[int, RiskRule]] = []
+
+
+class RuleSet:
+    """Compiled rules plus per-rule hit counters."""
+
+    def __init__(self, rules: List[RiskRule], source: str = "builtin") -> None:
+        self.rules = rules
+        self.source = source
+        # rule id -> calls matched with this set in the process
+        self.hits: Counter = Counter()
+        self._exact: Dict[str, List[Tuple[int, RiskRule]]] = {}
+        self._prefixes = _PrefixNode()
+        seen = set()
+        for order, rule in enumerate(rules):
+            if rule.id in seen:
+                raise ValueError(f"duplicate rule id {rule.id!r}")
+            seen.add(rule.id)
+            for name in rule.names:
+                self._exact.setdefault(name, []).append((order, rule))
+            for prefix in rule.prefixes:
+                node = self._prefixes
+                for part in prefix.split("."):
+                    node = node.children.setdefault(part, _PrefixNode())
+                node.rules.append((order, rule))
+        self.uses_keywords = any(rule.keywords or rule.missing_keywords for rule in rules)
+        self.digest = hashlib.sha256(
+            json.dumps([rule.__dict__ for rule in rules], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def from_specs(cls, specs: List[dict], source: str = "builtin") -> "RuleSet":
+        return cls([RiskRule.from_spec(spec) for spec in specs], source)
+
+    # Rules that may apply to `full_name`, in declaration order.
+    def candidates(self, full_name: str) -> List[RiskRule]:
+        found = list(self._exact.get(full_name, ()))
+        parts = full_name.split(".")
+        node = self._prefixes
+        for part in parts[:-1]:
+            node = node.children.get(part)
+            if node is None:
+                break
+            found.extend(node.rules)
+        if len(found) > 1:
+            found.sort(key=lambda item: item[0])
+        return [rule for _order, rule in found]
+
+    # First rule matching the call, counted in `hits`.
+    def match(self, full_name: str, node: ast.Call) -> Optional[RiskRule]:
+        candidates = self.candidates(full_name)
+        if not candidates:
+            return None
+        keywords = _literal_keywords(node) if self.uses_keywords else {}
+        for rule in candidates:
+            if rule.accepts(keywords):
+                self.hits[rule.id] += 1
+                return rule
+        return None
+
+
+# keyword -> constant value; non-literal values map to a placeholder that
+# equals nothing but still counts as present for missing_keywords.
+def _literal_keywords(node: ast.Call) -> Dict[str, object]:
+    keywords: Dict[str, object] = {}
+    for keyword in node.keywords:
+        if keyword.arg is None:
+            continue
+        value = keyword.value
+        keywords[keyword.arg] = value.value if isinstance(value, ast.Constant) else _MISSING
+    return keywords
+
+
+def _read_rule_file(path: str) -> dict:
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(f"{path}: TOML rule files need Python 3.11+ or tomli")
+        with open(path, "rb") as handle:
+            return tomllib.load(handle)
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@lru_cache(maxsize=None)
+def _load_rules(path: str, _mtime_ns: int) -> RuleSet:
+    data = _read_rule_file(path)
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError(f"{path}: expected a top-level 'rules' list")
+    specs = list(data["rules"])
+    if data.get("builtin", True):
+        specs += BUILTIN_RULES
+    return RuleSet.from_specs(specs, source=path)
+
+
+# RuleSet for a rule file (None: built-in rules), compiled once per file
+# version.
+def load_rules(path: Optional[str] = None) -> RuleSet:
+    if path is None:
+        return _builtin_rules()
+    return _load_rules(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _builtin_rules() -> RuleSet:
+    return RuleSet.from_specs(BUILTIN_RULES)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Scan a Python tree for AST risks across a process pool, incrementally."""
+
+# `sources` is a file, a directory (every *.py below it, hidden directories
+# and __pycache__ skipped) or a glob pattern ("pkg/**/*.py"). Each file is
+# analysed by ast_risks; results are kept per content SHA-256 in one index
+# entry of the artifact cache per scanned tree (dropped when the rule set
+# changes):
+#   rules:    RuleSet digest
+#   files:    path -> [size, mtime_ns, sha256]
+#   results:  sha256 -> {"risks": [[line, kind, severity, message, rule], ...],
+#                        "seconds": parse time} or {"error": "..."}
+# A file whose size and mtime are unchanged is not even read; a touched file
+# is re-hashed and only re-parsed when its content changed. New work is
+# fanned out over a multiprocessing pool.
+
+from __future__ import annotations
+
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from artifact_cache import ArtifactCache, default_cache_dir, digest_bytes
+from ast_risks import analyze_python_source
+from ast_rules import RuleSet, load_rules
+
+# Bump when the detector's output for the same source changes.
+SCAN_VERSION = 2
+_INDEX_KIND = "ast_scan"
+# Below this many files to parse, the pool costs more than it saves.
+_INLINE_FILES = 32
+
+
+def is_multi_source(sources: str) -> bool:
+    return os.path.isdir(sources) or any(ch in sources for ch in "*?[")
+
+
+# Python files designated by `sources`, in a stable order.
+def expand_sources(sources: str) -> List[str]:
+    if os.path.isdir(sources):
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(sources):
+            dirnames[:] = sorted(
+                name for name in dirnames if not name.startswith(".") and name != "__pycache__"
+            )
+            paths.extend(os.path.join(dirpath, name) for name in sorted(filenames) if name.endswith(".py"))
+        return paths
+    if any(ch in sources for ch in "*?["):
+        return sorted(path for path in glob.glob(sources, recursive=True) if os.path.isfile(path))
+    if not os.path.exists(sources):
+        raise FileNotFoundError(sources)
+    return [sources]
+
+
+# Per-process rule set, set by _init_worker (pool) or scan_python_sources.
+_WORKER: Dict[str, RuleSet] = {}
+
+
+def _init_worker(rules_path: Optional[str]) -> None:
+    _WORKER["rules"] = load_rules(rules_path)
+
+
+# Worker side: parse one file. Returns its digest and the cacheable result.
+def _scan_file(path: str) -> Tuple[str, Optional[str], dict]:
+    try:
+        with open(path, "rb") as handle:
+            data = handle.read()
+    except OSError as exc:
+        return path, None, {"error": f"{type(exc).__name__}: {exc}"}
+    started = time.perf_counter()
+    try:
+        risks = analyze_python_source(data, path, _WORKER["rules"])
+    except (SyntaxError, ValueError) as exc:
+        result: dict = {"error": f"{type(exc).__name__}: {exc}"}
+    else:
+        result = {
+            "risks": [
+                [risk["line"], risk["kind"], risk["severity"], risk["message"], risk.get("rule")]
+                for risk in risks
+            ]
+        }
+    result["seconds"] = round(time.perf_counter() - started, 6)
+    return path, digest_bytes(data), result
+
+
+def _index_key(sources: str) -> str:
+    return digest_bytes(f"{_INDEX_KIND}:{os.path.abspath(sources)}".encode("utf-8"))
+
+
+def _load_index(cache: Optional[ArtifactCache], key: str, rules: RuleSet) -> dict:
+    index = cache.load(key, _INDEX_KIND) if cache is not None else None
+    if (
+        not isinstance(index, dict)
+        or index.get("version") != SCAN_VERSION
+        or index.get("rules") != rules.digest
+    ):
+        return {"files": {}, "results": {}}
+    return index
+
+
+# Scan `sources` and return (risks, report). Risks use the ast_risks dict
+# layout; the report has the per-file timings (seconds is the parse time,
+# also for results reused from the cache), parse errors and per-rule hits.
+# `rules_path` is a rule file for ast_rules.load_rules (None: built-in).
+def scan_python_sources(
+    sources: str,
+    cache: Optional[ArtifactCache] = None,
+    jobs: Optional[int] = None,
+    rules_path: Optional[str] = None,
+) -> Tuple[List[dict], dict]:
+    started = time.perf_counter()
+    rules = load_rules(rules_path)
+    paths = expand_sources(sources)
+    key = _index_key(sources)
+    index = _load_index(cache, key, rules)
+    known_files: Dict[str, list] = index["files"]
+    known_results: Dict[str, dict] = index["results"]
+
+    files: Dict[str, list] = {}
+    todo: List[str] = []
+    # Copies of a file already queued (vendored trees) reuse its result.
+    queued: Dict[str, str] = {}
+    copies: List[Tuple[str, list]] = []
+    rehashed = 0
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            todo.append(path)
+            continue
+        entry = known_files.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns and entry[2] in known_results:
+            files[path] = entry
+            continue
+        try:
+            with open(path, "rb") as handle:
+                digest = digest_bytes(handle.read())
+        except OSError:
+            todo.append(path)
+            continue
+        rehashed += 1
+        if digest in known_results:
+            files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        elif digest in queued:
+            copies.append((path, [stat.st_size, stat.st_mtime_ns, digest]))
+        else:
+            queued[digest] = path
+            todo.append(path)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(todo) >= _INLINE_FILES:
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(rules_path,)) as pool:
+            scanned = pool.map(_scan_file, todo, chunksize=max(1, len(todo) // (jobs * 8)))
+    else:
+        jobs = 1
+        _WORKER["rules"] = rules
+        scanned = [_scan_file(path) for path in todo]
+
+    parsed = set()
+    unreadable: Dict[str, dict] = {}
+    for path, digest, result in scanned:
+        if digest is None:
+            files[path] = [None, None, None]
+            unreadable[path] = result
+            parsed.add(path)
+            continue
+        try:
+            stat = os.stat(path)
+            files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        except OSError:
+            files[path] = [None, None, digest]
+        known_results[digest] = result
+        parsed.add(path)
+    for path, entry in copies:
+        if entry[2] in known_results:
+            files[path] = entry
+        else:
+            files[path] = [None, None, None]
+            unreadable[path] = {"error": "changed while scanning"}
+
+    risks: List[dict] = []
+    per_file: List[dict] = []
+    errors: List[dict] = []
+    hits: Counter = Counter()
+    for path in paths:
+        entry = files[path]
+        result = unreadable[path] if entry[2] is None else known_results[entry[2]]
+        for line, kind, severity, message, rule in result.get("risks", []):
+            risks.append(
+                {"line": line, "kind": kind, "severity": severity, "message": message, "file": path, "rule": rule}
+            )
+            hits[rule] += 1
+        if "error" in result:
+            errors.append({"file": path, "error": result["error"]})
+        per_file.append(
+            {
+                "file": path,
+                "risks": len(result.get("risks", [])),
+                "seconds": result.get("seconds"),
+                "cached": path not in parsed,
+            }
+        )
+
+    if cache is not None and (scanned or rehashed or set(known_files) != set(files)):
+        live = {entry[2] for entry in files.values() if entry[2]}
+        cache.store(
+            key,
+            _INDEX_KIND,
+            {
+                "version": SCAN_VERSION,
+                "rules": rules.digest,
+                "files": {path: entry for path, entry in files.items() if entry[2]},
+                "results": {digest: result for digest, result in known_results.items() if digest in live},
+            },
+        )
+
+    report = {
+        "sources": sources,
+        "files": len(paths),
+        "parsed": len(parsed),
+        "reused": len(paths) - len(parsed),
+        "rehashed": rehashed,
+        "errors": errors,
+        "rules": rules.source,
+        "rule_hits": dict(hits),
+        "jobs": jobs,
+        "seconds": round(time.perf_counter() - started, 6),
+        "per_file": per_file,
+    }
+    return risks, report
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Scan a Python file, directory or glob for risky AST patterns")
+    parser.add_argument("sources", help="File, directory or glob pattern (quote it: 'pkg/**/*.py')")
+    parser.add_argument("-o", "--output", help="Optional JSON output path")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=None, help="Artifact cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse every file")
+    parser.add_argument("--rules", help="JSON/TOML rule file (see ast_rules)")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else ArtifactCache(args.cache_dir or default_cache_dir())
+    risks, report = scan_python_sources(args.sources, cache, args.jobs, args.rules)
+    payload = {"risks": risks, "scan": report}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+    else:
+        print(json.dumps(payload, indent=2))
+    print(
+        f"{report['files']} files ({report['parsed']} parsed, {report['reused']} cached, "
+        f"{len(report['errors'])} errors), {len(risks)} risks in {report['seconds']:.3f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Trace one binary against many stdin/argv payloads across a process pool."""
+
+# Each worker loads the binary once; payloads are fanned out over the pool
+# and every run writes its own trace next to a summary manifest.
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from run_pipeline import _collect_disasm, _pipeline_meta
+from unicorn_trace import (
+    TraceConfig,
+    _load_code,
+    add_trace_arguments,
+    config_from_args,
+    open_cache,
+    parse_stdin_hex,
+    trace_binary,
+    write_trace_json,
+)
+
+# Payload keys; each holds a string.
+_PAYLOAD_KEYS = ("name", "stdin", "stdin_hex", "argv1")
+
+# Per-process state set by _init_worker.
+_WORKER: Dict[str, object] = {}
+
+
+# Read a payload file: one payload per line, either a JSON object with
+# optional "name", "stdin", "stdin_hex" and "argv1" string keys, or plain
+# text used as stdin. Blank lines and lines starting with "#" are skipped.
+def load_payloads(path: str) -> List[dict]:
+    payloads = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            text = line.rstrip("\n")
+            if not text.strip() or text.lstrip().startswith("#"):
+                continue
+            if text.lstrip().startswith("{"):
+                try:
+                    payload = json.loads(text)
+                except json.JSONDecodeError as exc:
+                    raise SystemExit(f"{path}:{line_no}: invalid JSON payload ({exc})")
+                problem = _payload_problem(payload)
+                if problem:
+                    raise SystemExit(f"{path}:{line_no}: invalid payload ({problem})")
+            else:
+                payload = {"stdin": text}
+            payload.setdefault("name", f"payload_{len(payloads):04d}")
+            payloads.append(payload)
+    return payloads
+
+
+# Why a decoded JSON payload cannot be traced (None when it is fine).
+def _payload_problem(payload: dict) -> Optional[str]:
+    for key in _PAYLOAD_KEYS:
+        if payload.get(key) is not None and not isinstance(payload[key], str):
+            return f"{key!r} must be a string"
+    if payload.get("stdin_hex") is not None:
+        try:
+            parse_stdin_hex(payload["stdin_hex"])
+        except SystemExit as exc:
+            return f"'stdin_hex': {exc}"
+    return None
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name) or "payload"
+
+
+def _payload_config(base: TraceConfig, payload: dict) -> TraceConfig:
+    stdin_data = base.stdin_data
+    if payload.get("stdin_hex") is not None:
+        stdin_data = parse_stdin_hex(payload["stdin_hex"])
+    elif payload.get("stdin") is not None:
+        stdin_data = payload["stdin"].encode("utf-8", errors="ignore")
+    argv1 = payload.get("argv1", base.argv1)
+    return replace(base, stdin_data=stdin_data, argv1=argv1)
+
+
+def _init_worker(binary_path: str, config: TraceConfig, output_dir: str, extra_meta: dict) -> None:
+    _WORKER["binary_path"] = binary_path
+    _WORKER["code"] = _load_code(binary_path)
+    _WORKER["config"] = config
+    _WORKER["output_dir"] = output_dir
+    _WORKER["extra_meta"] = extra_meta
+
+
+# One payload; any failure is recorded in the run's "error" field so the
+# rest of the batch and its manifest are unaffected.
+def _run_one(task: Tuple[int, dict]) -> dict:
+    index, payload = task
+    started = time.perf_counter()
+    try:
+        return _trace_one(index, payload, started)
+    except (ValueError, OSError, SystemExit) as exc:
+        error = str(exc)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return {"index": index, "name": payload.get("name"), "output": None, "error": error}
+
+
+def _trace_one(index: int, payload: dict, started: float) -> dict:
+    binary_path = _WORKER["binary_path"]
+    config = _payload_config(_WORKER["config"], payload)
+    name = _safe_name(str(payload["name"]))
+    output_path = os.path.join(_WORKER["output_dir"], f"{index:04d}_{name}.json")
+    if config.checkpoint_interval > 0:
+        config = replace(config, checkpoint_path=f"{output_path}.ckpt")
+
+    trace = trace_binary(_WORKER["code"], config, binary_path)
+    meta = {**trace.get("meta", {}), **_WORKER["extra_meta"], "payload": payload}
+    trace["meta"] = meta
+    trace["risks"] = []
+    write_trace_json(trace, output_path)
+
+    snapshots = trace.get("snapshots") or trace.get("frames") or []
+    final_rip = snapshots[-1].get("rip") if snapshots else None
+    return {
+        "index": index,
+        "name": payload["name"],
+        "output": os.path.basename(output_path),
+        "steps": meta.get("steps"),
+        "final_rip": hex(final_rip) if isinstance(final_rip, int) else final_rip,
+        "error": meta.get("error"),
+        "ret_overwritten": meta.get("ret_overwritten", False),
+        "ret_hijack": meta.get("ret_hijack"),
+        "stdin_len": len(config.stdin_data),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+# Trace every payload and write <output_dir>/manifest.json.
+def run_batch(
+    binary_path: str,
+    payloads: List[dict],
+    config: TraceConfig,
+    output_dir: str,
+    jobs: Optional[int] = None,
+) -> dict:
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+
+    # Disassembly does not depend on the payload; build it once.
+    disasm = _collect_disasm(binary_path, os.path.join(output_dir, "trace.json"), open_cache(config))
+    extra_meta = _pipeline_meta(binary_path, None, disasm)
+
+    started = time.perf_counter()
+    tasks = list(enumerate(payloads))
+    initargs = (binary_path, config, output_dir, extra_meta)
+    if jobs == 1:
+        _init_worker(*initargs)
+        results = [_run_one(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=initargs) as pool:
+            results = list(pool.imap_unordered(_run_one, tasks, chunksize=1))
+    results.sort(key=lambda item: item["index"])
+    elapsed = time.perf_counter() - started
+
+    manifest = {
+        "binary": os.path.abspath(binary_path),
+        "jobs": jobs,
+        "count": len(results),
+        "seconds": round(elapsed, 4),
+        "runs_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        "runs": results,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Trace one binary against many stdin/argv payloads in parallel"
+    )
+    parser.add_argument("--binary", required=True, help="Raw or ELF binary to trace")
+    parser.add_argument("--payloads", required=True, help="Payload file (JSON lines or plain text)")
+    parser.add_argument("--output-dir", default="batch_traces", help="Directory for traces + manifest")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes (default: number of CPU cores)",
+    )
+    add_trace_arguments(parser)
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.payloads)
+    manifest = run_batch(args.binary, payloads, config_from_args(args), args.output_dir, args.jobs)
+    overwritten = sum(1 for run in manifest["runs"] if run.get("ret_overwritten"))
+    print(
+        f"{manifest['count']} runs in {manifest['seconds']}s "
+        f"({manifest['jobs']} jobs), return address overwritten in {overwritten}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
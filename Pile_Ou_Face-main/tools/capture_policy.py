@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Snapshot capture policies: which executed steps produce a snapshot."""
+
+# A policy is a list of --capture rules; a step is captured when any rule
+# matches. Without rules every step is captured.
+#   every:N                           every Nth instruction (the first included)
+#   on:call,ret,syscall,stack-write   control-flow / syscall / stack events
+#   when:rip in <lo-hi | symbol>      rip inside a range or function
+# Uncaptured steps still run and keep counting, so `step` stays the true
+# instruction index.
+
+from __future__ import annotations
+
+from typing import Callable, FrozenSet, Iterable, List, Tuple
+
+EVENTS = ("call", "ret", "syscall", "stack-write")
+
+_SYSCALL_MNEMONICS = ("syscall", "sysenter")
+# Instruction prefixes printed before call/ret (CET / MPX / "rep ret").
+BRANCH_PREFIXES = frozenset(("bnd", "notrack", "rep", "repz"))
+
+
+# Mnemonic of a disassembled instruction, past any BRANCH_PREFIXES
+# ("bnd ret" -> "ret").
+def branch_mnemonic(instr_text: str) -> str:
+    mnemonic = instr_text.split(" ", 1)[0]
+    if mnemonic in BRANCH_PREFIXES and " " in instr_text:
+        mnemonic = instr_text.split(" ", 2)[1]
+    return mnemonic
+
+
+class CapturePolicy:
+    """Parsed --capture rules."""
+
+    def __init__(
+        self,
+        every: int = 0,
+        events: FrozenSet[str] = frozenset(),
+        ranges: Tuple[Tuple[int, int], ...] = (),
+        specs: Tuple[str, ...] = (),
+    ) -> None:
+        self.every = every
+        self.events = events
+        self.ranges = ranges
+        self.specs = specs
+
+    # `resolve_range` turns "lo-hi" or a symbol into a half-open (lo, hi).
+    @classmethod
+    def parse(
+        cls,
+        specs: Iterable[str],
+        resolve_range: Callable[[str], Tuple[int, int]],
+    ) -> "CapturePolicy":
+        specs = tuple(specs)
+        every = 0
+        events = set()
+        ranges: List[Tuple[int, int]] = []
+        for spec in specs:
+            kind, sep, arg = spec.partition(":")
+            kind = kind.strip().lower()
+            arg = arg.strip()
+            if not sep or not arg:
+                raise ValueError(f"Invalid capture rule: {spec!r}")
+            if kind == "every":
+                if every:
+                    raise ValueError(f"Duplicate capture interval: {spec!r}")
+                try:
+                    every = int(arg, 0)
+                except ValueError:
+                    raise ValueError(f"Invalid capture interval: {spec!r}")
+                if every <= 0:
+                    raise ValueError(f"Capture interval must be positive: {spec!r}")
+            elif kind == "on":
+                for name in arg.split(","):
+                    name = name.strip().lower()
+                    if name not in EVENTS:
+                        raise ValueError(
+                            f"Unknown capture event {name!r} (expected {', '.join(EVENTS)})"
+                        )
+                    events.add(name)
+            elif kind == "when":
+                lhs, _, rhs = arg.partition(" in ")
+                if lhs.strip().lower() not in ("rip", "eip", "pc") or not rhs.strip():
+                    raise ValueError(f"Unsupported capture predicate: {spec!r}")
+                ranges.append(resolve_range(rhs.strip()))
+            else:
+                raise ValueError(f"Unknown capture rule: {spec!r}")
+        return cls(every, frozenset(events), tuple(ranges), specs)
+
+    # Syntax check of one rule before the binary is loaded (when: ranges are
+    # resolved later); raises ValueError like parse().
+    @classmethod
+    def check_spec(cls, spec: str) -> str:
+        cls.parse((spec,), lambda _range: (0, 0))
+        return spec
+
+    # The same check over a whole rule list (catches a repeated every:).
+    @classmethod
+    def check_specs(cls, specs: Iterable[str]) -> Tuple[str, ...]:
+        return cls.parse(specs, lambda _range: (0, 0)).specs
+
+    @property
+    def captures_all(self) -> bool:
+        return not self.every and not self.events and not self.ranges
+
+    @property
+    def wants_stack_writes(self) -> bool:
+        return "stack-write" in self.events
+
+    # `stack_written` is true when the previous instruction wrote into the
+    # captured stack window, so this step shows the new value.
+    def wants(self, step: int, addr: int, instr_text: str, stack_written: bool = False) -> bool:
+        if self.captures_all:
+            return True
+        if self.every and (step - 1) % self.every == 0:
+            return True
+        if self.ranges and any(lo <= addr < hi for lo, hi in self.ranges):
+            return True
+        if self.events:
+            if stack_written and "stack-write" in self.events:
+                return True
+            mnemonic = branch_mnemonic(instr_text)
+            if "call" in self.events and mnemonic.startswith("call"):
+                return True
+            if "ret" in self.events and mnemonic.startswith("ret"):
+                return True
+            if "syscall" in self.events and (
+                mnemonic in _SYSCALL_MNEMONICS or instr_text == "int 0x80"
+            ):
+                return True
+        return False
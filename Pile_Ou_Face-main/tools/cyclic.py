@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""De Bruijn (cyclic) patterns for locating overflow offsets."""
+
+# Every n-byte window of the pattern is unique, so any register or stack
+# word that ends up holding pattern bytes tells us exactly how far into the
+# input it was read from. n is the word size (4 on x86, 8 on x86_64).
+
+from __future__ import annotations
+
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_ALPHABET = b"abcdefghijklmnopqrstuvwxyz"
+
+
+def _de_bruijn(alphabet: bytes, n: int) -> Iterator[int]:
+    k = len(alphabet)
+    a = [0] * (k * n)
+
+    def db(t: int, p: int) -> Iterator[int]:
+        if t > n:
+            if n % p == 0:
+                for j in range(1, p + 1):
+                    yield alphabet[a[j]]
+        else:
+            a[t] = a[t - p]
+            yield from db(t + 1, p)
+            for j in range(a[t - p] + 1, k):
+                a[t] = j
+                yield from db(t + 1, t)
+
+    return db(1, 1)
+
+
+# First `length` bytes of the de Bruijn sequence with unique n-byte windows.
+def cyclic(length: int, n: int = 4, alphabet: bytes = DEFAULT_ALPHABET) -> bytes:
+    if n <= 0:
+        raise ValueError("n must be positive")
+    return bytes(islice(_de_bruijn(alphabet, n), length))
+
+
+# Offset of `value` (an n-byte little-endian word or raw bytes) in `pattern`.
+def cyclic_find(value: Union[int, bytes], pattern: bytes, n: int = 4) -> Optional[int]:
+    if isinstance(value, int):
+        if value < 0 or value >= 1 << (8 * n):
+            return None
+        needle = value.to_bytes(n, "little")
+    else:
+        needle = bytes(value[:n])
+    if len(needle) < n:
+        return None
+    offset = pattern.find(needle)
+    return offset if offset >= 0 else None
+
+
+# Summarize what the pattern controls once emulation stopped. `hijack` is
+# the CallTracker event (if any) and `registers` the final register values.
+def analyze_overflow(
+    pattern: bytes,
+    n: int,
+    hijack: Optional[dict],
+    registers: Iterable[Tuple[str, int]],
+    frame_reg: str,
+) -> dict:
+    controlled: Dict[str, int] = {}
+    for name, value in registers:
+        offset = cyclic_find(value, pattern, n)
+        if offset is not None:
+            controlled[name] = offset
+
+    ret_offset = None
+    hijacked_rip = None
+    pivot_offset = pivot_delta = None
+    if hijack:
+        hijacked_rip = hijack.get("target")
+        if hijacked_rip is not None:
+            ret_offset = cyclic_find(int(hijacked_rip, 16), pattern, n)
+        if hijack.get("kind") == "stack_pivot":
+            pivot_offset, pivot_delta = _pivot_source(int(hijack["slot"], 16), pattern, n)
+
+    report = {
+        "pattern_length": len(pattern),
+        "word_size": n,
+        "hijacked": ret_offset is not None or pivot_offset is not None or bool(controlled),
+        "hijack_step": hijack.get("step") if hijack else None,
+        "hijack_kind": hijack.get("kind") if hijack else None,
+        "hijacked_rip": hijacked_rip,
+        "ret_offset": ret_offset,
+        "pivot_offset": pivot_offset,
+        "pivot_delta": pivot_delta,
+        "rbp_offset": controlled.get(frame_reg),
+        "controlled_registers": controlled,
+    }
+    return report
+
+
+# Pattern offset of the word the stack pointer of a pivoted ret was
+# computed from, and sp minus that word. Epilogues restore sp from a saved
+# register give or take a word or two (gcc's 32-bit main: lea esp, [ecx-4]).
+def _pivot_source(sp: int, pattern: bytes, n: int) -> Tuple[Optional[int], Optional[int]]:
+    for delta in (0, -n, n, -2 * n, 2 * n):
+        offset = cyclic_find(sp - delta, pattern, n)
+        if offset is not None:
+            return offset, delta
+    return None, None
+
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate or search a cyclic pattern")
+    parser.add_argument("length", type=int, help="Pattern length in bytes")
+    parser.add_argument("-n", type=int, default=4, help="Window size (word size)")
+    parser.add_argument("--find", default=None, help="Value to locate (hex, e.g. 0x6161616b)")
+    args = parser.parse_args(argv)
+
+    pattern = cyclic(args.length, args.n)
+    if args.find is None:
+        print(pattern.decode("ascii"))
+        return 0
+    offset = cyclic_find(int(args.find, 16), pattern, args.n)
+    print(offset if offset is not None else "not found")
+    return 0 if offset is not None else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
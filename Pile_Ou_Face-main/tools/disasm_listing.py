@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""Disassembly listing built in-process with Capstone, in objdump's layout."""
+
+# Executable sections (or executable PT_LOAD segments when the section
+# headers are stripped) are decoded straight from the ELF image and
+# labelled with its symbols plus synthesized name@plt entries. The text
+# mirrors `objdump -d -M intel` so the Webview's line links and operand
+# heuristics keep working, without a binutils subprocess:
+#   0000000000401136 <main>:
+#     401136:	55                   	push   rbp
+# `DisasmBuilder.function()` decodes a single symbol on demand.
+#
+# The layout follows objdump line for line: decoding restarts at every
+# symbol, zero runs are folded into "\t..." with objdump's thresholds, and
+# instructions longer than 7 bytes continue their bytes on the next lines,
+# so each instruction sits on the same line number in both listings.
+# Operand spelling still differs in places: Capstone prints "nop" for
+# "xchg ax,ax", drops "*1", "+0x0" and "ds:", writes shift counts of one
+# as 0x1 and moves segment prefixes into the operand; GOT slots are named
+# name@got rather than name@GLIBC_x. The UI falls back to objdump only
+# when Capstone is missing.
+
+from __future__ import annotations
+
+import bisect
+import functools
+import importlib.util
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from elf_format import (
+    PT_LOAD,
+    R_GLOB_DAT,
+    R_JUMP_SLOT,
+    STB_GLOBAL,
+    STT_FILE,
+    STT_OBJECT,
+    STT_SECTION,
+    _parse_elf_header,
+    _parse_program_headers,
+    _parse_section_headers,
+    dynamic_relocations,
+    symbol_table,
+)
+
+SHT_NOBITS = 8
+SHF_EXECINSTR = 0x4
+PF_X = 0x1
+# objdump prints 7 bytes per line and pads the hex column to that width.
+_BYTES_PER_LINE = 7
+_BYTES_WIDTH = 3 * _BYTES_PER_LINE
+# Zero runs objdump folds into "...": at least 8 bytes (4-byte multiples
+# unless the run ends the symbol), or under 3 bytes left before the next
+# symbol.
+_SKIP_ZEROES = 8
+_SKIP_ZEROES_AT_END = 3
+_BRANCH_TARGET = re.compile(r"^0x([0-9a-f]+)$")
+_RIP_RELATIVE = re.compile(r"\[rip ([+-]) 0x([0-9a-f]+)\]")
+_MEMORY_ABS = re.compile(r"\[0x([0-9a-f]+)\]")
+_MEMORY_EBX = re.compile(r"\[ebx ([+-]) 0x([0-9a-f]+)\]")
+_SIZE_PTR = re.compile(r"\b(byte|word|dword|qword|tbyte|xmmword|ymmword|zmmword) ptr\b")
+_BRACKET = re.compile(r"\[[^\]]*\]")
+# Bare decimal numbers (Capstone prints values below 10 in decimal); scale
+# factors and st(N) registers stay decimal, as in objdump.
+_DECIMAL = re.compile(r"(?<![\w.*(])(\d+)(?![\w.)])")
+
+
+def capstone_available() -> bool:
+    return importlib.util.find_spec("capstone") is not None
+
+
+@dataclass
+class CodeRegion:
+    name: str
+    addr: int
+    data: bytes
+
+
+class _Labels:
+    """Sorted address -> name table for headers and `<sym+off>` operands."""
+
+    def __init__(self, entries: Dict[int, str]) -> None:
+        self._addrs = sorted(entries)
+        self._names = [entries[addr] for addr in self._addrs]
+
+    def describe(self, addr: int) -> Optional[str]:
+        pos = bisect.bisect_right(self._addrs, addr) - 1
+        if pos < 0:
+            return None
+        delta = addr - self._addrs[pos]
+        return self._names[pos] if not delta else f"{self._names[pos]}+0x{delta:x}"
+
+    def after(self, addr: int) -> Optional[int]:
+        pos = bisect.bisect_right(self._addrs, addr)
+        return self._addrs[pos] if pos < len(self._addrs) else None
+
+
+# Capstone operands in objdump's spelling ("QWORD PTR [rbp-0x8]", hex
+# numbers, no space after commas) so text matches what the Webview parses.
+@functools.lru_cache(maxsize=65536)
+def _objdump_operands(op_str: str) -> str:
+    text = _DECIMAL.sub(lambda match: hex(int(match.group(1))), op_str)
+    text = _SIZE_PTR.sub(lambda match: f"{match.group(1).upper()} PTR", text)
+    text = _BRACKET.sub(lambda match: match.group(0).replace(" ", ""), text)
+    return text.replace(", ", ",")
+
+
+class DisasmBuilder:
+    """Decodes the executable code of one ELF image."""
+
+    def __init__(self, blob: bytes, path: str = "") -> None:
+        from capstone import CS_ARCH_X86, CS_MODE_32, CS_MODE_64, Cs  # type: ignore
+
+        self.path = path
+        header = _parse_elf_header(blob)
+        self.arch_bits = header["class"]
+        self._cs = Cs(CS_ARCH_X86, CS_MODE_64 if self.arch_bits == 64 else CS_MODE_32)
+        sections = _parse_section_headers(blob, header)
+        self.regions = _code_regions(blob, header, sections)
+        symbols = [
+            sym
+            for sym in symbol_table(blob)
+            if sym.name and sym.defined and sym.value and sym.type not in (STT_SECTION, STT_FILE)
+        ]
+        self._sizes: Dict[str, Tuple[int, int]] = {}
+        code: Dict[int, str] = {}
+        data: Dict[int, str] = {}
+        for sym in sorted(symbols, key=lambda sym: (sym.value, sym.bind != STB_GLOBAL, sym.name)):
+            self._sizes.setdefault(sym.name, (sym.value, sym.size))
+            if sym.type == STT_OBJECT:
+                data.setdefault(sym.value, sym.name)
+            elif self._region_of(sym.value) is not None:
+                code.setdefault(sym.value, sym.name)
+        phdrs = _parse_program_headers(blob, header)
+        # GOT slot -> imported symbol (JUMP_SLOT/GLOB_DAT relocations).
+        slots = {
+            reloc.offset: reloc.symbol.name
+            for reloc in dynamic_relocations(blob, header, phdrs)
+            if reloc.type in (R_JUMP_SLOT, R_GLOB_DAT) and reloc.symbol and reloc.symbol.name
+        }
+        for addr, name in slots.items():
+            data.setdefault(addr, f"{name}@got")
+        for addr, name in self._plt_names(slots, sections).items():
+            code.setdefault(addr, name)
+            self._sizes.setdefault(name, (addr, 0))
+        self._code_names = code
+        self._code_labels = _Labels(code)
+        self._labels = _Labels({**data, **code})
+
+    def _region_of(self, addr: int) -> Optional[CodeRegion]:
+        for region in self.regions:
+            if region.addr <= addr < region.addr + len(region.data):
+                return region
+        return None
+
+    # name@plt for every PLT entry jumping through a relocated GOT slot.
+    # Entries are 16 bytes; the slot is read from the entry's indirect jmp
+    # (rip-relative, absolute, or ebx-relative to .got.plt).
+    def _plt_names(self, slots: Dict[int, str], sections: List[dict]) -> Dict[int, str]:
+        if not slots:
+            return {}
+        got_plt = next((sec["addr"] for sec in sections if sec["name"] == ".got.plt"), None)
+        names: Dict[int, str] = {}
+        for region in self.regions:
+            if not region.name.startswith(".plt"):
+                continue
+            for addr, size, mnemonic, op_str in self._cs.disasm_lite(region.data, region.addr):
+                if not mnemonic.endswith("jmp"):
+                    continue
+                slot = None
+                match = _RIP_RELATIVE.search(op_str)
+                if match:
+                    disp = int(match.group(2), 16)
+                    slot = addr + size + (disp if match.group(1) == "+" else -disp)
+                elif _MEMORY_ABS.search(op_str):
+                    slot = int(_MEMORY_ABS.search(op_str).group(1), 16)
+                elif got_plt is not None and _MEMORY_EBX.search(op_str):
+                    match = _MEMORY_EBX.search(op_str)
+                    disp = int(match.group(2), 16)
+                    slot = got_plt + (disp if match.group(1) == "+" else -disp)
+                if slot in slots:
+                    names.setdefault(addr & ~0xF, f"{slots[slot]}@plt")
+        return names
+
+    # Listing lines of the symbol range [start, end) as (line, entry):
+    # entry is {addr, text} for an instruction (text being the part after
+    # "addr:\t") and None for "..." and byte continuation lines.
+    # Undecodable bytes become one-byte "(bad)" entries, as in objdump.
+    def _decode(
+        self, region: CodeRegion, start: int, end: int
+    ) -> Iterable[Tuple[str, Optional[dict]]]:
+        data = region.data[start - region.addr : end - region.addr]
+        pos = 0
+        # One Capstone pass over the range, restarted only after a folded
+        # zero run or an undecodable byte (where disasm_lite stops).
+        insns: Optional[Iterator[tuple]] = None
+        while pos < len(data):
+            skip = _zero_skip(data, pos)
+            if skip:
+                yield "\t...", None
+                pos += skip
+                insns = None
+                continue
+            if insns is None:
+                insns = self._cs.disasm_lite(data[pos:], start + pos)
+            insn = next(insns, None)
+            if insn is None:
+                size, text = 1, "(bad)"
+                insns = None
+            else:
+                _addr, size, mnemonic, op_str = insn
+                text = self._render(start + pos, size, mnemonic, op_str)
+            raw = data[pos : pos + size]
+            column = f"{raw[:_BYTES_PER_LINE].hex(' '):<{_BYTES_WIDTH}}\t{text}"
+            yield f"{start + pos:8x}:\t{column}", {"addr": f"0x{start + pos:x}", "text": column}
+            for more in range(_BYTES_PER_LINE, size, _BYTES_PER_LINE):
+                chunk = raw[more : more + _BYTES_PER_LINE]
+                yield f"{start + pos + more:8x}:\t" + "".join(f"{byte:02x} " for byte in chunk), None
+            pos += size
+
+    # Symbol ranges of a region as (start, end, label); bytes before the
+    # first symbol are labelled like objdump does.
+    def _ranges(self, region: CodeRegion) -> List[Tuple[int, int, str]]:
+        region_end = region.addr + len(region.data)
+        starts = sorted(addr for addr in self._code_names if region.addr <= addr < region_end)
+        ranges = []
+        if not starts or starts[0] != region.addr:
+            first = starts[0] if starts else region_end
+            label = f"{self._code_names[first]}-0x{first - region.addr:x}" if starts else region.name
+            ranges.append((region.addr, first, label))
+        for idx, addr in enumerate(starts):
+            stop = starts[idx + 1] if idx + 1 < len(starts) else region_end
+            ranges.append((addr, stop, self._code_names[addr]))
+        return ranges
+
+    def _render(self, addr: int, size: int, mnemonic: str, op_str: str) -> str:
+        if not op_str:
+            return mnemonic
+        is_branch = mnemonic.startswith(("j", "call", "loop")) or mnemonic.endswith(("jmp", "call"))
+        target = _BRANCH_TARGET.match(op_str) if is_branch else None
+        if target:
+            value = int(target.group(1), 16)
+            label = self._labels.describe(value)
+            return f"{mnemonic:<6} {value:x}" + (f" <{label}>" if label else "")
+        text = f"{mnemonic:<6} {_objdump_operands(op_str)}"
+        match = _RIP_RELATIVE.search(op_str) if "rip" in op_str else None
+        if match:
+            disp = int(match.group(2), 16)
+            value = addr + size + (disp if match.group(1) == "+" else -disp)
+            label = self._labels.describe(value)
+            text += f"        # {value:x}" + (f" <{label}>" if label else "")
+        return text
+
+    def _label_line(self, addr: int, name: str) -> str:
+        return f"{addr:0{self.arch_bits // 4}x} <{name}>:"
+
+    # Full listing: {"text": <.asm file>, "lines": [{addr, text, line}]}.
+    def listing(self) -> dict:
+        fmt = "elf64-x86-64" if self.arch_bits == 64 else "elf32-i386"
+        out = ["", f"{self.path}:     file format {fmt}", ""]
+        lines: List[dict] = []
+        for region in self.regions:
+            out += ["", f"Disassembly of section {region.name}:"]
+            for start, end, label in self._ranges(region):
+                out += ["", self._label_line(start, label)]
+                for text, entry in self._decode(region, start, end):
+                    out.append(text)
+                    if entry is not None:
+                        lines.append({**entry, "line": len(out)})
+        return {"text": "\n".join(out) + "\n", "lines": lines}
+
+    # Listing of one symbol only, up to its size or the next label.
+    def function(self, name: str) -> Optional[dict]:
+        entry = self._sizes.get(name)
+        region = self._region_of(entry[0]) if entry else None
+        if region is None:
+            return None
+        start, size = entry
+        region_end = region.addr + len(region.data)
+        end = start + size if size else (self._code_labels.after(start) or region_end)
+        out = [self._label_line(start, name)]
+        lines: List[dict] = []
+        for text, entry in self._decode(region, start, min(end, region_end)):
+            out.append(text)
+            if entry is not None:
+                lines.append({**entry, "line": len(out)})
+        return {"name": name, "text": "\n".join(out) + "\n", "lines": lines}
+
+
+# Bytes objdump folds into "..." at `pos` (0: decode normally); `data`
+# ends at the next symbol.
+def _zero_skip(data: bytes, pos: int) -> int:
+    end = pos
+    while end < len(data) and data[end] == 0:
+        end += 1
+    run = end - pos
+    if end == len(data):
+        return run if run >= _SKIP_ZEROES or run < _SKIP_ZEROES_AT_END else 0
+    return run & ~3 if run >= _SKIP_ZEROES else 0
+
+
+def _code_regions(blob: bytes, header: dict, sections: List[dict]) -> List[CodeRegion]:
+    regions = [
+        CodeRegion(sec["name"], sec["addr"], blob[sec["offset"] : sec["offset"] + sec["size"]])
+        for sec in sections
+        if sec["flags"] & SHF_EXECINSTR and sec["type"] != SHT_NOBITS and sec["size"]
+    ]
+    if regions:
+        return regions
+    # Stripped section headers: fall back to the executable segments.
+    return [
+        CodeRegion(f"segment{idx}", ph["vaddr"], blob[ph["offset"] : ph["offset"] + ph["filesz"]])
+        for idx, ph in enumerate(_parse_program_headers(blob, header))
+        if ph["type"] == PT_LOAD and ph["flags"] & PF_X and ph["filesz"]
+    ]
+
+
+def build_listing(blob: bytes, path: str = "") -> dict:
+    return DisasmBuilder(blob, path).listing()
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Disassemble an ELF binary with Capstone")
+    parser.add_argument("binary", help="ELF binary")
+    parser.add_argument("--function", default=None, help="Only disassemble this symbol")
+    parser.add_argument("--output", default=None, help="Write the listing here instead of stdout")
+    parser.add_argument("--json", action="store_true", help="Emit {text, lines} as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.binary, "rb") as handle:
+        builder = DisasmBuilder(handle.read(), args.binary)
+    result = builder.function(args.function) if args.function else builder.listing()
+    if result is None:
+        raise SystemExit(f"{args.function}: no such function in an executable section")
+    text = json.dumps(result, indent=2) if args.json else result["text"]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        print(text, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""In-process DWARF decoder: address -> (file, line, function)."""
+
+# Replaces addr2line for snapshot annotation. .debug_line programs (DWARF
+# 2-5) are run once per binary into a sorted range table, and .debug_info
+# subprograms (low_pc/high_pc or DW_AT_ranges) give the enclosing function.
+# Lookups are a binary search. Only what annotation needs is decoded:
+# no location lists, types or inlined-call chains.
+
+from __future__ import annotations
+
+import bisect
+import os
+from typing import Dict, List, Optional, Tuple
+
+from elf_format import _parse_elf_header, _parse_section_headers
+
+# Forms with a fixed size (bytes); the rest are handled in _read_form.
+_FIXED_FORMS = {
+    0x05: 2,  # data2
+    0x06: 4,  # data4
+    0x07: 8,  # data8
+    0x0B: 1,  # data1
+    0x0C: 1,  # flag
+    0x11: 1,  # ref1
+    0x12: 2,  # ref2
+    0x13: 4,  # ref4
+    0x14: 8,  # ref8
+    0x19: 0,  # flag_present
+    0x1C: 4,  # ref_sup4
+    0x1E: 16,  # data16
+    0x20: 8,  # ref_sig8
+    0x24: 8,  # ref_sup8
+    0x25: 1,  # strx1
+    0x26: 2,  # strx2
+    0x27: 3,  # strx3
+    0x28: 4,  # strx4
+    0x29: 1,  # addrx1
+    0x2A: 2,  # addrx2
+    0x2B: 3,  # addrx3
+    0x2C: 4,  # addrx4
+}
+_OFFSET_FORMS = (0x0E, 0x17, 0x1D, 0x1F, 0x1F20, 0x1F21)  # strp, sec_offset, strp_sup, line_strp, GNU alt
+_ULEB_FORMS = (0x0F, 0x15, 0x1A, 0x1B, 0x22, 0x23, 0x1F01, 0x1F02)  # udata, ref_udata, strx, addrx, ...
+_BLOCK_FORMS = {0x03: 2, 0x04: 4, 0x09: None, 0x0A: 1, 0x18: None}  # block2/4, block, block1, exprloc
+_ADDR_FORM = 0x01
+_STRING_FORM = 0x08
+_SDATA_FORM = 0x0D
+_REF_ADDR_FORM = 0x10
+_INDIRECT_FORM = 0x16
+_IMPLICIT_CONST_FORM = 0x21
+_STRX_FORMS = (0x1A, 0x25, 0x26, 0x27, 0x28, 0x1F02)
+_ADDRX_FORMS = (0x1B, 0x29, 0x2A, 0x2B, 0x2C, 0x1F01)
+_CU_REF_FORMS = (0x11, 0x12, 0x13, 0x14, 0x15)
+
+DW_TAG_COMPILE_UNIT = 0x11
+DW_TAG_SUBPROGRAM = 0x2E
+DW_TAG_PARTIAL_UNIT = 0x3C
+DW_TAG_SKELETON_UNIT = 0x4A
+
+DW_AT_NAME = 0x03
+DW_AT_STMT_LIST = 0x10
+DW_AT_LOW_PC = 0x11
+DW_AT_HIGH_PC = 0x12
+DW_AT_COMP_DIR = 0x1B
+DW_AT_ABSTRACT_ORIGIN = 0x31
+DW_AT_SPECIFICATION = 0x47
+DW_AT_RANGES = 0x55
+DW_AT_STR_OFFSETS_BASE = 0x72
+DW_AT_ADDR_BASE = 0x73
+DW_AT_RNGLISTS_BASE = 0x74
+
+DW_LNCT_PATH = 1
+DW_LNCT_DIRECTORY_INDEX = 2
+
+
+class _Reader:
+    """Little-endian cursor over a DWARF section."""
+
+    def __init__(self, data: bytes, pos: int = 0) -> None:
+        self.data = data
+        self.pos = pos
+
+    def uint(self, size: int) -> int:
+        value = int.from_bytes(self.data[self.pos : self.pos + size], "little")
+        self.pos += size
+        return value
+
+    def sint(self, size: int) -> int:
+        value = int.from_bytes(self.data[self.pos : self.pos + size], "little", signed=True)
+        self.pos += size
+        return value
+
+    def uleb(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return result
+
+    def sleb(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                if byte & 0x40:
+                    result -= 1 << shift
+                return result
+
+    def cstr(self) -> str:
+        end = self.data.index(b"\x00", self.pos)
+        text = self.data[self.pos : end].decode("utf-8", errors="replace")
+        self.pos = end + 1
+        return text
+
+    # Initial length: returns (unit length, offset size).
+    def unit_length(self) -> Tuple[int, int]:
+        length = self.uint(4)
+        if length == 0xFFFFFFFF:
+            return self.uint(8), 8
+        return length, 4
+
+
+class _Unit:
+    """Per-CU decoding context (sizes and DWARF 5 base offsets)."""
+
+    def __init__(self, offset: int, version: int, addr_size: int, offset_size: int) -> None:
+        self.offset = offset
+        self.version = version
+        self.addr_size = addr_size
+        self.offset_size = offset_size
+        self.str_offsets_base = 0
+        self.addr_base = 0
+        self.rnglists_base = 0
+        self.base_address = 0
+
+
+def _read_form(reader: _Reader, form: int, unit: _Unit, implicit: Optional[int]):
+    if form == _INDIRECT_FORM:
+        return _read_form(reader, reader.uleb(), unit, implicit)
+    if form in _FIXED_FORMS:
+        return form, reader.uint(_FIXED_FORMS[form])
+    if form == _ADDR_FORM:
+        return form, reader.uint(unit.addr_size)
+    if form in _OFFSET_FORMS:
+        return form, reader.uint(unit.offset_size)
+    if form in _ULEB_FORMS:
+        return form, reader.uleb()
+    if form == _SDATA_FORM:
+        return form, reader.sleb()
+    if form == _STRING_FORM:
+        return form, reader.cstr()
+    if form == _REF_ADDR_FORM:
+        return form, reader.uint(unit.addr_size if unit.version <= 2 else unit.offset_size)
+    if form == _IMPLICIT_CONST_FORM:
+        return form, implicit
+    if form in _BLOCK_FORMS:
+        size = _BLOCK_FORMS[form]
+        length = reader.uleb() if size is None else reader.uint(size)
+        reader.pos += length
+        return form, None
+    raise ValueError(f"Unsupported DWARF form 0x{form:x}")
+
+
+def _parse_abbrevs(data: bytes, offset: int) -> Dict[int, tuple]:
+    reader = _Reader(data, offset)
+    abbrevs: Dict[int, tuple] = {}
+    while True:
+        code = reader.uleb()
+        if code == 0:
+            return abbrevs
+        tag = reader.uleb()
+        has_children = reader.uint(1)
+        specs = []
+        while True:
+            attr, form = reader.uleb(), reader.uleb()
+            if attr == 0 and form == 0:
+                break
+            implicit = reader.sleb() if form == _IMPLICIT_CONST_FORM else None
+            specs.append((attr, form, implicit))
+        abbrevs[code] = (tag, has_children, specs)
+
+
+class DwarfInfo:
+    """Line and function range tables for one ELF image (link-time addresses)."""
+
+    # Without a blob the tables are empty (binary without debug info).
+    def __init__(self, blob: Optional[bytes] = None) -> None:
+        self._sections: Dict[str, bytes] = {}
+        self._default_addr_size = 8
+        if blob is not None:
+            header = _parse_elf_header(blob)
+            for section in _parse_section_headers(blob, header):
+                if section["name"].startswith(".debug_") and section["type"] != 8:  # SHT_NOBITS
+                    start = section["offset"]
+                    self._sections[section["name"]] = blob[start : start + section["size"]]
+            self._default_addr_size = 8 if header["class"] == 64 else 4
+        # Sorted, non-overlapping (start, end, file, line) rows.
+        self._line_starts: List[int] = []
+        self._line_rows: List[Tuple[int, Optional[str], int]] = []
+        # Sorted (start, end, name); innermost wins for nested ranges.
+        self._func_starts: List[int] = []
+        self._func_rows: List[Tuple[int, str]] = []
+        if ".debug_info" in self._sections:
+            self._load()
+
+    @property
+    def available(self) -> bool:
+        return bool(self._line_starts or self._func_starts)
+
+    # JSON form for the artifact cache (file paths interned).
+    def to_data(self) -> dict:
+        files: Dict[Optional[str], int] = {}
+        rows = []
+        for end, path, line in self._line_rows:
+            rows.append([end, files.setdefault(path, len(files)), line])
+        return {
+            "files": list(files),
+            "line_starts": self._line_starts,
+            "line_rows": rows,
+            "func_starts": self._func_starts,
+            "func_rows": [list(row) for row in self._func_rows],
+        }
+
+    @classmethod
+    def from_data(cls, data: dict) -> "DwarfInfo":
+        info = cls()
+        files = data["files"]
+        info._line_starts = list(data["line_starts"])
+        info._line_rows = [(end, files[index], line) for end, index, line in data["line_rows"]]
+        info._func_starts = list(data["func_starts"])
+        info._func_rows = [(end, name) for end, name in data["func_rows"]]
+        return info
+
+    # Decoded entry for a link-time address: {"file", "line", "func"}.
+    def lookup(self, addr: int) -> Optional[Dict[str, object]]:
+        file_path = line = func = None
+        pos = bisect.bisect_right(self._line_starts, addr) - 1
+        if pos >= 0:
+            end, path, row_line = self._line_rows[pos]
+            if addr < end:
+                file_path, line = path, row_line or None
+        # The innermost range starts last; a few steps back covers nesting.
+        pos = bisect.bisect_right(self._func_starts, addr) - 1
+        for index in range(pos, max(pos - 8, -1), -1):
+            end, name = self._func_rows[index]
+            if addr < end:
+                func = name
+                break
+        if file_path is None and line is None and func is None:
+            return None
+        return {"file": file_path, "line": line, "func": func}
+
+    # ------------------------------------------------------------------
+
+    def _string(self, form: int, value, unit: _Unit) -> Optional[str]:
+        if form == _STRING_FORM:
+            return value
+        if form == 0x0E:  # strp
+            return self._cstr(".debug_str", value)
+        if form == 0x1F:  # line_strp
+            return self._cstr(".debug_line_str", value)
+        if form in _STRX_FORMS:
+            offsets = self._sections.get(".debug_str_offsets", b"")
+            pos = unit.str_offsets_base + value * unit.offset_size
+            return self._cstr(".debug_str", int.from_bytes(offsets[pos : pos + unit.offset_size], "little"))
+        return None
+
+    def _cstr(self, section: str, offset: int) -> Optional[str]:
+        data = self._sections.get(section)
+        if data is None or offset >= len(data):
+            return None
+        return _Reader(data, offset).cstr()
+
+    def _address(self, form: int, value, unit: _Unit) -> Optional[int]:
+        if form == _ADDR_FORM:
+            return value
+        if form in _ADDRX_FORMS:
+            data = self._sections.get(".debug_addr", b"")
+            pos = unit.addr_base + value * unit.addr_size
+            return int.from_bytes(data[pos : pos + unit.addr_size], "little")
+        return None
+
+    def _load(self) -> None:
+        info = self._sections[".debug_info"]
+        abbrev_data = self._sections.get(".debug_abbrev", b"")
+        abbrev_cache: Dict[int, Dict[int, tuple]] = {}
+        line_programs: List[Tuple[int, Optional[str], _Unit]] = []
+        funcs: List[Tuple[int, int, object, _Unit]] = []
+        names: Dict[int, str] = {}
+        refs: Dict[int, int] = {}
+
+        reader = _Reader(info)
+        while reader.pos < len(info):
+            unit_offset = reader.pos
+            length, offset_size = reader.unit_length()
+            unit_end = reader.pos + length
+            version = reader.uint(2)
+            if version >= 5:
+                unit_type = reader.uint(1)
+                addr_size = reader.uint(1)
+                abbrev_offset = reader.uint(offset_size)
+                if unit_type in (4, 5):  # skeleton / split_compile: dwo_id
+                    reader.pos += 8
+                elif unit_type in (2, 6):  # type units: signature + type offset
+                    reader.pos += 8 + offset_size
+            else:
+                abbrev_offset = reader.uint(offset_size)
+                addr_size = reader.uint(1)
+            unit = _Unit(unit_offset, version, addr_size or self._default_addr_size, offset_size)
+            if abbrev_offset not in abbrev_cache:
+                abbrev_cache[abbrev_offset] = _parse_abbrevs(abbrev_data, abbrev_offset)
+            abbrevs = abbrev_cache[abbrev_offset]
+
+            first = True
+            while reader.pos < unit_end:
+                die_offset = reader.pos
+                code = reader.uleb()
+                if code == 0:
+                    continue
+                tag, _children, specs = abbrevs[code]
+                attrs = {}
+                for attr, form, implicit in specs:
+                    attrs[attr] = _read_form(reader, form, unit, implicit)
+                if first:
+                    first = False
+                    if tag in (DW_TAG_COMPILE_UNIT, DW_TAG_PARTIAL_UNIT, DW_TAG_SKELETON_UNIT):
+                        self._unit_bases(unit, attrs)
+                        if DW_AT_STMT_LIST in attrs:
+                            comp_dir = self._attr_string(attrs, DW_AT_COMP_DIR, unit)
+                            line_programs.append((attrs[DW_AT_STMT_LIST][1], comp_dir, unit))
+                    continue
+                if tag != DW_TAG_SUBPROGRAM:
+                    continue
+                name = self._attr_string(attrs, DW_AT_NAME, unit)
+                if name is not None:
+                    names[die_offset] = name
+                for ref_attr in (DW_AT_SPECIFICATION, DW_AT_ABSTRACT_ORIGIN):
+                    if ref_attr in attrs and die_offset not in refs:
+                        form, value = attrs[ref_attr]
+                        if form in _CU_REF_FORMS:
+                            refs[die_offset] = unit_offset + value
+                        elif form == _REF_ADDR_FORM:
+                            refs[die_offset] = value
+                for start, end in self._die_ranges(attrs, unit):
+                    funcs.append((start, end, die_offset, unit))
+            reader.pos = unit_end
+
+        func_rows = []
+        for start, end, die_offset, _unit in funcs:
+            name = self._resolve_name(die_offset, names, refs)
+            if name is not None and end > start:
+                func_rows.append((start, end, name))
+        # Longer ranges first so an inner (nested) function sorts after its parent.
+        func_rows.sort(key=lambda row: (row[0], -row[1]))
+        self._func_starts = [row[0] for row in func_rows]
+        self._func_rows = [(row[1], row[2]) for row in func_rows]
+
+        rows: List[Tuple[int, int, Optional[str], int]] = []
+        seen = set()
+        for stmt_list, comp_dir, unit in line_programs:
+            if stmt_list in seen:
+                continue
+            seen.add(stmt_list)
+            rows.extend(self._line_program(stmt_list, comp_dir, unit))
+        rows.sort(key=lambda row: row[0])
+        for start, end, path, line in rows:
+            if self._line_starts and start < self._line_rows[-1][0]:
+                continue  # overlapping sequence (e.g. discarded section at 0)
+            self._line_starts.append(start)
+            self._line_rows.append((end, path, line))
+
+    @staticmethod
+    def _resolve_name(die_offset: int, names: Dict[int, str], refs: Dict[int, int]) -> Optional[str]:
+        for _depth in range(8):
+            if die_offset in names:
+                return names[die_offset]
+            if die_offset not in refs:
+                return None
+            die_offset = refs[die_offset]
+        return None
+
+    def _attr_string(self, attrs: dict, attr: int, unit: _Unit) -> Optional[str]:
+        if attr not in attrs:
+            return None
+        form, value = attrs[attr]
+        return self._string(form, value, unit)
+
+    def _unit_bases(self, unit: _Unit, attrs: dict) -> None:
+        if DW_AT_STR_OFFSETS_BASE in attrs:
+            unit.str_offsets_base = attrs[DW_AT_STR_OFFSETS_BASE][1]
+        elif unit.version >= 5 and ".debug_str_offsets" in self._sections:
+            unit.str_offsets_base = 8 if unit.offset_size == 4 else 16
+        if DW_AT_ADDR_BASE in attrs:
+            unit.addr_base = attrs[DW_AT_ADDR_BASE][1]
+        if DW_AT_RNGLISTS_BASE in attrs:
+            unit.rnglists_base = attrs[DW_AT_RNGLISTS_BASE][1]
+        if DW_AT_LOW_PC in attrs:
+            unit.base_address = self._address(*attrs[DW_AT_LOW_PC], unit) or 0
+
+    def _die_ranges(self, attrs: dict, unit: _Unit) -> List[Tuple[int, int]]:
+        if DW_AT_LOW_PC in attrs and DW_AT_HIGH_PC in attrs:
+            low = self._address(*attrs[DW_AT_LOW_PC], unit)
+            form, value = attrs[DW_AT_HIGH_PC]
+            high = self._address(form, value, unit)
+            if high is None and isinstance(value, int):
+                high = (low or 0) + value  # constant class: offset from low_pc
+            if low and high:
+                return [(low, high)]
+            return []
+        if DW_AT_RANGES in attrs:
+            form, value = attrs[DW_AT_RANGES]
+            if unit.version >= 5:
+                return self._rnglist(form, value, unit)
+            return self._ranges_v4(value, unit)
+        return []
+
+    def _ranges_v4(self, offset: int, unit: _Unit) -> List[Tuple[int, int]]:
+        data = self._sections.get(".debug_ranges")
+        if data is None:
+            return []
+        reader = _Reader(data, offset)
+        base = unit.base_address
+        max_addr = (1 << (8 * unit.addr_size)) - 1
+        ranges = []
+        while reader.pos + 2 * unit.addr_size <= len(data):
+            start, end = reader.uint(unit.addr_size), reader.uint(unit.addr_size)
+            if start == 0 and end == 0:
+                break
+            if start == max_addr:
+                base = end
+                continue
+            if start != end:
+                ranges.append((base + start, base + end))
+        return ranges
+
+    def _rnglist(self, form: int, value: int, unit: _Unit) -> List[Tuple[int, int]]:
+        data = self._sections.get(".debug_rnglists")
+        if data is None:
+            return []
+        offset = value
+        if form == 0x23:  # rnglistx: index into the offsets table
+            pos = unit.rnglists_base + value * unit.offset_size
+            offset = unit.rnglists_base + int.from_bytes(data[pos : pos + unit.offset_size], "little")
+        reader = _Reader(data, offset)
+        base = unit.base_address
+        ranges = []
+
+        def addrx(index: int) -> int:
+            return self._address(0x1B, index, unit) or 0
+
+        while reader.pos < len(data):
+            kind = reader.uint(1)
+            if kind == 0:  # end_of_list
+                break
+            if kind == 1:  # base_addressx
+                base = addrx(reader.uleb())
+            elif kind == 2:  # startx_endx
+                ranges.append((addrx(reader.uleb()), addrx(reader.uleb())))
+            elif kind == 3:  # startx_length
+                start = addrx(reader.uleb())
+                ranges.append((start, start + reader.uleb()))
+            elif kind == 4:  # offset_pair
+                start, end = reader.uleb(), reader.uleb()
+                ranges.append((base + start, base + end))
+            elif kind == 5:  # base_address
+                base = reader.uint(unit.addr_size)
+            elif kind == 6:  # start_end
+                ranges.append((reader.uint(unit.addr_size), reader.uint(unit.addr_size)))
+            elif kind == 7:  # start_length
+                start = reader.uint(unit.addr_size)
+                ranges.append((start, start + reader.uleb()))
+            else:
+                break
+        return [(start, end) for start, end in ranges if end > start]
+
+    # Rows (start, end, file, line) of one line-number program.
+    def _line_program(
+        self, offset: int, comp_dir: Optional[str], unit: _Unit
+    ) -> List[Tuple[int, int, Optional[str], int]]:
+        data = self._sections.get(".debug_line")
+        if data is None or offset >= len(data):
+            return []
+        reader = _Reader(data, offset)
+        length, offset_size = reader.unit_length()
+        end = reader.pos + length
+        version = reader.uint(2)
+        addr_size = unit.addr_size
+        if version >= 5:
+            addr_size = reader.uint(1)
+            reader.uint(1)  # segment selector size
+        header_length = reader.uint(offset_size)
+        program = reader.pos + header_length
+        min_inst = reader.uint(1)
+        if version >= 4:
+            reader.uint(1)  # maximum operations per instruction (VLIW only)
+        reader.uint(1)  # default_is_stmt
+        line_base = reader.sint(1)
+        line_range = reader.uint(1)
+        opcode_base = reader.uint(1)
+        opcode_lengths = [reader.uint(1) for _ in range(opcode_base - 1)]
+        line_unit = _Unit(unit.offset, version, addr_size, offset_size)
+        line_unit.str_offsets_base = unit.str_offsets_base
+
+        if version >= 5:
+            dirs = [entry.get(DW_LNCT_PATH) or "" for entry in self._entry_table(reader, line_unit)]
+            files = [
+                (entry.get(DW_LNCT_PATH) or "", entry.get(DW_LNCT_DIRECTORY_INDEX, 0))
+                for entry in self._entry_table(reader, line_unit)
+            ]
+        else:
+            dirs = [comp_dir or ""]
+            while True:
+                name = reader.cstr()
+                if not name:
+                    break
+                dirs.append(name)
+            files = [("", 0)]  # file numbers start at 1 before DWARF 5
+            while True:
+                name = reader.cstr()
+                if not name:
+                    break
+                dir_index = reader.uleb()
+                reader.uleb()  # mtime
+                reader.uleb()  # length
+                files.append((name, dir_index))
+
+        path_cache: Dict[int, Optional[str]] = {}
+
+        def file_path(index: int) -> Optional[str]:
+            if index not in path_cache:
+                if 0 <= index < len(files) and files[index][0]:
+                    name, dir_index = files[index]
+                    directory = dirs[dir_index] if 0 <= dir_index < len(dirs) else ""
+                    if not os.path.isabs(directory) and comp_dir:
+                        directory = os.path.join(comp_dir, directory)
+                    path_cache[index] = os.path.join(directory, name)
+                else:
+                    path_cache[index] = None
+            return path_cache[index]
+
+        rows: List[Tuple[int, int, Optional[str], int]] = []
+        sequence: List[Tuple[int, int, int]] = []
+        reader.pos = program
+        address = 0
+        file_index = 1
+        line = 1
+
+        def close_sequence(end_address: int) -> None:
+            if sequence and sequence[0][0] != 0:
+                for pos, (start, index, row_line) in enumerate(sequence):
+                    stop = sequence[pos + 1][0] if pos + 1 < len(sequence) else end_address
+                    if stop > start:
+                        rows.append((start, stop, file_path(index), row_line))
+            sequence.clear()
+
+        def emit() -> None:
+            if sequence and sequence[-1][0] == address:
+                sequence[-1] = (address, file_index, line)
+            else:
+                sequence.append((address, file_index, line))
+
+        while reader.pos < end:
+            opcode = reader.uint(1)
+            if opcode >= opcode_base:
+                adjusted = opcode - opcode_base
+                address += (adjusted // line_range) * min_inst
+                line += line_base + adjusted % line_range
+                emit()
+            elif opcode == 0:
+                size = reader.uleb()
+                next_pos = reader.pos + size
+                sub = reader.uint(1) if size else 0
+                if sub == 1:  # end_sequence
+                    close_sequence(address)
+                    address, file_index, line = 0, 1, 1
+                elif sub == 2:  # set_address
+                    address = reader.uint(size - 1)
+                reader.pos = next_pos
+            elif opcode == 1:  # copy
+                emit()
+            elif opcode == 2:  # advance_pc
+                address += reader.uleb() * min_inst
+            elif opcode == 3:  # advance_line
+                line += reader.sleb()
+            elif opcode == 4:  # set_file
+                file_index = reader.uleb()
+            elif opcode == 8:  # const_add_pc
+                address += ((255 - opcode_base) // line_range) * min_inst
+            elif opcode == 9:  # fixed_advance_pc
+                address += reader.uint(2)
+            else:
+                for _ in range(opcode_lengths[opcode - 1]):
+                    reader.uleb()
+        return rows
+
+    # DWARF 5 directory / file-name table.
+    def _entry_table(self, reader: _Reader, unit: _Unit) -> List[Dict[int, object]]:
+        formats = [(reader.uleb(), reader.uleb()) for _ in range(reader.uint(1))]
+        entries = []
+        for _ in range(reader.uleb()):
+            entry: Dict[int, object] = {}
+            for content, form in formats:
+                form, value = _read_form(reader, form, unit, None)
+                if content == DW_LNCT_PATH:
+                    value = self._string(form, value, unit)
+                entry[content] = value
+            entries.append(entry)
+        return entries
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""Pure-Python ELF parsing helpers (headers, dynamic section, symbol tables)."""
+
+# Only what the tracer needs: enough to map PT_LOAD segments, find the
+# interpreter, walk the dynamic relocations for the libc-stub loader and
+# index .symtab/.dynsym for symbol lookups (no binutils needed).
+# Little-endian x86/x86_64 only.
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Program header types.
+PT_LOAD = 1
+PT_DYNAMIC = 2
+PT_INTERP = 3
+
+# Dynamic section tags.
+DT_NULL = 0
+DT_NEEDED = 1
+DT_PLTRELSZ = 2
+DT_STRTAB = 5
+DT_SYMTAB = 6
+DT_RELA = 7
+DT_RELASZ = 8
+DT_RELAENT = 9
+DT_SYMENT = 11
+DT_REL = 17
+DT_RELSZ = 18
+DT_RELENT = 19
+DT_PLTREL = 20
+DT_JMPREL = 23
+
+# Section header types.
+SHT_SYMTAB = 2
+SHT_DYNSYM = 11
+
+# Symbol binding / type / section index values.
+STB_GLOBAL = 1
+STB_WEAK = 2
+STT_OBJECT = 1
+STT_FUNC = 2
+STT_SECTION = 3
+STT_FILE = 4
+STT_GNU_IFUNC = 10
+SHN_UNDEF = 0
+
+# Relocation types shared by R_386_* and R_X86_64_* for the cases handled.
+R_DIRECT = 1  # R_386_32 / R_X86_64_64
+R_COPY = 5
+R_GLOB_DAT = 6
+R_JUMP_SLOT = 7
+R_RELATIVE = 8
+
+
+def _read_u16(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 2], "little")
+
+
+def _read_u32(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 4], "little")
+
+
+def _read_u64(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 8], "little")
+
+
+def _parse_elf_header(blob: bytes) -> dict:
+    if len(blob) < 16 or blob[:4] != b"\x7fELF":
+        raise ValueError("Not an ELF file")
+    elf_class = blob[4]
+    endian = blob[5]
+    if endian != 1:
+        raise ValueError("Only little-endian ELF supported")
+
+    if elf_class == 1:
+        e_type = _read_u16(blob, 16)
+        e_machine = _read_u16(blob, 18)
+        e_entry = _read_u32(blob, 24)
+        e_phoff = _read_u32(blob, 28)
+        e_phentsize = _read_u16(blob, 42)
+        e_phnum = _read_u16(blob, 44)
+        return {
+            "class": 32,
+            "type": e_type,
+            "machine": e_machine,
+            "entry": e_entry,
+            "phoff": e_phoff,
+            "phentsize": e_phentsize,
+            "phnum": e_phnum,
+            "shoff": _read_u32(blob, 32),
+            "shentsize": _read_u16(blob, 46),
+            "shnum": _read_u16(blob, 48),
+            "shstrndx": _read_u16(blob, 50),
+        }
+    if elf_class == 2:
+        e_type = _read_u16(blob, 16)
+        e_machine = _read_u16(blob, 18)
+        e_entry = _read_u64(blob, 24)
+        e_phoff = _read_u64(blob, 32)
+        e_phentsize = _read_u16(blob, 54)
+        e_phnum = _read_u16(blob, 56)
+        return {
+            "class": 64,
+            "type": e_type,
+            "machine": e_machine,
+            "entry": e_entry,
+            "phoff": e_phoff,
+            "phentsize": e_phentsize,
+            "phnum": e_phnum,
+            "shoff": _read_u64(blob, 40),
+            "shentsize": _read_u16(blob, 58),
+            "shnum": _read_u16(blob, 60),
+            "shstrndx": _read_u16(blob, 62),
+        }
+    raise ValueError("Unsupported ELF class")
+
+
+def _parse_program_headers(blob: bytes, header: dict) -> List[dict]:
+    phoff = header["phoff"]
+    phentsize = header["phentsize"]
+    phnum = header["phnum"]
+    entries = []
+
+    for idx in range(phnum):
+        offset = phoff + idx * phentsize
+        if header["class"] == 32:
+            p_type = _read_u32(blob, offset)
+            p_offset = _read_u32(blob, offset + 4)
+            p_vaddr = _read_u32(blob, offset + 8)
+            p_paddr = _read_u32(blob, offset + 12)
+            p_filesz = _read_u32(blob, offset + 16)
+            p_memsz = _read_u32(blob, offset + 20)
+            p_flags = _read_u32(blob, offset + 24)
+            p_align = _read_u32(blob, offset + 28)
+        else:
+            p_type = _read_u32(blob, offset)
+            p_flags = _read_u32(blob, offset + 4)
+            p_offset = _read_u64(blob, offset + 8)
+            p_vaddr = _read_u64(blob, offset + 16)
+            p_paddr = _read_u64(blob, offset + 24)
+            p_filesz = _read_u64(blob, offset + 32)
+            p_memsz = _read_u64(blob, offset + 40)
+            p_align = _read_u64(blob, offset + 48)
+
+        entries.append(
+            {
+                "type": p_type,
+                "offset": p_offset,
+                "vaddr": p_vaddr,
+                "paddr": p_paddr,
+                "filesz": p_filesz,
+                "memsz": p_memsz,
+                "flags": p_flags,
+                "align": p_align,
+            }
+        )
+    return entries
+
+
+def _read_c_string(blob: bytes, offset: int) -> str:
+    end = blob.find(b"\x00", offset)
+    if end == -1:
+        end = len(blob)
+    return blob[offset:end].decode("utf-8", errors="replace")
+
+
+@dataclass
+class ElfSymbol:
+    name: str
+    value: int
+    size: int
+    bind: int
+    type: int
+    shndx: int
+
+    @property
+    def defined(self) -> bool:
+        return self.shndx != SHN_UNDEF
+
+
+@dataclass
+class Relocation:
+    # Link-time address patched by the relocation.
+    offset: int
+    type: int
+    symbol: Optional[ElfSymbol]
+    # Explicit addend (RELA) or None for REL, where the addend is in place.
+    addend: Optional[int]
+
+
+# File offset of a link-time virtual address (inside a PT_LOAD's file image).
+def vaddr_to_offset(phdrs: List[dict], vaddr: int) -> Optional[int]:
+    for ph in phdrs:
+        if ph["type"] != PT_LOAD:
+            continue
+        if ph["vaddr"] <= vaddr < ph["vaddr"] + ph["filesz"]:
+            return ph["offset"] + (vaddr - ph["vaddr"])
+    return None
+
+
+# Dynamic section as {tag: value}; DT_NEEDED offsets are collected in a list.
+def parse_dynamic(blob: bytes, header: dict, phdrs: List[dict]) -> Dict[int, object]:
+    entries: Dict[int, object] = {}
+    for ph in phdrs:
+        if ph["type"] != PT_DYNAMIC:
+            continue
+        entry_size = 16 if header["class"] == 64 else 8
+        read = _read_u64 if header["class"] == 64 else _read_u32
+        half = entry_size // 2
+        for offset in range(ph["offset"], ph["offset"] + ph["filesz"], entry_size):
+            tag = read(blob, offset)
+            value = read(blob, offset + half)
+            if tag == DT_NULL:
+                break
+            if tag == DT_NEEDED:
+                entries.setdefault(DT_NEEDED, []).append(value)
+            else:
+                entries.setdefault(tag, value)
+        break
+    return entries
+
+
+def _parse_symbol(blob: bytes, header: dict, offset: int, strtab: int) -> ElfSymbol:
+    if header["class"] == 64:
+        name_off = _read_u32(blob, offset)
+        info = blob[offset + 4]
+        shndx = _read_u16(blob, offset + 6)
+        value = _read_u64(blob, offset + 8)
+        size = _read_u64(blob, offset + 16)
+    else:
+        name_off = _read_u32(blob, offset)
+        value = _read_u32(blob, offset + 4)
+        size = _read_u32(blob, offset + 8)
+        info = blob[offset + 12]
+        shndx = _read_u16(blob, offset + 14)
+    return ElfSymbol(
+        name=_read_c_string(blob, strtab + name_off),
+        value=value,
+        size=size,
+        bind=info >> 4,
+        type=info & 0xF,
+        shndx=shndx,
+    )
+
+
+# All dynamic relocations (DT_REL/DT_RELA plus DT_JMPREL) with their symbols.
+def dynamic_relocations(blob: bytes, header: dict, phdrs: List[dict]) -> List[Relocation]:
+    dynamic = parse_dynamic(blob, header, phdrs)
+    if not dynamic:
+        return []
+    is_64 = header["class"] == 64
+    symtab = vaddr_to_offset(phdrs, dynamic.get(DT_SYMTAB, 0))
+    strtab = vaddr_to_offset(phdrs, dynamic.get(DT_STRTAB, 0))
+    syment = dynamic.get(DT_SYMENT, 24 if is_64 else 16)
+    symbols: Dict[int, ElfSymbol] = {}
+
+    def symbol(index: int) -> Optional[ElfSymbol]:
+        if index == 0 or symtab is None or strtab is None:
+            return None
+        if index not in symbols:
+            symbols[index] = _parse_symbol(blob, header, symtab + index * syment, strtab)
+        return symbols[index]
+
+    tables = []
+    if DT_RELA in dynamic:
+        tables.append((dynamic[DT_RELA], dynamic.get(DT_RELASZ, 0), True))
+    if DT_REL in dynamic:
+        tables.append((dynamic[DT_REL], dynamic.get(DT_RELSZ, 0), False))
+    if DT_JMPREL in dynamic:
+        tables.append((dynamic[DT_JMPREL], dynamic.get(DT_PLTRELSZ, 0), dynamic.get(DT_PLTREL) == DT_RELA))
+
+    relocations = []
+    for vaddr, size, is_rela in tables:
+        start = vaddr_to_offset(phdrs, vaddr)
+        if start is None:
+            continue
+        word = 8 if is_64 else 4
+        entry_size = word * (3 if is_rela else 2)
+        read = _read_u64 if is_64 else _read_u32
+        for offset in range(start, start + size, entry_size):
+            r_offset = read(blob, offset)
+            r_info = read(blob, offset + word)
+            if is_64:
+                sym_index, r_type = r_info >> 32, r_info & 0xFFFFFFFF
+            else:
+                sym_index, r_type = r_info >> 8, r_info & 0xFF
+            addend = None
+            if is_rela:
+                addend = int.from_bytes(blob[offset + 2 * word : offset + 3 * word], "little", signed=True)
+            relocations.append(Relocation(r_offset, r_type, symbol(sym_index), addend))
+    return relocations
+
+
+def _parse_section_headers(blob: bytes, header: dict) -> List[dict]:
+    shoff = header["shoff"]
+    if not shoff or shoff + header["shnum"] * header["shentsize"] > len(blob):
+        return []
+    sections = []
+    for idx in range(header["shnum"]):
+        offset = shoff + idx * header["shentsize"]
+        if header["class"] == 32:
+            fields = [_read_u32(blob, offset + 4 * i) for i in range(10)]
+        else:
+            fields = [
+                _read_u32(blob, offset),
+                _read_u32(blob, offset + 4),
+                _read_u64(blob, offset + 8),
+                _read_u64(blob, offset + 16),
+                _read_u64(blob, offset + 24),
+                _read_u64(blob, offset + 32),
+                _read_u32(blob, offset + 40),
+                _read_u32(blob, offset + 44),
+                _read_u64(blob, offset + 48),
+                _read_u64(blob, offset + 56),
+            ]
+        name, sh_type, flags, addr, sh_offset, size, link, info, align, entsize = fields
+        sections.append(
+            {
+                "name_offset": name,
+                "type": sh_type,
+                "flags": flags,
+                "addr": addr,
+                "offset": sh_offset,
+                "size": size,
+                "link": link,
+                "info": info,
+                "align": align,
+                "entsize": entsize,
+            }
+        )
+    strtab = sections[header["shstrndx"]] if header["shstrndx"] < len(sections) else None
+    for section in sections:
+        section["name"] = (
+            _read_c_string(blob, strtab["offset"] + section["name_offset"]) if strtab else ""
+        )
+    return sections
+
+
+# Every symbol of .symtab (when not stripped) followed by .dynsym.
+def symbol_table(blob: bytes) -> List[ElfSymbol]:
+    header = _parse_elf_header(blob)
+    sections = _parse_section_headers(blob, header)
+    symbols: List[ElfSymbol] = []
+    for wanted in (SHT_SYMTAB, SHT_DYNSYM):
+        for section in sections:
+            if section["type"] != wanted or section["link"] >= len(sections):
+                continue
+            strtab = sections[section["link"]]["offset"]
+            entsize = section["entsize"] or (24 if header["class"] == 64 else 16)
+            start = section["offset"]
+            # Entry 0 is the reserved null symbol.
+            for offset in range(start + entsize, start + section["size"], entsize):
+                symbols.append(_parse_symbol(blob, header, offset, strtab))
+    return symbols
+
+
+class SymbolIndex:
+    """Defined symbols by name plus a sorted function-range index."""
+
+    # `section_ends` maps a section index to its end address; size-less
+    # functions never extend past their own section.
+    def __init__(
+        self, symbols: List[ElfSymbol], section_ends: Optional[Dict[int, int]] = None
+    ) -> None:
+        # name -> (link-time address, size); the lowest address wins, like nm -n.
+        self.addresses: Dict[str, Tuple[int, int]] = {}
+        named = [
+            sym
+            for sym in symbols
+            if sym.name and sym.defined and sym.type not in (STT_SECTION, STT_FILE)
+        ]
+        for sym in sorted(named, key=lambda sym: sym.value):
+            self.addresses.setdefault(sym.name, (sym.value, sym.size))
+
+        # One range per function start; global names win over local/weak
+        # aliases. Size-less functions (hand-written asm) extend to the
+        # next function start.
+        section_ends = section_ends or {}
+        funcs: Dict[int, ElfSymbol] = {}
+        for sym in sorted(
+            (sym for sym in named if sym.type in (STT_FUNC, STT_GNU_IFUNC) and sym.value),
+            key=lambda sym: (sym.value, sym.bind != STB_GLOBAL, sym.name),
+        ):
+            funcs.setdefault(sym.value, sym)
+        self._starts: List[int] = sorted(funcs)
+        self._ends: List[int] = []
+        self._names: List[str] = []
+        for pos, start in enumerate(self._starts):
+            sym = funcs[start]
+            end = start + sym.size
+            if not sym.size:
+                end = section_ends.get(sym.shndx, start + 1)
+                if pos + 1 < len(self._starts):
+                    end = min(end, self._starts[pos + 1])
+            self._ends.append(end)
+            self._names.append(sym.name)
+
+    def get(self, name: str) -> Optional[Tuple[int, int]]:
+        return self.addresses.get(name)
+
+    # JSON form for the artifact cache.
+    def to_data(self) -> dict:
+        return {
+            "addresses": {name: list(entry) for name, entry in self.addresses.items()},
+            "starts": self._starts,
+            "ends": self._ends,
+            "names": self._names,
+        }
+
+    @classmethod
+    def from_data(cls, data: dict) -> "SymbolIndex":
+        index = cls([])
+        index.addresses = {name: (entry[0], entry[1]) for name, entry in data["addresses"].items()}
+        index._starts = list(data["starts"])
+        index._ends = list(data["ends"])
+        index._names = list(data["names"])
+        return index
+
+    # Function containing the link-time address `addr`, by binary search.
+    def function_at(self, addr: int) -> Optional[str]:
+        pos = bisect.bisect_right(self._starts, addr) - 1
+        if pos < 0 or addr >= self._ends[pos]:
+            return None
+        return self._names[pos]
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+
+def build_symbol_index(blob: bytes) -> SymbolIndex:
+    header = _parse_elf_header(blob)
+    sections = _parse_section_headers(blob, header)
+    ends = {idx: section["addr"] + section["size"] for idx, section in enumerate(sections)}
+    return SymbolIndex(symbol_table(blob), ends)
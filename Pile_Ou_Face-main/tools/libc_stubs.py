@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""High-level libc stubs so dynamic ELFs run without ld.so."""
+
+# Instead of mapping the interpreter and emulating the whole dynamic-linker
+# bootstrap, the loader resolves the executable's imports itself: every
+# JUMP_SLOT / GLOB_DAT to a known libc function is pointed at a stub slot
+# `int 0x81; ret` on a private page. The INTR hook runs the Python handler
+# for that slot (arguments and return value follow the SysV ABI), then the
+# `ret` returns to the caller. __libc_start_main jumps straight to main, so
+# _start reaches main in a handful of instructions.
+#
+# Only x86 / x86_64 little-endian executables. 32-bit TLS (%gs) is not set
+# up; 64-bit gets an %fs page holding a fixed stack canary.
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from unicorn import Uc, UcError, UC_HOOK_INTR, UC_PROT_ALL
+from unicorn.x86_const import (
+    UC_X86_REG_EAX,
+    UC_X86_REG_EIP,
+    UC_X86_REG_ESP,
+    UC_X86_REG_FS_BASE,
+    UC_X86_REG_R8,
+    UC_X86_REG_R9,
+    UC_X86_REG_RAX,
+    UC_X86_REG_RCX,
+    UC_X86_REG_RDI,
+    UC_X86_REG_RDX,
+    UC_X86_REG_RIP,
+    UC_X86_REG_RSI,
+    UC_X86_REG_RSP,
+)
+
+from elf_format import (
+    R_COPY,
+    R_DIRECT,
+    R_GLOB_DAT,
+    R_JUMP_SLOT,
+    R_RELATIVE,
+    STB_WEAK,
+    STT_FUNC,
+    STT_GNU_IFUNC,
+    _parse_elf_header,
+    _parse_program_headers,
+    dynamic_relocations,
+)
+
+STUB_INTNO = 0x81
+SLOT_SIZE = 8
+# int 0x81; ret; padded with int3.
+_SLOT_CODE = b"\xcd\x81\xc3" + b"\xcc" * (SLOT_SIZE - 3)
+
+STUB_BASE_64 = 0x7E0000000000
+STUB_BASE_32 = 0xF6000000
+# Layout inside the stub region.
+_CODE_SIZE = 0x1000
+_DATA_OFFSET = 0x1000
+_DATA_SIZE = 0x1000
+_TLS_OFFSET = 0x2000
+_HEAP_OFFSET = 0x10000
+HEAP_SIZE = 0x100000
+
+STACK_CANARY_64 = 0x2F8E1D5C00000000
+
+# Fake FILE* objects, one 0x100 block each at the start of the data page.
+_STREAMS = ("stdin", "stdout", "stderr")
+_STREAM_ALIASES = {"_IO_2_1_stdin_": "stdin", "_IO_2_1_stdout_": "stdout", "_IO_2_1_stderr_": "stderr"}
+
+_MAX_STRING = 0x10000
+
+# Stub calls listed in meta (the most recent ones); every call is still
+# counted per function.
+MAX_LOGGED_CALLS = 256
+
+
+class LibcExit(Exception):
+    """Raised by a handler to end the program (exit, abort, main returning)."""
+
+    def __init__(self, code: int, reason: str) -> None:
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+class LibcStubs:
+    """Import resolution plus the Python implementations behind the stubs."""
+
+    def __init__(self, uc: Uc, arch_bits: int) -> None:
+        self.uc = uc
+        self.arch_bits = arch_bits
+        self.word_size = 8 if arch_bits == 64 else 4
+        self.base = STUB_BASE_64 if arch_bits == 64 else STUB_BASE_32
+        self.heap_base = self.base + _HEAP_OFFSET
+        self.heap_next = self.heap_base
+        self.slots: List[str] = []
+        self._slot_index: Dict[str, int] = {}
+        self._data_next = self.base + _DATA_OFFSET + 0x100 * len(_STREAMS)
+        self.patched: Dict[str, int] = {}
+        self.unhandled: List[str] = []
+        self.calls: Deque[dict] = deque(maxlen=MAX_LOGGED_CALLS)
+        self.call_counts: Counter = Counter()
+        self.stdout = bytearray()
+        self.stderr = bytearray()
+        self.exit_code: Optional[int] = None
+        self.exit_reason: Optional[str] = None
+        self.fault: Optional[str] = None
+        self._feed = None
+        self._on_write: Optional[Callable[[int, bytes], None]] = None
+        self._on_frame: Optional[Callable[[int, int, int], None]] = None
+        self._clock: Callable[[], int] = lambda: 0
+        uc.mem_map(self.base, self.heap_base - self.base + HEAP_SIZE, UC_PROT_ALL)
+        if arch_bits == 64:
+            tls = self.base + _TLS_OFFSET
+            uc.mem_write(tls, tls.to_bytes(8, "little"))  # tcb->self
+            uc.mem_write(tls + 0x28, STACK_CANARY_64.to_bytes(8, "little"))
+            uc.reg_write(UC_X86_REG_FS_BASE, tls)
+        # Reserved slot: main returning lands here and exits with its result.
+        self.main_return = self.slot("__libc_start_main.ret")
+
+    # ------------------------------------------------------------------
+    # Loading
+
+    # Address of the stub slot for `name`, allocating it on first use.
+    def slot(self, name: str) -> int:
+        index = self._slot_index.get(name)
+        if index is None:
+            index = len(self.slots)
+            if (index + 1) * SLOT_SIZE > _CODE_SIZE:
+                raise ValueError("Too many libc stubs")
+            self.slots.append(name)
+            self._slot_index[name] = index
+            self.uc.mem_write(self.base + index * SLOT_SIZE, _SLOT_CODE)
+        return self.base + index * SLOT_SIZE
+
+    def stream(self, name: str) -> int:
+        return self.base + _DATA_OFFSET + 0x100 * _STREAMS.index(name)
+
+    def _data_cell(self, size: int) -> int:
+        addr = self._data_next
+        self._data_next += max(size, self.word_size) + (-size % 16)
+        if self._data_next > self.base + _DATA_OFFSET + _DATA_SIZE:
+            raise ValueError("Too many imported data objects")
+        return addr
+
+    def _write_word(self, addr: int, value: int) -> None:
+        mask = (1 << (8 * self.word_size)) - 1
+        self.uc.mem_write(addr, (value & mask).to_bytes(self.word_size, "little"))
+
+    def _read_word(self, addr: int) -> int:
+        return int.from_bytes(self.uc.mem_read(addr, self.word_size), "little")
+
+    # Address an imported symbol resolves to (None: leave the slot alone).
+    def _resolve(self, name: str, sym_type: int, weak: bool) -> Optional[int]:
+        stream = _STREAM_ALIASES.get(name, name)
+        if stream in _STREAMS:
+            # GLOB_DAT on `stdout` wants the address of the FILE* variable.
+            cell = self._data_cell(self.word_size)
+            self._write_word(cell, self.stream(stream))
+            return cell
+        if name in HANDLERS:
+            return self.slot(name)
+        if sym_type in (STT_FUNC, STT_GNU_IFUNC):
+            if weak:
+                return None
+            self.unhandled.append(name)
+            return self.slot(name)
+        if weak:
+            return None
+        self.unhandled.append(name)
+        return self._data_cell(self.word_size)
+
+    # Apply the executable's dynamic relocations against the stubs.
+    def link(self, blob: bytes, load_bias: int) -> None:
+        header = _parse_elf_header(blob)
+        phdrs = _parse_program_headers(blob, header)
+        resolved: Dict[str, Optional[int]] = {}
+        for reloc in dynamic_relocations(blob, header, phdrs):
+            where = load_bias + reloc.offset
+            if reloc.addend is None:
+                addend = self._read_word(where) if reloc.type in (R_DIRECT, R_RELATIVE) else 0
+            else:
+                addend = reloc.addend
+            if reloc.type == R_RELATIVE:
+                self._write_word(where, load_bias + addend)
+                continue
+            symbol = reloc.symbol
+            if symbol is None or reloc.type not in (R_COPY, R_GLOB_DAT, R_JUMP_SLOT, R_DIRECT):
+                continue
+            if reloc.type == R_COPY:
+                # The executable owns the variable; only streams have a
+                # meaningful initial value.
+                stream = _STREAM_ALIASES.get(symbol.name, symbol.name)
+                if stream in _STREAMS:
+                    self._write_word(where, self.stream(stream))
+                    self.patched[symbol.name] = where
+                continue
+            if symbol.defined:
+                self._write_word(where, load_bias + symbol.value + addend)
+                continue
+            if symbol.name not in resolved:
+                resolved[symbol.name] = self._resolve(symbol.name, symbol.type, symbol.bind == STB_WEAK)
+            target = resolved[symbol.name]
+            if target is None:
+                self._write_word(where, 0)
+                continue
+            self._write_word(where, target + addend)
+            self.patched[symbol.name] = target
+
+    # ------------------------------------------------------------------
+    # Runtime
+
+    # `feed` provides stdin (read(n) -> bytes), `on_write` is told about
+    # memory the handlers write, `clock` returns the current step and
+    # `on_frame(slot, target, return_to)` about functions entered without a
+    # call (main), so the tracer can check their return address.
+    def attach(
+        self,
+        uc: Uc,
+        feed,
+        on_write: Optional[Callable[[int, bytes], None]] = None,
+        clock: Optional[Callable[[], int]] = None,
+        on_frame: Optional[Callable[[int, int, int], None]] = None,
+    ) -> None:
+        self._feed = feed
+        self._on_write = on_write
+        self._on_frame = on_frame
+        if clock is not None:
+            self._clock = clock
+
+        def hook_intr(uc_engine: Uc, intno: int, _user_data: object) -> None:
+            if intno != STUB_INTNO:
+                return
+            slot_addr = uc_engine.reg_read(self._pc_reg) - 2
+            index, rem = divmod(slot_addr - self.base, SLOT_SIZE)
+            if rem or not 0 <= index < len(self.slots):
+                return
+            self._dispatch(uc_engine, self.slots[index])
+
+        uc.hook_add(UC_HOOK_INTR, hook_intr)
+
+    # Python-side state a replay checkpoint must restore.
+    def state(self) -> dict:
+        return {"heap_next": self.heap_next}
+
+    def restore(self, state: Optional[dict]) -> None:
+        if state:
+            self.heap_next = state["heap_next"]
+
+    def meta(self) -> dict:
+        return {
+            "stub_base": hex(self.base),
+            "patched": {name: hex(addr) for name, addr in sorted(self.patched.items())},
+            "unhandled": sorted(set(self.unhandled)),
+            "calls": list(self.calls),
+            "calls_dropped": sum(self.call_counts.values()) - len(self.calls),
+            "call_counts": dict(sorted(self.call_counts.items())),
+            "stdout": self.stdout.decode("latin-1"),
+            "stderr": self.stderr.decode("latin-1"),
+            "exit_code": self.exit_code,
+            "exit_reason": self.exit_reason,
+        }
+
+    @property
+    def _pc_reg(self) -> int:
+        return UC_X86_REG_RIP if self.arch_bits == 64 else UC_X86_REG_EIP
+
+    @property
+    def _sp_reg(self) -> int:
+        return UC_X86_REG_RSP if self.arch_bits == 64 else UC_X86_REG_ESP
+
+    @property
+    def _ret_reg(self) -> int:
+        return UC_X86_REG_RAX if self.arch_bits == 64 else UC_X86_REG_EAX
+
+    def _dispatch(self, uc: Uc, name: str) -> None:
+        step = self._clock()
+        handler = HANDLERS.get(name)
+        if name == "__libc_start_main.ret":
+            handler = _main_returned
+        if handler is None:
+            self.fault = f"Unhandled libc call: {name}"
+            self._log(step, name, None)
+            uc.emu_stop()
+            return
+        call = _Call(self, uc)
+        try:
+            result = handler(call)
+        except LibcExit as done:
+            self.exit_code = done.code
+            self.exit_reason = done.reason
+            self._log(step, name, None)
+            # Park on the slot so nothing after it runs before the stop.
+            uc.reg_write(self._pc_reg, self.base + self._slot_index[name] * SLOT_SIZE)
+            uc.emu_stop()
+            return
+        except UcError as exc:
+            self.fault = f"{name}: {exc}"
+            self._log(step, name, None)
+            uc.emu_stop()
+            return
+        self._log(step, name, result)
+        if result is not None:
+            mask = (1 << (8 * self.word_size)) - 1
+            uc.reg_write(self._ret_reg, result & mask)
+
+    def _log(self, step: int, name: str, result: Optional[int]) -> None:
+        self.calls.append({"step": step, "name": name, "ret": None if result is None else hex(result)})
+        self.call_counts[name] += 1
+
+    # Memory writes from handlers go through here so the tracer sees them.
+    def write(self, uc: Uc, addr: int, data: bytes) -> None:
+        if not data:
+            return
+        uc.mem_write(addr, data)
+        if self._on_write is not None:
+            self._on_write(addr, data)
+
+    def read_stdin(self, count: int) -> bytes:
+        if self._feed is None:
+            return b""
+        return self._feed.read(count)
+
+    def malloc(self, size: int) -> int:
+        # Bump allocator; the size is kept in a header word for realloc/free.
+        header = self.word_size * 2
+        addr = self.heap_next + header
+        end = addr + ((size + 15) & ~15)
+        if end > self.heap_base + HEAP_SIZE:
+            return 0
+        self._write_word(addr - self.word_size, size)
+        self.heap_next = end
+        return addr
+
+
+class _Call:
+    """Argument access for one stub invocation."""
+
+    def __init__(self, stubs: LibcStubs, uc: Uc) -> None:
+        self.stubs = stubs
+        self.uc = uc
+        self.sp = uc.reg_read(stubs._sp_reg)
+
+    def arg(self, index: int) -> int:
+        stubs = self.stubs
+        if stubs.arch_bits == 64:
+            regs = (UC_X86_REG_RDI, UC_X86_REG_RSI, UC_X86_REG_RDX, UC_X86_REG_RCX, UC_X86_REG_R8, UC_X86_REG_R9)
+            if index < len(regs):
+                return self.uc.reg_read(regs[index])
+            return stubs._read_word(self.sp + 8 * (index - len(regs) + 1))
+        return stubs._read_word(self.sp + 4 * (index + 1))
+
+    def signed(self, index: int, bits: int = 32) -> int:
+        value = self.arg(index) & ((1 << bits) - 1)
+        return value - (1 << bits) if value >> (bits - 1) else value
+
+    def string(self, addr: int, limit: int = _MAX_STRING) -> bytes:
+        data = bytearray()
+        while len(data) < limit:
+            # Never read past the page holding the terminator.
+            pos = addr + len(data)
+            chunk = bytes(self.uc.mem_read(pos, 64 - pos % 64))
+            end = chunk.find(b"\x00")
+            if end >= 0:
+                data += chunk[:end]
+                break
+            data += chunk
+        return bytes(data[:limit])
+
+    def read(self, addr: int, size: int) -> bytes:
+        return bytes(self.uc.mem_read(addr, size)) if size > 0 else b""
+
+    def write(self, addr: int, data: bytes) -> None:
+        self.stubs.write(self.uc, addr, data)
+
+    def output(self, stream: int, data: bytes) -> None:
+        stubs = self.stubs
+        if stream == stubs.stream("stderr"):
+            stubs.stderr += data
+        else:
+            stubs.stdout += data
+
+
+# ----------------------------------------------------------------------
+# printf-family formatting (integers, strings, chars, pointers).
+
+
+def _format(call: _Call, fmt: bytes, first_arg: int) -> bytes:
+    out = bytearray()
+    index = first_arg
+    i = 0
+    while i < len(fmt):
+        ch = fmt[i]
+        i += 1
+        if ch != 0x25:  # '%'
+            out.append(ch)
+            continue
+        start = i
+        while i < len(fmt) and fmt[i] in b"-+ #0":
+            i += 1
+        flags = fmt[start:i].decode("ascii")
+        width = ""
+        while i < len(fmt) and (chr(fmt[i]).isdigit() or fmt[i] == 0x2A):
+            if fmt[i] == 0x2A:  # '*'
+                width += str(call.signed(index))
+                index += 1
+            else:
+                width += chr(fmt[i])
+            i += 1
+        precision = None
+        if i < len(fmt) and fmt[i] == 0x2E:  # '.'
+            i += 1
+            precision = ""
+            while i < len(fmt) and chr(fmt[i]).isdigit():
+                precision += chr(fmt[i])
+                i += 1
+        length = ""
+        while i < len(fmt) and fmt[i] in b"hlzjtq":
+            length += chr(fmt[i])
+            i += 1
+        if i >= len(fmt):
+            break
+        conv = chr(fmt[i])
+        i += 1
+        bits = 64 if ("l" in length or length in ("z", "j", "t", "q")) and call.stubs.arch_bits == 64 else 32
+        if conv == "%":
+            out += b"%"
+            continue
+        if conv == "n":
+            index += 1
+            continue
+        spec = "%" + flags + width + ("." + precision if precision is not None else "")
+        if conv in "di":
+            text = (spec + "d") % call.signed(index, bits)
+        elif conv in "uxXo":
+            text = (spec + conv.replace("u", "d")) % (call.arg(index) & ((1 << bits) - 1))
+        elif conv == "c":
+            text = (spec + "c") % chr(call.arg(index) & 0xFF)
+        elif conv == "p":
+            text = (("%" + flags + width + "s") % hex(call.arg(index))) if call.arg(index) else "(nil)"
+        elif conv == "s":
+            ptr = call.arg(index)
+            raw = call.string(ptr) if ptr else b"(null)"
+            text = (spec + "s") % raw.decode("latin-1")
+        else:
+            # Floating point and anything exotic: keep the directive verbatim.
+            out += fmt[start - 1 : i]
+            index += 1
+            continue
+        out += text.encode("latin-1")
+        index += 1
+    return bytes(out)
+
+
+# ----------------------------------------------------------------------
+# Handlers: take the call, return the value for rax/eax (None = untouched).
+
+
+def _libc_start_main(call: _Call) -> None:
+    stubs = call.stubs
+    uc = call.uc
+    main, argc, argv = call.arg(0), call.arg(1), call.arg(2)
+    envp = argv + (argc + 1) * stubs.word_size
+    if stubs.arch_bits == 64:
+        sp = (call.sp & ~0xF) - 8
+        uc.reg_write(UC_X86_REG_RDI, argc)
+        uc.reg_write(UC_X86_REG_RSI, argv)
+        uc.reg_write(UC_X86_REG_RDX, envp)
+        frame = [stubs.main_return]
+    else:
+        sp = (call.sp & ~0xF) - 16
+        frame = [stubs.main_return, argc, argv, envp]
+    stubs.write(uc, sp, b"".join(value.to_bytes(stubs.word_size, "little") for value in frame))
+    uc.reg_write(stubs._sp_reg, sp)
+    uc.reg_write(stubs._pc_reg, main)
+    if stubs._on_frame is not None:
+        stubs._on_frame(sp, main, stubs.main_return)
+    return None
+
+
+def _main_returned(call: _Call) -> None:
+    raise LibcExit(call.uc.reg_read(call.stubs._ret_reg) & 0xFF, "main returned")
+
+
+def _exit(call: _Call) -> None:
+    raise LibcExit(call.arg(0) & 0xFF, "exit")
+
+
+def _abort(call: _Call) -> None:
+    raise LibcExit(134, "abort")
+
+
+def _stack_chk_fail(call: _Call) -> None:
+    call.stubs.stderr += b"*** stack smashing detected ***: terminated\n"
+    raise LibcExit(134, "__stack_chk_fail")
+
+
+def _puts(call: _Call) -> int:
+    call.output(call.stubs.stream("stdout"), call.string(call.arg(0)) + b"\n")
+    return 1
+
+
+def _fputs(call: _Call) -> int:
+    call.output(call.arg(1), call.string(call.arg(0)))
+    return 1
+
+
+def _putchar(call: _Call) -> int:
+    value = call.arg(0) & 0xFF
+    call.output(call.stubs.stream("stdout"), bytes([value]))
+    return value
+
+
+def _printf(call: _Call) -> int:
+    text = _format(call, call.string(call.arg(0)), 1)
+    call.output(call.stubs.stream("stdout"), text)
+    return len(text)
+
+
+def _fprintf(call: _Call) -> int:
+    text = _format(call, call.string(call.arg(1)), 2)
+    call.output(call.arg(0), text)
+    return len(text)
+
+
+def _sprintf(call: _Call) -> int:
+    text = _format(call, call.string(call.arg(1)), 2)
+    call.write(call.arg(0), text + b"\x00")
+    return len(text)
+
+
+def _snprintf(call: _Call) -> int:
+    size = call.arg(1)
+    text = _format(call, call.string(call.arg(2)), 3)
+    if size:
+        call.write(call.arg(0), text[: size - 1] + b"\x00")
+    return len(text)
+
+
+def _gets(call: _Call) -> int:
+    # Unbounded: reads up to the newline, which is exactly the overflow.
+    data = bytearray()
+    while True:
+        byte = call.stubs.read_stdin(1)
+        if not byte or byte == b"\n":
+            break
+        data += byte
+    if not data and not byte:
+        return 0
+    call.write(call.arg(0), bytes(data) + b"\x00")
+    return call.arg(0)
+
+
+def _fgets(call: _Call) -> int:
+    size = call.signed(1)
+    data = bytearray()
+    while len(data) < size - 1:
+        byte = call.stubs.read_stdin(1)
+        if not byte:
+            break
+        data += byte
+        if byte == b"\n":
+            break
+    if not data:
+        return 0
+    call.write(call.arg(0), bytes(data) + b"\x00")
+    return call.arg(0)
+
+
+def _read(call: _Call) -> int:
+    if call.arg(0) & 0xFFFFFFFF != 0:
+        return -1
+    data = call.stubs.read_stdin(call.arg(2))
+    call.write(call.arg(1), data)
+    return len(data)
+
+
+def _strlen(call: _Call) -> int:
+    return len(call.string(call.arg(0)))
+
+
+def _strcpy(call: _Call) -> int:
+    call.write(call.arg(0), call.string(call.arg(1)) + b"\x00")
+    return call.arg(0)
+
+
+def _strncpy(call: _Call) -> int:
+    size = call.arg(2)
+    data = call.string(call.arg(1), size)
+    call.write(call.arg(0), data + b"\x00" * (size - len(data)))
+    return call.arg(0)
+
+
+def _strcat(call: _Call) -> int:
+    dest = call.arg(0)
+    call.write(dest + len(call.string(dest)), call.string(call.arg(1)) + b"\x00")
+    return dest
+
+
+def _strcmp(call: _Call) -> int:
+    left, right = call.string(call.arg(0)), call.string(call.arg(1))
+    return (left > right) - (left < right)
+
+
+def _strncmp(call: _Call) -> int:
+    size = call.arg(2)
+    left, right = call.string(call.arg(0), size), call.string(call.arg(1), size)
+    return (left > right) - (left < right)
+
+
+def _memcpy(call: _Call) -> int:
+    call.write(call.arg(0), call.read(call.arg(1), call.arg(2)))
+    return call.arg(0)
+
+
+def _memset(call: _Call) -> int:
+    call.write(call.arg(0), bytes([call.arg(1) & 0xFF]) * call.arg(2))
+    return call.arg(0)
+
+
+def _memcmp(call: _Call) -> int:
+    left, right = call.read(call.arg(0), call.arg(2)), call.read(call.arg(1), call.arg(2))
+    return (left > right) - (left < right)
+
+
+def _malloc(call: _Call) -> int:
+    return call.stubs.malloc(call.arg(0))
+
+
+def _calloc(call: _Call) -> int:
+    size = call.arg(0) * call.arg(1)
+    addr = call.stubs.malloc(size)
+    if addr:
+        call.write(addr, b"\x00" * size)
+    return addr
+
+
+def _realloc(call: _Call) -> int:
+    old, size = call.arg(0), call.arg(1)
+    addr = call.stubs.malloc(size)
+    if old and addr:
+        old_size = call.stubs._read_word(old - call.stubs.word_size)
+        call.write(addr, call.read(old, min(old_size, size)))
+    return addr
+
+
+def _free(call: _Call) -> None:
+    return None
+
+
+def _noop(call: _Call) -> int:
+    return 0
+
+
+HANDLERS: Dict[str, Callable[[_Call], Optional[int]]] = {
+    "__libc_start_main": _libc_start_main,
+    "exit": _exit,
+    "_exit": _exit,
+    "abort": _abort,
+    "__stack_chk_fail": _stack_chk_fail,
+    "puts": _puts,
+    "fputs": _fputs,
+    "putchar": _putchar,
+    "printf": _printf,
+    "fprintf": _fprintf,
+    "sprintf": _sprintf,
+    "snprintf": _snprintf,
+    "gets": _gets,
+    "fgets": _fgets,
+    "read": _read,
+    "strlen": _strlen,
+    "strcpy": _strcpy,
+    "strncpy": _strncpy,
+    "strcat": _strcat,
+    "strcmp": _strcmp,
+    "strncmp": _strncmp,
+    "memcpy": _memcpy,
+    "memmove": _memcpy,
+    "memset": _memset,
+    "memcmp": _memcmp,
+    "malloc": _malloc,
+    "calloc": _calloc,
+    "realloc": _realloc,
+    "free": _free,
+    "setvbuf": _noop,
+    "setbuf": _noop,
+    "fflush": _noop,
+}
+
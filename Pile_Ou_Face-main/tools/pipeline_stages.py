@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Run independent pipeline stages concurrently and time each one."""
+
+# Most run_pipeline stages only depend on the binary or the source file:
+#   disasm       Capstone/objdump listing
+#   debug_info   symbol index + DWARF line tables used for annotation
+#   ast          Python AST risk analysis of --source
+# They are submitted to a pool of forked worker processes (pure-Python
+# work would otherwise compete with the emulation hooks for the GIL) while
+# this process emulates; annotation joins the trace with debug_info at the
+# end. Results come back pickled, together with the worker's artifact
+# cache counters. With workers=0, or without the "fork" start method,
+# submitted stages run inline when submitted. The default leaves one CPU
+# to the emulation, so single-CPU hosts run serially.
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+import tracemalloc
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from artifact_cache import ArtifactCache
+
+# Stages that can be submitted at once (disasm, debug_info, ast).
+MAX_STAGE_WORKERS = 3
+
+
+def default_stage_workers() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return max(0, min(MAX_STAGE_WORKERS, cpus - 1))
+
+
+# Worker side: run the stage and return its result, duration and the cache
+# objects it was given (their counters are merged back by the parent).
+def _run_stage(fn: Callable, args: tuple) -> Tuple[object, float, list]:
+    # --profile's tracemalloc is inherited through fork; it only measures
+    # the parent process.
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    started = time.perf_counter()
+    result = fn(*args)
+    caches = [arg for arg in args if isinstance(arg, ArtifactCache)]
+    return result, time.perf_counter() - started, caches
+
+
+class Stage:
+    """Handle on a submitted stage; result() waits for it once."""
+
+    def __init__(self, executor: "StageExecutor", name: str, future: Future) -> None:
+        self._executor = executor
+        self.name = name
+        self._future = future
+        self._done = False
+        self._value: object = None
+
+    def result(self) -> object:
+        if not self._done:
+            started = time.perf_counter()
+            value, seconds, caches = self._future.result()
+            self._executor._record(self.name, seconds, time.perf_counter() - started, caches)
+            self._value = value
+            self._done = True
+        return self._value
+
+
+class StageExecutor:
+    """Process pool for independent stages plus the per-stage timing table."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache: Optional[ArtifactCache] = None,
+        profiler=None,
+    ) -> None:
+        self.cache = cache
+        self.profiler = profiler
+        self.stages: Dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if workers is None:
+            workers = default_stage_workers()
+        if workers > 0 and "fork" in multiprocessing.get_all_start_methods():
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            )
+        self.workers = workers if self._pool is not None else 0
+
+    def __enter__(self) -> "StageExecutor":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    # Start fn(*args) in a worker (inline without a pool).
+    def submit(self, name: str, fn: Callable, *args: object) -> Stage:
+        if self._pool is not None:
+            return Stage(self, name, self._pool.submit(_run_stage, fn, args))
+        future: Future = Future()
+        started = time.perf_counter()
+        try:
+            value = fn(*args)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result((value, time.perf_counter() - started, []))
+        return Stage(self, name, future)
+
+    # Run fn(*args) in this process as a timed stage.
+    def run(self, name: str, fn: Callable, *args: object) -> object:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.stages[name] = {"seconds": round(time.perf_counter() - started, 6), "where": "inline"}
+
+    def _record(self, name: str, seconds: float, waited: float, caches: list) -> None:
+        self.stages[name] = {
+            "seconds": round(seconds, 6),
+            "where": "worker" if self.workers else "inline",
+            "waited": round(waited, 6),
+        }
+        if self.cache is not None:
+            for cache in caches:
+                self.cache.merge(cache)
+        if self.profiler is not None:
+            self.profiler.add(name, seconds)
+
+    # meta["stages"]: per-stage seconds (worker stages also report how long
+    # the pipeline waited for them) and the wall time since creation.
+    def report(self) -> dict:
+        return {
+            "workers": self.workers,
+            "wall_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": dict(self.stages),
+        }
@@ -6,15 +6,33 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import subprocess
 import shutil
 import re
-from typing import List, Optional
+import sys
+from typing import Dict, List, Optional, Tuple
 
+from artifact_cache import ArtifactCache, digest_file
 from ast_risks import analyze_python_ast
-from unicorn_trace import TraceConfig, trace_binary
+from ast_rules import load_rules
+from ast_scan import is_multi_source, scan_python_sources
+from disasm_listing import DisasmBuilder, capstone_available
+from pipeline_stages import StageExecutor
+from trace_delta import encode_trace
+from trace_index import index_path_for
+from trace_profile import TraceProfiler, add_profile_arguments, format_profile, profiler_from_args
+from unicorn_trace import (
+    TraceConfig,
+    add_trace_arguments,
+    config_from_args,
+    load_debug_info,
+    open_cache,
+    trace_iter,
+    write_trace_columnar,
+    write_trace_json,
+    write_trace_ndjson,
+)
 
 
 def _normalize_path(path: str) -> str:
@@ -29,71 +47,198 @@ def _load_binary(path: str) -> bytes:
         return handle.read()
 
 
+# Optional static analysis results (Python AST). A directory or glob
+# `source_path` is scanned by ast_scan (process pool, per-file cache) and
+# also returns its scan report for meta["ast_scan"]. `rules_path` replaces
+# or extends the built-in rules (see ast_rules).
+def _collect_risks(
+    source_path: Optional[str],
+    cache: Optional[ArtifactCache] = None,
+    rules_path: Optional[str] = None,
+) -> Tuple[List[dict], Optional[dict]]:
+    risks: List[dict] = []
+    report = None
+    if source_path and is_multi_source(source_path):
+        risks, report = scan_python_sources(
+            source_path, cache if cache and cache.enabled else None, rules_path=rules_path
+        )
+    elif source_path:
+        risks = analyze_python_ast(source_path, load_rules(rules_path))
+    for risk in risks:
+        risk["file"] = _normalize_path(risk.get("file", source_path))
+    return risks, report
+
+
+# Optional disassembly for the UI (Capstone, or objdump when Capstone is
+# missing; cached per binary content).
+def _collect_disasm(
+    binary_path: str, output_path: Optional[str], cache: Optional[ArtifactCache] = None
+) -> Optional[dict]:
+    if output_path and (capstone_available() or shutil.which("objdump")):
+        disasm_path = _derive_disasm_path(output_path)
+        return _build_disasm(binary_path, output_path=disasm_path, cache=cache)
+    return None
+
+
+def _pipeline_meta(
+    binary_path: str, source_path: Optional[str], disasm: Optional[dict]
+) -> dict:
+    return {
+        "binary": _normalize_path(binary_path),
+        "source": _normalize_path(source_path) if source_path else None,
+        "disasm_path": os.path.abspath(disasm.get("path")) if disasm else None,
+        "disasm": disasm.get("lines") if disasm else None,
+    }
+
+
 # Run the full pipeline: trace + optional AST risks + disassembly.
+# Disassembly, AST analysis and symbol/DWARF loading run as concurrent
+# stages while this process emulates; annotation joins them at the end.
+# Per-stage seconds are reported in meta["stages"].
 def run_pipeline(
     binary_path: str,
     source_path: Optional[str],
     config: TraceConfig,
     output_path: Optional[str],
+    profiler: Optional[TraceProfiler] = None,
+    stage_workers: Optional[int] = None,
+    ast_rules: Optional[str] = None,
 ) -> dict:
+    profiler = profiler or TraceProfiler.disabled()
     code = _load_binary(binary_path)
-    trace = trace_binary(code, config, binary_path)
+    cache = open_cache(config)
+    with StageExecutor(stage_workers, cache, profiler) as stages:
+        disasm_stage = stages.submit("disasm", _collect_disasm, binary_path, output_path, cache)
+        debug_stage = stages.submit("debug_info", load_debug_info, binary_path, cache)
+        risks_stage = stages.submit("ast", _collect_risks, source_path, cache, ast_rules)
 
-    # Optional static analysis results (Python AST).
-    risks: List[dict] = []
-    if source_path:
-        risks = analyze_python_ast(source_path)
-        for risk in risks:
-            risk["file"] = _normalize_path(risk.get("file", source_path))
-
-    # Optional disassembly for the UI (objdump).
-    disasm = None
-    if shutil.which("objdump") and output_path:
-        disasm_path = _derive_disasm_path(output_path)
-        disasm = _build_disasm(binary_path, output_path=disasm_path)
+        stream = trace_iter(code, config, binary_path, cache, profiler, debug_stage)
+        stream.annotate_inline = False
+        snapshots = stages.run("emulate", list, stream)
+        stages.run("annotate", stream.annotate, snapshots)
+        disasm = disasm_stage.result()
+        risks, ast_scan = risks_stage.result()
 
-    return {
+    meta = {**stream.meta, "cache": cache.stats(), "stages": stages.report()}
+    if ast_scan is not None:
+        meta["ast_scan"] = ast_scan
+    trace: Dict[str, object] = {"snapshots": snapshots, "meta": meta}
+    if config.delta_keyframes > 0:
+        trace = encode_trace(trace, config.delta_keyframes)
+
+    payload = {
         "snapshots": trace.get("snapshots", []),
         "risks": risks,
         "meta": {
             **trace.get("meta", {}),
-            "binary": _normalize_path(binary_path),
-            "source": _normalize_path(source_path) if source_path else None,
-            "disasm_path": os.path.abspath(disasm.get("path")) if disasm else None,
-            "disasm": disasm.get("lines") if disasm else None,
+            **_pipeline_meta(binary_path, source_path, disasm),
         },
     }
+    if "frames" in trace:
+        # Delta-encoded trace: frames replace the full snapshot list.
+        del payload["snapshots"]
+        payload["encoding"] = trace["encoding"]
+        payload["frames"] = trace["frames"]
+    return payload
+
+
+# Streaming variant: steps are written to output_path as they are emulated.
+# "ndjson" writes them one per line followed by a {"risks": ...} record and
+# the trailing {"meta": ...} plus the <output>.idx step index; "columnar"
+# writes the binary container. Steps are annotated as they stream, so only
+# disassembly and AST analysis overlap the emulation; they are joined when
+# the trailing records are written.
+def run_pipeline_stream(
+    binary_path: str,
+    source_path: Optional[str],
+    config: TraceConfig,
+    output_path: str,
+    output_format: str = "ndjson",
+    profiler: Optional[TraceProfiler] = None,
+    stage_workers: Optional[int] = None,
+    ast_rules: Optional[str] = None,
+) -> dict:
+    profiler = profiler or TraceProfiler.disabled()
+    code = _load_binary(binary_path)
+    cache = open_cache(config)
+    with StageExecutor(stage_workers, cache, profiler) as stages:
+        disasm_stage = stages.submit("disasm", _collect_disasm, binary_path, output_path, cache)
+        debug_stage = stages.submit("debug_info", load_debug_info, binary_path, cache)
+        risks_stage = stages.submit("ast", _collect_risks, source_path, cache, ast_rules)
+        stream = trace_iter(code, config, binary_path, cache, profiler, debug_stage)
 
+        def extra_records() -> List[dict]:
+            return [{"risks": risks_stage.result()[0]}]
+
+        def extra_meta() -> dict:
+            meta = {
+                **_pipeline_meta(binary_path, source_path, disasm_stage.result()),
+                "cache": cache.stats(),
+                "stages": stages.report(),
+            }
+            ast_scan = risks_stage.result()[1]
+            if ast_scan is not None:
+                meta["ast_scan"] = ast_scan
+            return meta
+
+        if output_format == "columnar":
+            return write_trace_columnar(stream, output_path, extra_records, extra_meta)
+        return write_trace_ndjson(
+            stream, output_path, extra_records, extra_meta, index_path=index_path_for(output_path)
+        )
 
 
 # Generate disassembly text and an addr->line list for highlighting.
-def _build_disasm(binary_path: str, output_path: str) -> dict | None:
+def _build_disasm(
+    binary_path: str, output_path: str, cache: Optional[ArtifactCache] = None
+) -> dict | None:
+    def run_objdump() -> dict | None:
+        try:
+            result = subprocess.run(
+                ["objdump", "-d", "-M", "intel", binary_path],
+                check=False,
+                capture_output=True,
+                text=True,
+            )
+        except OSError:
+            return None
+
+        if result.returncode != 0:
+            return None
+
+        lines = []
+        for idx, line in enumerate(result.stdout.splitlines(), start=1):
+            match = re.match(r"^\s*([0-9a-fA-F]+):\s*(.*)$", line)
+            if not match:
+                continue
+            addr = f"0x{match.group(1).lower()}"
+            text_line = match.group(2).strip()
+            lines.append({"addr": addr, "text": text_line, "line": idx})
+        return {"text": result.stdout, "lines": lines}
+
+    def run_capstone() -> dict | None:
+        try:
+            with open(binary_path, "rb") as handle:
+                return DisasmBuilder(handle.read(), binary_path).listing()
+        except (OSError, ValueError, IndexError):
+            return None
+
     try:
-        result = subprocess.run(
-            ["objdump", "-d", "-M", "intel", binary_path],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        digest = digest_file(binary_path)
     except OSError:
         return None
-
-    if result.returncode != 0:
+    cache = cache or ArtifactCache(None)
+    if capstone_available():
+        listing = cache.fetch(digest, "disasm-capstone", run_capstone)
+    else:
+        listing = cache.fetch(digest, "disasm-objdump", run_objdump)
+    if listing is None:
         return None
 
-    lines = []
-    for idx, line in enumerate(result.stdout.splitlines(), start=1):
-        match = re.match(r"^\s*([0-9a-fA-F]+):\s*(.*)$", line)
-        if not match:
-            continue
-        addr = f"0x{match.group(1).lower()}"
-        text_line = match.group(2).strip()
-        lines.append({"addr": addr, "text": text_line, "line": idx})
-
     with open(output_path, "w", encoding="utf-8") as handle:
-        handle.write(result.stdout)
+        handle.write(listing["text"])
 
-    return {"path": output_path, "lines": lines}
+    return {"path": output_path, "lines": listing["lines"]}
 
 
 # Convert output.json -> output.disasm.asm (same stem).
@@ -108,89 +253,56 @@ def _main(argv: Optional[List[str]] = None) -> int:
         description="Generate a trace JSON with Unicorn + AST risk analysis"
     )
     parser.add_argument("--binary", required=True, help="Raw x86_64 binary")
-    parser.add_argument("--source", help="Python source to analyze for AST risks")
-    parser.add_argument("--output", default="output.json", help="Output JSON path")
-    parser.add_argument("--base", default="0x400000", help="Base address for raw/PIE binaries")
-    parser.add_argument("--stack-base", default="0x7ffffffde000", help="Stack base")
-    parser.add_argument("--stack-size", type=int, default=0x20000, help="Stack size bytes")
-    parser.add_argument("--max-steps", type=int, default=200, help="Max instructions")
-    parser.add_argument("--stack-entries", type=int, default=24, help="Stack entries")
-    parser.add_argument(
-        "--arch-bits",
-        type=int,
-        default=64,
-        choices=[32, 64],
-        help="Architecture bits for raw binaries",
-    )
-    parser.add_argument(
-        "--start-interp",
-        action="store_true",
-        help="Start execution at the ELF interpreter entrypoint",
-    )
     parser.add_argument(
-        "--stdin",
-        default="",
-        help="Inject data for read(0, ...) syscalls",
+        "--source",
+        help="Python source to analyze for AST risks (file, directory or glob pattern)",
     )
+    parser.add_argument("--output", default="output.json", help="Output JSON path")
+    add_trace_arguments(parser)
     parser.add_argument(
-        "--stdin-hex",
-        default=None,
-        help="Inject raw bytes (hex), e.g. 41414141",
+        "--format",
+        default="json",
+        choices=["json", "ndjson", "columnar"],
+        help="Output format (ndjson streams one step per line, meta last; "
+        "columnar writes the mmap-able binary container)",
     )
     parser.add_argument(
-        "--buffer-offset",
+        "--stage-workers",
         type=int,
         default=None,
-        help="Buffer offset from RBP for highlighting (e.g. -64)",
-    )
-    parser.add_argument(
-        "--buffer-size",
-        type=int,
-        default=0,
-        help="Buffer size in bytes for highlighting",
-    )
-    parser.add_argument(
-        "--start-symbol",
-        default=None,
-        help="Start execution at a given symbol (e.g. main)",
+        help="Worker processes for the disassembly/AST/debug-info stages "
+        "(default: CPUs - 1, at most 3; 0 runs them serially)",
     )
     parser.add_argument(
-        "--argv1",
+        "--ast-rules",
         default=None,
-        help="Set argv[1] for the emulated program",
+        help="JSON/TOML risky-call rule file, checked before the built-in rules",
     )
+    add_profile_arguments(parser)
     args = parser.parse_args(argv)
+    profiler = profiler_from_args(args)
+    config = config_from_args(args)
 
-    stdin_data = args.stdin.encode("utf-8", errors="ignore")
-    if args.stdin_hex:
-        cleaned = args.stdin_hex.replace(" ", "").replace("\n", "")
-        if cleaned.startswith("0x"):
-            cleaned = cleaned[2:]
-        try:
-            stdin_data = bytes.fromhex(cleaned)
-        except ValueError:
-            raise SystemExit("Invalid --stdin-hex (expected hex bytes)")
-
-    config = TraceConfig(
-        base=int(args.base, 16),
-        stack_base=int(args.stack_base, 16),
-        stack_size=args.stack_size,
-        max_steps=args.max_steps,
-        stack_entries=args.stack_entries,
-        arch_bits=args.arch_bits,
-        interp_base=0x70000000 if args.arch_bits == 32 else 0x7f0000000000,
-        start_interp=args.start_interp,
-        stdin_data=stdin_data,
-        buffer_offset=args.buffer_offset,
-        buffer_size=args.buffer_size,
-        start_symbol=args.start_symbol,
-        argv1=args.argv1,
-    )
-
-    payload = run_pipeline(args.binary, args.source, config, args.output)
-
-    with open(args.output, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
+    if args.format in ("ndjson", "columnar"):
+        meta = run_pipeline_stream(
+            args.binary,
+            args.source,
+            config,
+            args.output,
+            args.format,
+            profiler,
+            args.stage_workers,
+            args.ast_rules,
+        )
+    else:
+        payload = run_pipeline(
+            args.binary, args.source, config, args.output, profiler, args.stage_workers, args.ast_rules
+        )
+        write_trace_json(payload, args.output, profiler)
+        meta = payload["meta"]
+    profiler.stop()
+    if profiler.enabled:
+        print(format_profile(profiler.report(meta.get("steps"))), file=sys.stderr)
 
     return 0
 
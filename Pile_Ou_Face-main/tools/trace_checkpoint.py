@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Checkpoint file written alongside a trace for replay-based time travel."""
+
+# Every K instructions the tracer stores the CPU state (the payload of
+# uc.context_save) plus the memory pages written since the previous
+# checkpoint, and it logs every nondeterministic input (read() results,
+# rdtsc values). Any step can then be rebuilt by reloading the binary,
+# restoring the nearest checkpoint and re-executing forward (see
+# trace_replay.py).
+#
+# Layout:
+#   magic     b"POFCKPT1"
+#   pages     zlib-compressed page contents, appended as they are recorded
+#   index     UTF-8 JSON: header, inputs, checkpoints (base64 CPU state;
+#             page table entries are [addr, file offset, compressed size])
+#   trailer   u64 index offset, u64 index size, magic
+
+from __future__ import annotations
+
+import base64
+import bisect
+import ctypes
+import json
+import struct
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from unicorn import UC_HOOK_MEM_WRITE, UcError
+
+MAGIC = b"POFCKPT1"
+VERSION = 2
+PAGE_SIZE = 0x1000
+
+_TRAILER = struct.Struct("<QQ8s")
+# A saved uc_context starts with its payload size; the rest of the header
+# points into the recording process, so only the payload is stored.
+_CONTEXT_SIZE = struct.Struct("N")
+
+
+def _context_state(context) -> bytes:
+    blob = bytes(context)
+    size = _CONTEXT_SIZE.unpack_from(blob)[0]
+    return blob[len(blob) - size :]
+
+
+# Load a stored CPU state into `uc` through a context saved from it.
+def restore_context(uc, state: bytes) -> None:
+    context = uc.context_save()
+    blob = bytes(context)
+    size = _CONTEXT_SIZE.unpack_from(blob)[0]
+    if size != len(state):
+        raise ValueError("Checkpoint CPU state does not match this Unicorn build")
+    ctypes.memmove(context.context.value + len(blob) - size, state, size)
+    uc.context_restore(context)
+
+
+class CheckpointWriter:
+    """Records checkpoints and input events while the tracer runs."""
+
+    def __init__(self, path: str, interval: int, header: dict) -> None:
+        if interval <= 0:
+            raise ValueError("Checkpoint interval must be positive")
+        self.path = path
+        self.interval = interval
+        self.header = dict(header)
+        self.inputs: List[dict] = []
+        self.checkpoints: List[dict] = []
+        self.page_bytes = 0
+        self._next_step = 0
+        self._dirty: Set[int] = set()
+        self._handle = open(path, "wb")
+        self._handle.write(MAGIC)
+
+    # Replay rebuilds the loader's memory, so only pages written from here
+    # on are stored. Guest writes are seen by a memory-write hook; writes
+    # made through the API (read(), libc stubs) must be passed to mark().
+    def start(self, uc) -> None:
+        def hook_mem_write(
+            _uc, _access: int, address: int, size: int, _value: int, _user_data: object
+        ) -> None:
+            self.mark(address, size)
+
+        uc.hook_add(UC_HOOK_MEM_WRITE, hook_mem_write)
+
+    def mark(self, address: int, size: int) -> None:
+        first = address - address % PAGE_SIZE
+        self._dirty.update(range(first, address + max(size, 1), PAGE_SIZE))
+
+    def due(self, step: int) -> bool:
+        return step >= self._next_step
+
+    # Called before instruction `step` executes (same point as a snapshot).
+    # `stubs` is the libc stub state (heap pointer) when --libc-stubs is on.
+    def checkpoint(self, uc, step: int, stdin_pos: int, stubs: Optional[dict] = None) -> None:
+        pages = []
+        for addr in sorted(self._dirty):
+            try:
+                page = bytes(uc.mem_read(addr, PAGE_SIZE))
+            except UcError:
+                continue  # the write faulted; nothing was stored there
+            blob = zlib.compress(page)
+            pages.append([addr, self._handle.tell(), len(blob)])
+            self._handle.write(blob)
+            self.page_bytes += len(blob)
+        self._dirty.clear()
+        entry = {
+            "step": step,
+            "context": base64.b64encode(_context_state(uc.context_save())).decode("ascii"),
+            "stdin_pos": stdin_pos,
+            "inputs": len(self.inputs),
+            "pages": pages,
+        }
+        if stubs is not None:
+            entry["stubs"] = stubs
+        self.checkpoints.append(entry)
+        self._next_step = step + self.interval
+
+    def log_read(self, step: int, fd: int, buf: int, data: bytes, result: int) -> None:
+        self.inputs.append(
+            {"step": step, "kind": "read", "fd": fd, "buf": buf, "data": data.hex(), "result": result}
+        )
+
+    def log_tsc(self, step: int, values: Dict[str, int]) -> None:
+        self.inputs.append({"step": step, "kind": "tsc", "regs": values})
+
+    def close(self) -> dict:
+        index = {
+            "version": VERSION,
+            "interval": self.interval,
+            "header": self.header,
+            "inputs": self.inputs,
+            "checkpoints": self.checkpoints,
+        }
+        blob = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        offset = self._handle.tell()
+        self._handle.write(blob)
+        self._handle.write(_TRAILER.pack(offset, len(blob), MAGIC))
+        self._handle.close()
+        return {
+            "path": self.path,
+            "interval": self.interval,
+            "count": len(self.checkpoints),
+            "inputs": len(self.inputs),
+            "bytes": offset + len(blob) + _TRAILER.size,
+        }
+
+
+class CheckpointFile:
+    """Read side: index lookups and page reconstruction."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError("Not a checkpoint file")
+            handle.seek(-_TRAILER.size, 2)
+            offset, size, magic = _TRAILER.unpack(handle.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError("Truncated checkpoint file (missing index)")
+            handle.seek(offset)
+            index = json.loads(handle.read(size).decode("utf-8"))
+        if index.get("version") != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {index.get('version')}")
+        self.interval: int = index["interval"]
+        self.header: dict = index["header"]
+        self.inputs: List[dict] = index["inputs"]
+        self.checkpoints: List[dict] = index["checkpoints"]
+        self._steps = [ckpt["step"] for ckpt in self.checkpoints]
+
+    # Index of the last checkpoint at or before `step`.
+    def nearest(self, step: int) -> int:
+        pos = bisect.bisect_right(self._steps, step) - 1
+        if pos < 0:
+            first = self._steps[0] if self._steps else None
+            raise ValueError(f"No checkpoint at or before step {step} (first: {first})")
+        return pos
+
+    # CPU state of checkpoint `index` (see restore_context).
+    def context(self, index: int) -> bytes:
+        return base64.b64decode(self.checkpoints[index]["context"])
+
+    # Latest content of every page dirtied up to checkpoint `index`.
+    def pages(self, index: int) -> List[Tuple[int, bytes]]:
+        latest: Dict[int, Tuple[int, int]] = {}
+        for ckpt in self.checkpoints[: index + 1]:
+            for addr, offset, size in ckpt["pages"]:
+                latest[addr] = (offset, size)
+        result = []
+        with open(self.path, "rb") as handle:
+            for addr, (offset, size) in sorted(latest.items()):
+                handle.seek(offset)
+                result.append((addr, zlib.decompress(handle.read(size))))
+        return result
+
+    # Inputs recorded after checkpoint `index`, keyed by step.
+    def inputs_after(self, index: int) -> Tuple[Dict[int, dict], Dict[int, dict]]:
+        reads: Dict[int, dict] = {}
+        tscs: Dict[int, dict] = {}
+        for event in self.inputs[self.checkpoints[index]["inputs"] :]:
+            target = reads if event["kind"] == "read" else tscs
+            target[event["step"]] = event
+        return reads, tscs
+
+    @property
+    def first_step(self) -> Optional[int]:
+        return self._steps[0] if self._steps else None
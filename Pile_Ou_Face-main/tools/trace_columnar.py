@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""Memory-mapped columnar binary trace container."""
+
+# Layout (all integers little-endian):
+#   header    magic, version, word size, step count, register count,
+#             stack entries, then one u64 file offset per column and the
+#             string table / extras offsets.
+#   columns   one contiguous array per field (see COLUMNS), 8-byte aligned.
+#   strings   u64 count, (count + 1) u64 offsets, UTF-8 blob. Holds the
+#             instruction text, source files and function names.
+#   extras    UTF-8 JSON with everything that is not a snapshot
+#             (meta, risks, register names, ...).
+# Readers mmap the file and expose each column as a zero-copy NumPy view.
+
+from __future__ import annotations
+
+import array
+import json
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+MAGIC = b"POFCOL1\x00"
+VERSION = 3
+
+# Column name, array typecode, NumPy dtype, values per step (None = per-trace width).
+COLUMNS: List[Tuple[str, str, str, Optional[int]]] = [
+    ("step", "Q", "<u8", 1),
+    ("rip", "Q", "<u8", 1),
+    ("rsp", "Q", "<u8", 1),
+    ("registers", "Q", "<u8", None),
+    ("stack", "Q", "<u8", None),
+    ("stack_len", "I", "<u4", 1),
+    ("instr", "I", "<u4", 1),
+    ("file", "I", "<u4", 1),
+    ("line", "I", "<u4", 1),
+    ("func", "I", "<u4", 1),
+    # Step that last wrote each stack word (version 2+).
+    ("stack_written", "Q", "<u8", None),
+    # Shadow call stack frame id and depth, NULL_ID when absent (version 3+).
+    ("frame", "I", "<u4", 1),
+    ("depth", "I", "<u4", 1),
+]
+
+# Columns present in each container version.
+_VERSION_COLUMNS = {1: COLUMNS[:10], 2: COLUMNS[:11], 3: COLUMNS}
+
+
+def _header_struct(column_count: int) -> struct.Struct:
+    return struct.Struct("<8sIIQII" + "Q" * column_count + "QQQ")
+
+
+_HEADER = _header_struct(len(COLUMNS))
+# Magic + version, enough to pick the header layout of any version.
+_PREFIX = struct.Struct("<8sI")
+
+# String id / line value meaning "null".
+NULL_ID = 0xFFFFFFFF
+# Line value meaning the snapshot carries no file/line/func keys at all.
+NOT_ANNOTATED = 0xFFFFFFFE
+# stack_written values: written_at is null / the item has no written_at key.
+WRITTEN_NULL = 0
+WRITTEN_ABSENT = 0xFFFFFFFFFFFFFFFF
+
+# Rows buffered in memory before columns are spilled to disk.
+_FLUSH_ROWS = 4096
+
+
+def _align8(value: int) -> int:
+    return (value + 7) & ~7
+
+
+def _to_le(values: array.array) -> bytes:
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _written_value(item: dict) -> int:
+    if "written_at" not in item:
+        return WRITTEN_ABSENT
+    written = item["written_at"]
+    return WRITTEN_NULL if written is None else int(written)
+
+
+def _hex_value(value: object) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value:
+        return int(value, 16)
+    return 0
+
+
+class ColumnarWriter:
+    """Streams snapshots into per-column spill files, then assembles the container."""
+
+    def __init__(self, path: str, reg_names: List[str], stack_entries: int, word_size: int) -> None:
+        self.path = path
+        self.reg_names = list(reg_names)
+        self.stack_entries = stack_entries
+        self.word_size = word_size
+        self.count = 0
+        self._buffers = {name: array.array(code) for name, code, _dtype, _width in COLUMNS}
+        self._spills = {name: tempfile.TemporaryFile() for name, _c, _d, _w in COLUMNS}
+        self._string_ids: Dict[str, int] = {}
+        self._strings: List[str] = []
+
+    def _intern(self, text: Optional[str]) -> int:
+        if text is None:
+            return NULL_ID
+        idx = self._string_ids.get(text)
+        if idx is None:
+            idx = len(self._strings)
+            self._string_ids[text] = idx
+            self._strings.append(text)
+        return idx
+
+    def add(self, snap: dict) -> None:
+        buffers = self._buffers
+        buffers["step"].append(int(snap.get("step", self.count + 1)))
+        buffers["rip"].append(_hex_value(snap.get("rip")))
+        buffers["rsp"].append(_hex_value(snap.get("rsp")))
+
+        stack = snap.get("stack", [])[: self.stack_entries]
+        if "regs" in snap:
+            # Schema v2: integer arrays in reg_names order.
+            regs = snap["regs"]
+            buffers["registers"].extend(regs)
+            buffers["registers"].extend([0] * (len(self.reg_names) - len(regs)))
+            row = list(stack)
+            provenance = snap.get("written")
+            if provenance is None:
+                written = [WRITTEN_ABSENT] * len(stack)
+            else:
+                written = [WRITTEN_NULL if step is None else int(step) for step in provenance[: len(stack)]]
+        else:
+            values = {reg["name"]: reg["value"] for reg in snap.get("registers", [])}
+            buffers["registers"].extend(_hex_value(values.get(name)) for name in self.reg_names)
+            row = [_hex_value(item.get("value")) for item in stack]
+            written = [_written_value(item) for item in stack]
+
+        row.extend([0] * (self.stack_entries - len(row)))
+        buffers["stack"].extend(row)
+        buffers["stack_len"].append(len(stack))
+        written.extend([WRITTEN_ABSENT] * (self.stack_entries - len(written)))
+        buffers["stack_written"].extend(written)
+
+        buffers["instr"].append(self._intern(snap.get("instr")))
+        if "line" in snap or "file" in snap or "func" in snap:
+            line = snap.get("line")
+            buffers["file"].append(self._intern(snap.get("file")))
+            buffers["line"].append(NULL_ID if line is None else int(line))
+            buffers["func"].append(self._intern(snap.get("func")))
+        else:
+            buffers["file"].append(NULL_ID)
+            buffers["line"].append(NOT_ANNOTATED)
+            buffers["func"].append(NULL_ID)
+        frame = snap.get("frame")
+        buffers["frame"].append(NULL_ID if frame is None else int(frame))
+        depth = snap.get("depth")
+        buffers["depth"].append(NULL_ID if depth is None else int(depth))
+
+        self.count += 1
+        if self.count % _FLUSH_ROWS == 0:
+            self._spill()
+
+    def _spill(self) -> None:
+        for name, values in self._buffers.items():
+            if values:
+                self._spills[name].write(_to_le(values))
+                self._buffers[name] = array.array(values.typecode)
+
+    # Assemble header, columns, strings and extras into the final file.
+    def close(self, extras: Optional[dict] = None) -> None:
+        self._spill()
+        extras = dict(extras or {})
+        extras["registers"] = self.reg_names
+
+        with open(self.path, "wb") as handle:
+            handle.write(b"\x00" * _HEADER.size)
+            offsets = []
+            for name, _code, _dtype, _width in COLUMNS:
+                pos = _align8(handle.tell())
+                handle.write(b"\x00" * (pos - handle.tell()))
+                offsets.append(pos)
+                spill = self._spills[name]
+                spill.seek(0)
+                shutil.copyfileobj(spill, handle)
+                spill.close()
+
+            strings_offset = _align8(handle.tell())
+            handle.write(b"\x00" * (strings_offset - handle.tell()))
+            encoded = [text.encode("utf-8") for text in self._strings]
+            bounds = array.array("Q", [0])
+            for blob in encoded:
+                bounds.append(bounds[-1] + len(blob))
+            handle.write(struct.pack("<Q", len(encoded)))
+            handle.write(_to_le(bounds))
+            for blob in encoded:
+                handle.write(blob)
+
+            extras_offset = _align8(handle.tell())
+            handle.write(b"\x00" * (extras_offset - handle.tell()))
+            extras_blob = json.dumps(extras, separators=(",", ":")).encode("utf-8")
+            handle.write(extras_blob)
+
+            handle.seek(0)
+            handle.write(
+                _HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    self.word_size,
+                    self.count,
+                    len(self.reg_names),
+                    self.stack_entries,
+                    *offsets,
+                    strings_offset,
+                    extras_offset,
+                    len(extras_blob),
+                )
+            )
+
+
+class ColumnarTrace:
+    """Read-only view over a columnar trace; columns are NumPy arrays backed by mmap."""
+
+    def __init__(self, path: str) -> None:
+        if np is None:
+            raise RuntimeError("NumPy is required to read columnar traces. Install with: pip install numpy")
+        self.path = path
+        self._handle = open(path, "rb")
+        self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _PREFIX.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a columnar trace file")
+        columns = _VERSION_COLUMNS.get(version)
+        if columns is None:
+            raise ValueError(f"Unsupported columnar trace version {version}")
+        fields = _header_struct(len(columns)).unpack_from(self._map, 0)
+        word_size, count, n_regs, stack_entries = fields[2:6]
+        offsets = fields[6 : 6 + len(columns)]
+        strings_offset, extras_offset, extras_size = fields[6 + len(columns) :]
+
+        self.version = version
+        self.word_size = word_size
+        self.count = count
+        self.columns: Dict[str, "np.ndarray"] = {}
+        for (name, _code, dtype, width), offset in zip(columns, offsets):
+            if width is None:
+                width = n_regs if name == "registers" else stack_entries
+                view = np.frombuffer(self._map, dtype=dtype, count=count * width, offset=offset)
+                self.columns[name] = view.reshape(count, width)
+            else:
+                self.columns[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+        string_count = struct.unpack_from("<Q", self._map, strings_offset)[0]
+        self._string_bounds = np.frombuffer(
+            self._map, dtype="<u8", count=string_count + 1, offset=strings_offset + 8
+        )
+        self._string_base = strings_offset + 8 + 8 * (string_count + 1)
+        self._string_cache: Dict[int, str] = {}
+
+        self.extras = json.loads(self._map[extras_offset : extras_offset + extras_size].decode("utf-8"))
+        self.reg_names: List[str] = self.extras.get("registers", [])
+        self.meta: dict = self.extras.get("meta", {})
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "ColumnarTrace":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # NumPy views must be released before the mapping can be closed.
+        self.columns = {}
+        self._string_bounds = None
+        self._map.close()
+        self._handle.close()
+
+    def string(self, idx: int) -> Optional[str]:
+        if idx == NULL_ID:
+            return None
+        text = self._string_cache.get(idx)
+        if text is None:
+            start = self._string_base + int(self._string_bounds[idx])
+            end = self._string_base + int(self._string_bounds[idx + 1])
+            text = self._map[start:end].decode("utf-8")
+            self._string_cache[idx] = text
+        return text
+
+    # Rebuild the v1 JSON snapshot for row `index` (O(1), no parsing of other rows).
+    def snapshot(self, index: int) -> dict:
+        if index < 0:
+            index += self.count
+        if index < 0 or index >= self.count:
+            raise IndexError(index)
+        cols = self.columns
+        sp = int(cols["rsp"][index])
+        ws = self.word_size
+        stack_len = int(cols["stack_len"][index])
+        stack_row = cols["stack"][index]
+        written_row = cols["stack_written"][index] if "stack_written" in cols else None
+        stack = []
+        for i in range(stack_len):
+            item = {
+                "id": i,
+                "addr": hex(sp + i * ws),
+                "pos": i * ws,
+                "size": ws,
+                "value": hex(int(stack_row[i])),
+            }
+            if written_row is not None:
+                written = int(written_row[i])
+                if written != WRITTEN_ABSENT:
+                    item["written_at"] = None if written == WRITTEN_NULL else written
+            stack.append(item)
+        snap = {
+            "step": int(cols["step"][index]),
+            "rip": hex(int(cols["rip"][index])),
+            "rsp": hex(sp),
+            "instr": self.string(int(cols["instr"][index])),
+            "stack": stack,
+            "registers": [
+                {"name": name, "value": hex(int(value)), "pos": idx}
+                for idx, (name, value) in enumerate(zip(self.reg_names, cols["registers"][index]))
+            ],
+        }
+        line = int(cols["line"][index])
+        if line != NOT_ANNOTATED:
+            snap["file"] = self.string(int(cols["file"][index]))
+            snap["line"] = None if line == NULL_ID else line
+            snap["func"] = self.string(int(cols["func"][index]))
+        if "frame" in cols and int(cols["frame"][index]) != NULL_ID:
+            snap["frame"] = int(cols["frame"][index])
+            snap["depth"] = int(cols["depth"][index])
+        return snap
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.snapshot(index)
+
+    def to_json(self) -> dict:
+        payload = {"snapshots": list(self)}
+        payload.update({key: value for key, value in self.extras.items() if key != "registers"})
+        return payload
+
+
+# Write snapshots (any iterable, e.g. a TraceStream) to a columnar file.
+def write_columnar(
+    path: str,
+    snapshots: Iterable[dict],
+    stack_entries: int,
+    word_size: int,
+    extras_fn=None,
+    reg_names: Optional[List[str]] = None,
+) -> int:
+    writer = None
+    for snap in snapshots:
+        if writer is None:
+            if reg_names is None:
+                reg_names = [reg["name"] for reg in snap.get("registers", [])]
+            writer = ColumnarWriter(path, reg_names, stack_entries, word_size)
+        writer.add(snap)
+    if writer is None:
+        writer = ColumnarWriter(path, reg_names or [], stack_entries, word_size)
+    # Extras are resolved after iteration so streamed meta is complete.
+    writer.close(extras_fn() if extras_fn else None)
+    return writer.count
+
+
+# Convert a {snapshots, risks, meta} (or delta-encoded) payload to a columnar file.
+def json_to_columnar(payload: dict, path: str) -> int:
+    from trace_delta import decode_trace, is_delta_trace
+
+    if is_delta_trace(payload):
+        payload = decode_trace(payload)
+    snapshots = payload.get("snapshots", [])
+    meta = dict(payload.get("meta", {}))
+    word_size = int(meta.get("word_size", 8))
+    stack_entries = max((len(snap.get("stack", [])) for snap in snapshots), default=0)
+    # Schema v2 keeps register names in meta; the container reads back as v1.
+    reg_names = meta.pop("registers", None) if meta.pop("schema", 1) == 2 else None
+    extras = {key: value for key, value in payload.items() if key != "snapshots"}
+    if "meta" in payload:
+        extras["meta"] = meta
+    return write_columnar(path, snapshots, stack_entries, word_size, lambda: extras, reg_names)
+
+
+# Convert a columnar file back to the JSON layout read by the VS Code frontend.
+def columnar_to_json(path: str) -> dict:
+    with ColumnarTrace(path) as trace:
+        return trace.to_json()
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert traces between JSON and the columnar format")
+    parser.add_argument("input", help="Trace JSON or columnar file")
+    parser.add_argument("-o", "--output", required=True, help="Output path")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "rb") as handle:
+        is_columnar = handle.read(len(MAGIC)) == MAGIC
+
+    if is_columnar:
+        payload = columnar_to_json(args.input)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+    else:
+        with open(args.input, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        json_to_columnar(payload, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
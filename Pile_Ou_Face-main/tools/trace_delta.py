@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Delta-encoded snapshot stream with periodic keyframes."""
+
+# Keyframes hold a full snapshot; frames in between only carry the registers
+# and stack words (value and written_at provenance) that changed since the
+# previous frame.
+
+from __future__ import annotations
+
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional
+
+ENCODING_NAME = "delta"
+ENCODING_VERSION = 1
+
+# Snapshot keys rebuilt from the delta state instead of being copied.
+_STATE_KEYS = ("registers", "stack")
+# Delta frame keys that are not snapshot fields.
+_DELTA_KEYS = ("regs", "mem", "written", "stack_len")
+
+_MISSING = object()
+
+
+class DeltaEncoder:
+    """Turns a sequence of full snapshots into keyframes + deltas."""
+
+    def __init__(self, keyframe_interval: int, word_size: int) -> None:
+        if keyframe_interval <= 0:
+            raise ValueError("keyframe_interval must be positive")
+        self.keyframe_interval = keyframe_interval
+        self.word_size = word_size
+        self._count = 0
+        self._regs: Dict[str, str] = {}
+        self._mem: Dict[str, str] = {}
+        self._written: Dict[str, Optional[int]] = {}
+        self._stack_len = 0
+
+    def push(self, snap: dict) -> dict:
+        is_key = self._count % self.keyframe_interval == 0
+        self._count += 1
+        regs = snap.get("registers", [])
+        stack = snap.get("stack", [])
+
+        if is_key:
+            self._regs = {reg["name"]: reg["value"] for reg in regs}
+            self._mem = {item["addr"]: item["value"] for item in stack}
+            self._written = {
+                item["addr"]: item["written_at"] for item in stack if "written_at" in item
+            }
+            self._stack_len = len(stack)
+            frame = dict(snap)
+            frame["key"] = True
+            return frame
+
+        frame = {key: value for key, value in snap.items() if key not in _STATE_KEYS}
+        changed_regs = {}
+        for reg in regs:
+            name = reg["name"]
+            if self._regs.get(name) != reg["value"]:
+                changed_regs[name] = reg["value"]
+                self._regs[name] = reg["value"]
+        if changed_regs:
+            frame["regs"] = changed_regs
+
+        changed_mem = {}
+        changed_written = {}
+        for item in stack:
+            addr = item["addr"]
+            if self._mem.get(addr) != item["value"]:
+                changed_mem[addr] = item["value"]
+                self._mem[addr] = item["value"]
+            written = item.get("written_at", _MISSING)
+            if written is not _MISSING and self._written.get(addr, _MISSING) != written:
+                changed_written[addr] = written
+                self._written[addr] = written
+        if changed_mem:
+            frame["mem"] = changed_mem
+        if changed_written:
+            frame["written"] = changed_written
+
+        if len(stack) != self._stack_len:
+            frame["stack_len"] = len(stack)
+            self._stack_len = len(stack)
+        return frame
+
+
+# Value of the "encoding" key describing a delta trace.
+def encoding_header(keyframe_interval: int, word_size: int) -> dict:
+    return {
+        "type": ENCODING_NAME,
+        "version": ENCODING_VERSION,
+        "keyframe_interval": keyframe_interval,
+        "word_size": word_size,
+    }
+
+
+# Encode a full {snapshots, meta} trace into the delta form.
+def encode_trace(trace: dict, keyframe_interval: int) -> dict:
+    meta = trace.get("meta", {})
+    encoder = DeltaEncoder(keyframe_interval, int(meta.get("word_size", 8)))
+    frames = [encoder.push(snap) for snap in trace.get("snapshots", [])]
+    encoded = {key: value for key, value in trace.items() if key != "snapshots"}
+    encoded["encoding"] = encoding_header(keyframe_interval, encoder.word_size)
+    encoded["frames"] = frames
+    return encoded
+
+
+def is_delta_trace(payload: dict) -> bool:
+    encoding = payload.get("encoding")
+    return isinstance(encoding, dict) and encoding.get("type") == ENCODING_NAME
+
+
+class DeltaTraceReader:
+    """Rebuilds full snapshots from a delta-encoded trace."""
+
+    def __init__(self, payload: dict) -> None:
+        if not is_delta_trace(payload):
+            raise ValueError("Not a delta-encoded trace")
+        encoding = payload["encoding"]
+        self.word_size = int(encoding.get("word_size", 8))
+        self.meta = payload.get("meta", {})
+        self._frames: List[dict] = payload.get("frames", [])
+        self._keyframes = [idx for idx, frame in enumerate(self._frames) if frame.get("key")]
+        self._steps = [frame.get("step", idx + 1) for idx, frame in enumerate(self._frames)]
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    # Rebuild the snapshot at frame index `index` from its nearest keyframe.
+    def snapshot(self, index: int) -> dict:
+        if index < 0:
+            index += len(self._frames)
+        if index < 0 or index >= len(self._frames):
+            raise IndexError(index)
+        pos = bisect.bisect_right(self._keyframes, index) - 1
+        if pos < 0:
+            raise ValueError("Delta trace does not start with a keyframe")
+        result = None
+        for snap in self._replay(self._keyframes[pos], index + 1):
+            result = snap
+        return result
+
+    # Rebuild the snapshot whose `step` field equals `step`.
+    def at_step(self, step: int) -> dict:
+        index = bisect.bisect_left(self._steps, step)
+        if index >= len(self._steps) or self._steps[index] != step:
+            raise KeyError(step)
+        return self.snapshot(index)
+
+    def __iter__(self) -> Iterator[dict]:
+        if not self._frames:
+            return iter(())
+        return self._replay(0, len(self._frames))
+
+    def _replay(self, start: int, stop: int) -> Iterator[dict]:
+        reg_names: List[str] = []
+        regs: Dict[str, str] = {}
+        mem: Dict[str, str] = {}
+        written: Dict[str, Optional[int]] = {}
+        stack_len = 0
+        for frame in self._frames[start:stop]:
+            if frame.get("key"):
+                reg_names = [reg["name"] for reg in frame.get("registers", [])]
+                regs = {reg["name"]: reg["value"] for reg in frame.get("registers", [])}
+                mem = {item["addr"]: item["value"] for item in frame.get("stack", [])}
+                written = {
+                    item["addr"]: item["written_at"]
+                    for item in frame.get("stack", [])
+                    if "written_at" in item
+                }
+                stack_len = len(frame.get("stack", []))
+                snap = {key: value for key, value in frame.items() if key != "key"}
+                yield snap
+                continue
+
+            regs.update(frame.get("regs", {}))
+            mem.update(frame.get("mem", {}))
+            written.update(frame.get("written", {}))
+            stack_len = frame.get("stack_len", stack_len)
+            snap = {key: value for key, value in frame.items() if key not in _DELTA_KEYS}
+            snap["stack"] = self._build_stack(snap.get("rsp"), stack_len, mem, written)
+            snap["registers"] = [
+                {"name": name, "value": regs[name], "pos": idx}
+                for idx, name in enumerate(reg_names)
+            ]
+            yield snap
+
+    def _build_stack(
+        self,
+        rsp: Optional[str],
+        stack_len: int,
+        mem: Dict[str, str],
+        written: Dict[str, Optional[int]],
+    ) -> List[dict]:
+        if not rsp or stack_len <= 0:
+            return []
+        sp = int(rsp, 16)
+        items = []
+        for i in range(stack_len):
+            addr = hex(sp + i * self.word_size)
+            item = {
+                "id": i,
+                "addr": addr,
+                "pos": i * self.word_size,
+                "size": self.word_size,
+                "value": mem.get(addr, "0x0"),
+            }
+            if addr in written:
+                item["written_at"] = written[addr]
+            items.append(item)
+        return items
+
+
+# Expand a delta-encoded trace back to the plain {snapshots, meta} form.
+def decode_trace(payload: dict) -> dict:
+    reader = DeltaTraceReader(payload)
+    decoded = {
+        key: value for key, value in payload.items() if key not in ("encoding", "frames")
+    }
+    decoded["snapshots"] = list(reader)
+    return decoded
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Convert traces to/from the delta encoding")
+    parser.add_argument("input", help="Trace JSON (full or delta-encoded)")
+    parser.add_argument("-o", "--output", required=True, help="Output JSON path")
+    parser.add_argument(
+        "--keyframes",
+        type=int,
+        default=64,
+        help="Keyframe interval when encoding a full trace",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+
+    if is_delta_trace(payload):
+        converted = decode_trace(payload)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(converted, handle, indent=2)
+    else:
+        converted = encode_trace(payload, args.keyframes)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(converted, handle, separators=(",", ":"))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
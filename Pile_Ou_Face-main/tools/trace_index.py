@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Sidecar offset index for NDJSON traces and a step-slice reader."""
+
+# <trace>.idx is a small JSON file next to an NDJSON trace:
+#   chunk_steps   step records per indexed chunk (1000)
+#   steps         number of step records
+#   offsets       byte offset of step record 0, chunk_steps, 2*chunk_steps, ...
+#   records       byte offset of each non-step record ("meta", "risks", ...)
+#   size          trace size when indexed (a mismatch triggers a rebuild)
+# Reading steps [start, start + count) seeks to the enclosing chunk, skips
+# the lines before `start` without parsing them and decodes only the slice,
+# so opening a trace costs the same whatever its length. Delta-encoded
+# traces are read from the preceding keyframe.
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+from trace_delta import DeltaTraceReader
+
+INDEX_VERSION = 1
+CHUNK_STEPS = 1000
+
+_FIRST_KEY = re.compile(rb'^\{"([^"]+)"')
+
+
+def index_path_for(trace_path: str) -> str:
+    return trace_path + ".idx"
+
+
+class TraceIndexBuilder:
+    """Collects record offsets while an NDJSON trace is written."""
+
+    def __init__(self, chunk_steps: int = CHUNK_STEPS) -> None:
+        if chunk_steps <= 0:
+            raise ValueError("chunk_steps must be positive")
+        self.chunk_steps = chunk_steps
+        self.steps = 0
+        self.offsets: List[int] = []
+        self.records: Dict[str, int] = {}
+
+    def add_step(self, offset: int) -> None:
+        if self.steps % self.chunk_steps == 0:
+            self.offsets.append(offset)
+        self.steps += 1
+
+    def add_record(self, key: str, offset: int) -> None:
+        self.records[key] = offset
+
+    def to_dict(self, size: int) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "chunk_steps": self.chunk_steps,
+            "steps": self.steps,
+            "offsets": self.offsets,
+            "records": self.records,
+            "size": size,
+        }
+
+    def write(self, path: str, size: int) -> dict:
+        index = self.to_dict(size)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(index, handle, separators=(",", ":"))
+        return index
+
+
+# Index an existing NDJSON trace by scanning its lines (no JSON parsing).
+def build_index(trace_path: str, chunk_steps: int = CHUNK_STEPS) -> dict:
+    builder = TraceIndexBuilder(chunk_steps)
+    offset = 0
+    with open(trace_path, "rb") as handle:
+        for line in handle:
+            match = _FIRST_KEY.match(line)
+            if match is not None:
+                key = match.group(1).decode("utf-8")
+                if key == "step":
+                    builder.add_step(offset)
+                else:
+                    builder.add_record(key, offset)
+            offset += len(line)
+    return builder.write(index_path_for(trace_path), offset)
+
+
+class IndexedTrace:
+    """Random access to the steps of an indexed NDJSON trace."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        size = os.path.getsize(path)
+        index = None
+        try:
+            with open(index_path_for(path), "r", encoding="utf-8") as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            pass
+        if not index or index.get("version") != INDEX_VERSION or index.get("size") != size:
+            index = build_index(path)
+        self.index = index
+        self.chunk_steps: int = index["chunk_steps"]
+        self._handle = open(path, "rb")
+        self.encoding: Optional[dict] = self.record("encoding")
+        self._meta: Optional[dict] = None
+
+    def __len__(self) -> int:
+        return self.index["steps"]
+
+    def __enter__(self) -> "IndexedTrace":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    # Value of a top-level non-step record ("meta", "risks", "encoding").
+    def record(self, key: str) -> Optional[object]:
+        offset = self.index["records"].get(key)
+        if offset is None:
+            return None
+        self._handle.seek(offset)
+        return json.loads(self._handle.readline()).get(key)
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            self._meta = self.record("meta") or {}
+        return self._meta
+
+    # Step records [start, start + count) as full snapshots.
+    def steps(self, start: int, count: int) -> List[dict]:
+        start = max(0, start)
+        stop = min(len(self), start + max(0, count))
+        if start >= stop:
+            return []
+        first = start
+        if self.encoding is not None:
+            interval = int(self.encoding.get("keyframe_interval", 1))
+            first = start - start % interval
+        frames = self._read(first, stop)
+        if self.encoding is None:
+            return frames
+        reader = DeltaTraceReader({"encoding": self.encoding, "frames": frames})
+        return list(reader)[start - first :]
+
+    def step(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.steps(index, 1)[0]
+
+    # Raw step records [start, stop): seek to the chunk, skip, then parse.
+    def _read(self, start: int, stop: int) -> List[dict]:
+        chunk = start // self.chunk_steps
+        self._handle.seek(self.index["offsets"][chunk])
+        for _ in range(start - chunk * self.chunk_steps):
+            self._handle.readline()
+        return [json.loads(self._handle.readline()) for _ in range(stop - start)]
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index an NDJSON trace or read a step slice")
+    parser.add_argument("trace", help="NDJSON trace (run_pipeline --format ndjson)")
+    parser.add_argument("--build", action="store_true", help="(Re)build the .idx sidecar and exit")
+    parser.add_argument("--chunk-steps", type=int, default=CHUNK_STEPS, help="Steps per indexed chunk")
+    parser.add_argument("--start", type=int, default=0, help="First step index")
+    parser.add_argument("--count", type=int, default=1, help="Number of steps")
+    parser.add_argument("--meta", action="store_true", help="Print the meta record instead")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        index = build_index(args.trace, args.chunk_steps)
+        print(f"{index['steps']} steps, {len(index['offsets'])} chunks -> {index_path_for(args.trace)}")
+        return 0
+    with IndexedTrace(args.trace) as trace:
+        payload = trace.meta if args.meta else trace.steps(args.start, args.count)
+    print(json.dumps(payload, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
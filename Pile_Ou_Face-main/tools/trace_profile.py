@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Wall-time and memory breakdown of a trace run (--profile)."""
+
+# Phases accumulate wall-clock seconds and may be entered many times
+# ("annotate" runs once per chunk). They nest where the work does:
+#   load                        mapping the binary (ELF or raw) and the
+#                               initial stack; load_interp is the PT_INTERP
+#                               part of it
+#   emulate                     Unicorn runs, hooks included; hook_code is
+#                               broken down under "hook" (decode, registers,
+#                               stack, snapshot)
+#   registers                   unpacking the captured register blocks,
+#                               once per chunk
+#   debug_info, annotate        symbol/DWARF loading, file/line lookups
+#   disasm, ast                 run_pipeline's disassembly and AST analysis
+#                               (worker stages report their own duration,
+#                               which overlaps the phases above)
+#   serialize                   writer time between snapshots (streamed) or
+#                               JSON encoding of the collected trace
+# Peak memory is the tracemalloc peak (Python allocations; Unicorn's own
+# mappings only show in peak_rss_kb). An optional cProfile dump covers the
+# same run function by function (read it with `python -m pstats`).
+
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import resource
+import time
+import tracemalloc
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Hook phases, reported under "hook" in this order.
+HOOK_PHASES = ("decode", "registers", "stack", "snapshot")
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class TraceProfiler:
+    """Phase timings for one run; a disabled profiler records nothing."""
+
+    def __init__(
+        self, enabled: bool = True, memory: bool = True, cprofile_path: Optional[str] = None
+    ) -> None:
+        self.enabled = enabled
+        self.memory = memory and enabled
+        self.cprofile_path = cprofile_path if enabled else None
+        self.phases: Dict[str, float] = {}
+        self.hook: Dict[str, float] = {name: 0.0 for name in HOOK_PHASES}
+        self._started: Optional[float] = None
+        self._peak: Optional[int] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    @classmethod
+    def disabled(cls) -> "TraceProfiler":
+        return cls(enabled=False)
+
+    def start(self) -> None:
+        if not self.enabled or self._started is not None:
+            return
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+
+    # Stop cProfile/tracemalloc and write the pstats dump.
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self.memory and tracemalloc.is_tracing():
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    # Re-yield `items`, charging the time the consumer spends on each item
+    # (between handing it out and being asked for the next) to `name`.
+    def consumer(self, items: Iterable[T], name: str) -> Iterator[T]:
+        if not self.enabled:
+            yield from items
+            return
+        for item in items:
+            started = time.perf_counter()
+            yield item
+            self.add(name, time.perf_counter() - started)
+
+    def report(self, steps: Optional[int] = None) -> dict:
+        if not self.enabled:
+            return {}
+        wall = time.perf_counter() - self._started if self._started is not None else None
+        emulate = self.phases.get("emulate")
+        if self.memory and tracemalloc.is_tracing():
+            peak: Optional[int] = tracemalloc.get_traced_memory()[1]
+        else:
+            peak = self._peak
+        return {
+            "wall_seconds": round(wall, 6) if wall is not None else None,
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "hook": {name: round(seconds, 6) for name, seconds in self.hook.items()},
+            "steps": steps,
+            "steps_per_second": round(steps / emulate, 1) if steps and emulate else None,
+            "peak_traced_bytes": peak,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "cprofile": self.cprofile_path,
+        }
+
+
+# Human-readable summary of a report (printed on stderr by the CLIs).
+def format_profile(report: dict) -> str:
+    wall = report.get("wall_seconds") or 0.0
+    lines = [f"profile: {wall:.3f}s wall, {report.get('steps')} steps, {report.get('steps_per_second')} steps/s"]
+    for name, seconds in sorted(report.get("phases", {}).items(), key=lambda item: -item[1]):
+        share = f"{seconds / wall:6.1%}" if wall else ""
+        lines.append(f"  {name:<14} {seconds:8.3f}s {share}")
+    for name, seconds in report.get("hook", {}).items():
+        lines.append(f"  {'hook.' + name:<14} {seconds:8.3f}s")
+    peak = report.get("peak_traced_bytes")
+    if peak is not None:
+        lines.append(f"  peak traced {peak / 1e6:.1f} MB, peak RSS {report.get('peak_rss_kb', 0) / 1024:.0f} MB")
+    if report.get("cprofile"):
+        lines.append(f"  cProfile stats -> {report['cprofile']}")
+    return "\n".join(lines)
+
+
+# Profiler for the --profile / --profile-out CLI flags (disabled when unset).
+def profiler_from_args(args) -> TraceProfiler:
+    path = getattr(args, "profile_out", None)
+    enabled = bool(getattr(args, "profile", False) or path)
+    profiler = TraceProfiler(enabled=enabled, cprofile_path=path)
+    profiler.start()
+    return profiler
+
+
+def add_profile_arguments(parser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record a wall-time/memory breakdown in meta.profile",
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        help="Also dump cProfile stats to this file (implies --profile)",
+    )
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Random access to any traced step by checkpoint restore + re-execution."""
+
+# The binary is reloaded from its recorded absolute path with the recorded
+# config (the original path string only becomes argv[0]), the nearest
+# checkpoint's pages and CPU state are restored, and execution runs forward to the
+# requested step. read() results and rdtsc values come from the recorded
+# input log, so the replay follows the original run exactly. With
+# --libc-stubs the stubs run again from the checkpointed heap/stdin state.
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
+
+from trace_checkpoint import CheckpointFile, restore_context
+from unicorn_trace import (
+    UC_HOOK_CODE,
+    UC_HOOK_INSN,
+    UC_HOOK_INTR,
+    UC_X86_INS_SYSCALL,
+    UC_X86_REG_EAX,
+    UC_X86_REG_ECX,
+    UC_X86_REG_EDX,
+    UC_X86_REG_RAX,
+    UC_X86_REG_RCX,
+    UC_X86_REG_RDX,
+    DecodeEngine,
+    StdinFeed,
+    TraceConfig,
+    Uc,
+    UcError,
+    _get_pc_sp,
+    _get_reg_order,
+    _load_code,
+    _prepare_session,
+    config_from_dict,
+)
+
+_TSC_REGS_64 = {"rax": UC_X86_REG_RAX, "rdx": UC_X86_REG_RDX, "rcx": UC_X86_REG_RCX}
+_TSC_REGS_32 = {"eax": UC_X86_REG_EAX, "edx": UC_X86_REG_EDX, "ecx": UC_X86_REG_ECX}
+
+
+class ReplayState:
+    """Full emulator state right before instruction `step` executes."""
+
+    def __init__(self, uc: Uc, step: int, config: TraceConfig) -> None:
+        self.uc = uc
+        self.step = step
+        self.config = config
+        self.word_size = 8 if config.arch_bits == 64 else 4
+
+    def registers(self) -> Dict[str, int]:
+        return {name: self.uc.reg_read(reg_id) for name, reg_id in _get_reg_order(self.config)}
+
+    # Any mapped memory, not only the captured stack window.
+    def read(self, addr: int, size: int) -> bytes:
+        return bytes(self.uc.mem_read(addr, size))
+
+    def read_word(self, addr: int) -> int:
+        return int.from_bytes(self.read(addr, self.word_size), "little")
+
+    # Snapshot in the tracer's JSON shape (without write provenance).
+    def snapshot(self, stack_entries: Optional[int] = None) -> dict:
+        config = self.config
+        ws = self.word_size
+        entries = config.stack_entries if stack_entries is None else stack_entries
+        pc_reg, sp_reg = _get_pc_sp(config)
+        pc = self.uc.reg_read(pc_reg)
+        sp = self.uc.reg_read(sp_reg)
+        try:
+            instr_text = DecodeEngine(config.arch_bits).format(self.read(pc, 16), pc)
+        except UcError:
+            instr_text = "(no bytes)"
+        stack = []
+        try:
+            raw = self.read(sp, entries * ws)
+            for i in range(entries):
+                value = int.from_bytes(raw[i * ws : (i + 1) * ws], "little")
+                stack.append(
+                    {"id": i, "addr": hex(sp + i * ws), "pos": i * ws, "size": ws, "value": hex(value)}
+                )
+        except UcError:
+            pass
+        return {
+            "step": self.step,
+            "rip": hex(pc),
+            "rsp": hex(sp),
+            "instr": instr_text,
+            "stack": stack,
+            "registers": [
+                {"name": name, "value": hex(value), "pos": idx}
+                for idx, (name, value) in enumerate(self.registers().items())
+            ],
+        }
+
+
+class ReplayTrace:
+    """Opens a checkpoint file and rebuilds the state at any recorded step."""
+
+    def __init__(self, checkpoint_path: str, binary_path: Optional[str] = None) -> None:
+        self.checkpoints = CheckpointFile(checkpoint_path)
+        header = self.checkpoints.header
+        self.binary_path = binary_path or header["binary"]
+        self._code = _load_code(self.binary_path)
+        if hashlib.sha256(self._code).hexdigest() != header.get("sha256"):
+            raise ValueError(f"{self.binary_path} does not match the traced binary")
+        # argv[0] on the stack is the path string the trace was started with.
+        self._argv0 = header.get("binary_arg") or self.binary_path
+        # Replays must not record checkpoints of their own.
+        self.config = replace(config_from_dict(header["config"]), checkpoint_interval=0)
+
+    @property
+    def first_step(self) -> Optional[int]:
+        return self.checkpoints.first_step
+
+    def state_at(self, step: int) -> ReplayState:
+        index = self.checkpoints.nearest(step)
+        ckpt = self.checkpoints.checkpoints[index]
+        ckpt_step = ckpt["step"]
+        session = _prepare_session(self._code, self.config, self.binary_path, argv0=self._argv0)
+        uc = session.uc
+        config = session.config
+        for addr, page in self.checkpoints.pages(index):
+            uc.mem_write(addr, page)
+        restore_context(uc, self.checkpoints.context(index))
+        if step == ckpt_step:
+            return ReplayState(uc, step, config)
+
+        reads, tscs = self.checkpoints.inputs_after(index)
+        tsc_regs = _TSC_REGS_64 if config.arch_bits == 64 else _TSC_REGS_32
+        pc_reg, _sp_reg = _get_pc_sp(config)
+        current = ckpt_step - 1
+        reached = False
+        feed = StdinFeed(config.stdin_data, ckpt.get("stdin_pos", 0))
+        if session.stubs is not None:
+            session.stubs.restore(ckpt.get("stubs"))
+            session.stubs.attach(uc, feed)
+
+        def serve_read(uc_engine: Uc, result_reg: int) -> None:
+            event = reads.get(current)
+            if event is None:
+                return
+            data = bytes.fromhex(event["data"])
+            if data:
+                uc_engine.mem_write(event["buf"], data)
+                if event["fd"] == 0:
+                    feed.advance(len(data))
+            uc_engine.reg_write(result_reg, event["result"])
+
+        def hook_code(uc_engine: Uc, _addr: int, _size: int, _user_data: object) -> None:
+            nonlocal current, reached
+            tsc = tscs.get(current)
+            if tsc is not None:
+                for name, value in tsc["regs"].items():
+                    uc_engine.reg_write(tsc_regs[name], value)
+            if current + 1 == step:
+                reached = True
+                uc_engine.emu_stop()
+                return
+            current += 1
+
+        def hook_intr(uc_engine: Uc, intno: int, _user_data: object) -> None:
+            if config.arch_bits == 32 and intno == 0x80:
+                serve_read(uc_engine, UC_X86_REG_EAX)
+
+        def hook_syscall(uc_engine: Uc, _user_data: object) -> None:
+            if config.arch_bits == 64:
+                serve_read(uc_engine, UC_X86_REG_RAX)
+
+        uc.hook_add(UC_HOOK_CODE, hook_code)
+        uc.hook_add(UC_HOOK_INTR, hook_intr)
+        uc.hook_add(UC_HOOK_INSN, hook_syscall, None, 1, 0, UC_X86_INS_SYSCALL)
+        try:
+            uc.emu_start(uc.reg_read(pc_reg), session.end_addr)
+        except UcError as exc:
+            if not reached:
+                raise ValueError(f"Replay stopped at step {current} before {step}: {exc}")
+        if not reached:
+            raise ValueError(f"Execution ended at step {current}, before step {step}")
+        return ReplayState(uc, step, config)
+
+
+# One-shot helper: state before instruction `step` of a checkpointed trace.
+def state_at(checkpoint_path: str, step: int, binary_path: Optional[str] = None) -> ReplayState:
+    return ReplayTrace(checkpoint_path, binary_path).state_at(step)
+
+
+def _parse_mem_query(text: str) -> tuple:
+    addr, _, size = text.partition(":")
+    return int(addr, 0), int(size or "8", 0)
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the full state at any step of a trace")
+    parser.add_argument("checkpoints", help="Checkpoint file written with --checkpoint-every")
+    parser.add_argument("--step", type=int, required=True, help="Step to rebuild")
+    parser.add_argument("--binary", default=None, help="Binary path (default: the recorded one)")
+    parser.add_argument(
+        "--mem",
+        action="append",
+        default=[],
+        help="Extra memory to dump, ADDR:SIZE (repeatable), e.g. 0x404040:64",
+    )
+    parser.add_argument("--output", default=None, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    state = ReplayTrace(args.checkpoints, args.binary).state_at(args.step)
+    payload: Dict[str, object] = {"snapshot": state.snapshot()}
+    memory: List[dict] = []
+    for query in args.mem:
+        addr, size = _parse_mem_query(query)
+        try:
+            memory.append({"addr": hex(addr), "size": size, "bytes": state.read(addr, size).hex()})
+        except UcError as exc:
+            memory.append({"addr": hex(addr), "size": size, "error": str(exc)})
+    if memory:
+        payload["memory"] = memory
+
+    text = json.dumps(payload, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Trace schema versions and the v1 <-> v2 snapshot converters."""
+
+# v1 (Webview layout): every snapshot repeats
+#   "registers": [{"name": "rax", "value": "0x0", "pos": 0}, ...]
+#   "stack": [{"id": 0, "addr": "0x7ffe...", "pos": 0, "size": 8,
+#              "value": "0x0", "written_at": 12}, ...]
+# v2 (compact): register names and order live once in meta, values are
+# integers and the stack window is a base address plus value arrays:
+#   meta:     {"schema": 2, "registers": ["rax", ...], "word_size": 8, ...}
+#   snapshot: {"step": 3, "rip": 4198400, "rsp": 140737488346752, "instr": "...",
+#              "regs": [0, ...], "stack_base": 140737488346752,
+#              "stack": [0, ...], "written": [12, null, ...]}
+# "written" is omitted when the source snapshots carry no provenance.
+
+from __future__ import annotations
+
+import json
+from typing import Iterable, List, Optional
+
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+
+# v2 snapshot keys rebuilt into v1 fields by snapshot_to_v1.
+_V2_KEYS = ("regs", "stack_base", "stack", "written")
+
+
+def schema_of(payload: dict) -> int:
+    meta = payload.get("meta") or {}
+    return int(meta.get("schema", SCHEMA_V1))
+
+
+def _hex_int(value: object) -> int:
+    if isinstance(value, int):
+        return value
+    return int(str(value), 16)
+
+
+# Both converters keep the tracer's key order: the v1 "stack" and
+# "registers" fields map to "regs", "stack_base", "stack", "written" at the
+# position of "stack". `provenance` says whether "written" is emitted;
+# None infers it from the stack items (an empty window counts as tracked,
+# as in the tracer's own output).
+def snapshot_to_v2(snap: dict, provenance: Optional[bool] = None) -> dict:
+    stack = snap.get("stack") or []
+    if provenance is None:
+        provenance = not stack or any("written_at" in item for item in stack)
+    out: dict = {}
+    for key, value in snap.items():
+        if key == "registers":
+            continue
+        if key != "stack":
+            out[key] = _hex_int(value) if key in ("rip", "rsp") and isinstance(value, str) else value
+            continue
+        out["regs"] = [_hex_int(reg["value"]) for reg in snap.get("registers", [])]
+        out["stack_base"] = _hex_int(stack[0]["addr"]) if stack else _rsp(snap)
+        out["stack"] = [_hex_int(item["value"]) for item in stack]
+        if provenance:
+            out["written"] = [item.get("written_at") for item in stack]
+    if "stack" not in snap:
+        out["regs"] = [_hex_int(reg["value"]) for reg in snap.get("registers", [])]
+    return out
+
+
+def snapshot_to_v1(snap: dict, reg_names: List[str], word_size: int) -> dict:
+    values = snap.get("stack") or []
+    written = snap.get("written")
+    base = snap.get("stack_base")
+    if base is None:
+        base = _rsp(snap)
+    stack = []
+    for idx, value in enumerate(values):
+        item = {
+            "id": idx,
+            "addr": hex(base + idx * word_size) if base is not None else None,
+            "pos": idx * word_size,
+            "size": word_size,
+            "value": hex(value),
+        }
+        if written is not None:
+            item["written_at"] = written[idx] if idx < len(written) else None
+        stack.append(item)
+    registers = [
+        {"name": name, "value": hex(value), "pos": idx}
+        for idx, (name, value) in enumerate(zip(reg_names, snap.get("regs", [])))
+    ]
+    out: dict = {}
+    for key, value in snap.items():
+        if key == "stack":
+            out["stack"] = stack
+            out["registers"] = registers
+        elif key not in _V2_KEYS:
+            out[key] = hex(value) if key in ("rip", "rsp") and isinstance(value, int) else value
+    if "stack" not in out:
+        out["stack"] = stack
+        out["registers"] = registers
+    return out
+
+
+def _rsp(snap: dict) -> Optional[int]:
+    value = snap.get("rsp")
+    return None if value is None else _hex_int(value)
+
+
+# Whole payload ({snapshots, risks, meta}); delta traces are decoded first.
+def trace_to_v2(payload: dict) -> dict:
+    if schema_of(payload) == SCHEMA_V2:
+        return payload
+    from trace_delta import decode_trace, is_delta_trace
+
+    if is_delta_trace(payload):
+        payload = decode_trace(payload)
+    snapshots = payload.get("snapshots", [])
+    compact = {
+        "schema": SCHEMA_V2,
+        "registers": [reg["name"] for reg in (snapshots[0].get("registers", []) if snapshots else [])],
+    }
+    # The tracer adds both right after the run summary (call_tree).
+    meta: dict = {}
+    for key, value in (payload.get("meta") or {}).items():
+        meta[key] = value
+        if key == "call_tree":
+            meta.update(compact)
+    meta.update(compact)
+    out = {key: value for key, value in payload.items() if key not in ("snapshots", "meta")}
+    items = [item for snap in snapshots for item in snap.get("stack") or []]
+    provenance = not items or any("written_at" in item for item in items)
+    out["snapshots"] = [snapshot_to_v2(snap, provenance) for snap in snapshots]
+    out["meta"] = meta
+    return out
+
+
+def trace_to_v1(payload: dict) -> dict:
+    if schema_of(payload) != SCHEMA_V2:
+        return payload
+    meta = dict(payload.get("meta") or {})
+    reg_names = meta.pop("registers", [])
+    meta.pop("schema", None)
+    word_size = int(meta.get("word_size", 8))
+    out = {key: value for key, value in payload.items() if key not in ("snapshots", "meta")}
+    out["snapshots"] = [
+        snapshot_to_v1(snap, reg_names, word_size) for snap in payload.get("snapshots", [])
+    ]
+    out["meta"] = meta
+    return out
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a trace JSON between schema v1 and v2")
+    parser.add_argument("input", help="Trace JSON")
+    parser.add_argument("-o", "--output", required=True, help="Converted trace JSON")
+    parser.add_argument("--to", type=int, choices=[SCHEMA_V1, SCHEMA_V2], default=SCHEMA_V2)
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    if args.to == SCHEMA_V2:
+        converted = trace_to_v2(payload)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(converted, handle, separators=(",", ":"))
+    else:
+        converted = trace_to_v1(payload)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(converted, handle, indent=2)
+    print(f"{len(converted.get('snapshots', []))} snapshots -> schema v{args.to} ({args.output})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""Long-lived trace daemon speaking JSON-RPC 2.0 over stdin/stdout."""
+
+# One JSON message per line. The process keeps the bytes of the loaded
+# binaries, the artifact memo (ELF layout, symbols, DWARF, disassembly) and
+# finished traces in memory, so a re-trace with a new payload skips reading
+# and parsing the binary (each trace still sets up a fresh Unicorn engine)
+# and the UI only fetches the steps it is showing:
+#   -> {"jsonrpc": "2.0", "id": 1, "method": "trace",
+#       "params": {"binary": "examples/stack3.elf", "config": {"stdin": "AAAA"}}}
+#   <- {"jsonrpc": "2.0", "id": 1, "result": {"trace_id": "t1", "steps": 23, "done": true, ...}}
+#   -> {"jsonrpc": "2.0", "id": 2, "method": "get_steps",
+#       "params": {"trace_id": "t1", "start": 0, "count": 50}}
+# `config` keys are the run_pipeline option names (stdin, stdin_hex, argv1,
+# max_steps, libc_stubs, capture, ...), their values checked by the CLI
+# parser; "source" (file, directory or glob) and "ast_rules" (rule file)
+# drive the AST risk scan. Traces run one at a time on a worker thread: `cancel` stops a trace at its next chunk
+# boundary and `get_steps` can page through a trace that is still running.
+# Steps use the compact schema v2 unless config sets "schema": 1; the
+# register names are in the meta returned by get_meta.
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from run_pipeline import _collect_disasm, _collect_risks, _pipeline_meta
+from unicorn_trace import (
+    TraceConfig,
+    UcError,
+    _load_code,
+    add_trace_arguments,
+    config_from_args,
+    open_cache,
+    trace_iter,
+)
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+TRACE_ERROR = -32000
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class _ConfigParser(argparse.ArgumentParser):
+    """Trace option parser that reports errors instead of exiting."""
+
+    def error(self, message: str) -> None:
+        raise ValueError(message)
+
+
+# Command-line tokens for one JSON config option: flags take a boolean,
+# repeatable options a string or a list of strings, the others a scalar.
+def _config_argv(action: argparse.Action, key: str, value: object) -> List[str]:
+    flag = action.option_strings[0]
+    if value is None:
+        return []
+    if action.nargs == 0:
+        if not isinstance(value, bool):
+            raise RpcError(INVALID_PARAMS, f"config option {key!r} must be a boolean")
+        return [flag] if value else []
+    if isinstance(action, argparse._AppendAction):
+        values = [value] if isinstance(value, str) else value
+        if not isinstance(values, list) or not all(isinstance(item, str) for item in values):
+            raise RpcError(INVALID_PARAMS, f"config option {key!r} must be a string or a list of strings")
+        return [token for item in values for token in (flag, item)]
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise RpcError(INVALID_PARAMS, f"config option {key!r} must be a string or a number")
+    if isinstance(value, int) and action.dest in ("base", "stack_base"):
+        value = hex(value)
+    return [f"{flag}={value}"]
+
+
+class _Trace:
+    """One trace request; snapshots grow while the worker runs it."""
+
+    def __init__(
+        self, trace_id: str, binary_path: str, code: bytes, config: TraceConfig, params: dict
+    ) -> None:
+        self.trace_id = trace_id
+        self.binary_path = binary_path
+        self.code: Optional[bytes] = code
+        self.config = config
+        self.source_path: Optional[str] = params.get("source")
+        self.ast_rules: Optional[str] = params.get("ast_rules")
+        self.output_path: Optional[str] = params.get("output")
+        self.snapshots: List[dict] = []
+        self.meta: dict = {}
+        self.risks: List[dict] = []
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.seconds: Optional[float] = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._on_done: Optional[Callable[[dict], None]] = None
+
+    # Call `callback(summary)` once the trace has finished (now if it has).
+    def when_done(self, callback: Callable[[dict], None]) -> None:
+        with self._lock:
+            if not self.done.is_set():
+                self._on_done = callback
+                return
+        callback(self.summary())
+
+    def finish(self) -> None:
+        self.code = None
+        with self._lock:
+            self.done.set()
+            callback = self._on_done
+        if callback is not None:
+            callback(self.summary())
+
+    def summary(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "binary": self.binary_path,
+            "steps": len(self.snapshots),
+            "done": self.done.is_set(),
+            "cancelled": self.cancelled,
+            "error": self.error or self.meta.get("error"),
+            "seconds": self.seconds,
+        }
+
+
+class TraceServer:
+    """Request handlers plus the binary/trace LRU caches."""
+
+    def __init__(self, max_traces: int = 16, max_binaries: int = 8) -> None:
+        self.max_traces = max_traces
+        self.max_binaries = max_binaries
+        # abspath -> ((size, mtime_ns), bytes)
+        self._binaries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+        self._queue: "queue.Queue[Optional[_Trace]]" = queue.Queue()
+        self._next_id = 0
+        self._config_parser = _ConfigParser(add_help=False)
+        add_trace_arguments(self._config_parser)
+        self._config_actions = {
+            action.dest: action for action in self._config_parser._actions if action.option_strings
+        }
+        self._worker = threading.Thread(target=self._work, name="trace-worker", daemon=True)
+        self._worker.start()
+        self.methods: Dict[str, Callable[[dict], object]] = {
+            "trace": self.trace,
+            "get_steps": self.get_steps,
+            "get_meta": self.get_meta,
+            "cancel": self.cancel,
+            "release": self.release,
+            "stats": self.stats,
+        }
+
+    def close(self) -> None:
+        for trace in self._traces.values():
+            trace.cancelled = True
+        self._queue.put(None)
+        self._worker.join()
+
+    # Start a trace. With "wait": false the id is returned immediately;
+    # otherwise the reply is sent when the trace finishes.
+    def trace(self, params: dict) -> object:
+        binary_path = params.get("binary")
+        if not isinstance(binary_path, str):
+            raise RpcError(INVALID_PARAMS, "trace needs a 'binary' path")
+        config = self._config(params.get("config") or {})
+        code = self._binary(binary_path)
+        self._next_id += 1
+        trace = _Trace(f"t{self._next_id}", binary_path, code, config, params)
+        self._traces[trace.trace_id] = trace
+        self._evict()
+        self._queue.put(trace)
+        if params.get("wait", True):
+            return trace
+        return trace.summary()
+
+    # Snapshots [start, start + count) of a running or finished trace.
+    def get_steps(self, params: dict) -> dict:
+        trace = self._trace(params)
+        start = max(0, int(params.get("start", 0)))
+        count = max(0, int(params.get("count", 100)))
+        return {
+            "trace_id": trace.trace_id,
+            "start": start,
+            "steps": trace.snapshots[start : start + count],
+            "total": len(trace.snapshots),
+            "done": trace.done.is_set(),
+        }
+
+    def get_meta(self, params: dict) -> dict:
+        trace = self._trace(params)
+        return {**trace.summary(), "meta": trace.meta, "risks": trace.risks}
+
+    def cancel(self, params: dict) -> dict:
+        trace = self._trace(params)
+        if not trace.done.is_set():
+            trace.cancelled = True
+        return trace.summary()
+
+    def release(self, params: dict) -> dict:
+        trace = self._trace(params)
+        trace.cancelled = not trace.done.is_set()
+        del self._traces[trace.trace_id]
+        return {"trace_id": trace.trace_id, "released": True}
+
+    def stats(self, _params: dict) -> dict:
+        return {
+            "binaries": list(self._binaries),
+            "traces": [trace.summary() for trace in self._traces.values()],
+            "queued": self._queue.qsize(),
+        }
+
+    # TraceConfig from the CLI option names, defaults as on the CLI. The
+    # options go through the CLI parser, so its type converters and
+    # checks apply.
+    def _config(self, options: dict) -> TraceConfig:
+        if not isinstance(options, dict):
+            raise RpcError(INVALID_PARAMS, "'config' must be an object")
+        argv: List[str] = []
+        for key, value in options.items():
+            action = self._config_actions.get(key.replace("-", "_"))
+            if action is None:
+                raise RpcError(INVALID_PARAMS, f"unknown config option {key!r}")
+            argv.extend(_config_argv(action, key, value))
+        try:
+            return config_from_args(self._config_parser.parse_args(argv))
+        except (TypeError, ValueError, SystemExit) as exc:
+            raise RpcError(INVALID_PARAMS, f"invalid config: {exc}")
+
+    # Binary bytes, reloaded only when the file changes on disk.
+    def _binary(self, binary_path: str) -> bytes:
+        path = os.path.abspath(binary_path)
+        try:
+            stat = os.stat(path)
+        except OSError as exc:
+            raise RpcError(INVALID_PARAMS, str(exc))
+        key = (stat.st_size, stat.st_mtime_ns)
+        entry = self._binaries.get(path)
+        if entry is None or entry[0] != key:
+            entry = (key, _load_code(path))
+            self._binaries[path] = entry
+        self._binaries.move_to_end(path)
+        while len(self._binaries) > self.max_binaries:
+            self._binaries.popitem(last=False)
+        return entry[1]
+
+    def _trace(self, params: dict) -> _Trace:
+        trace = self._traces.get(params.get("trace_id"))
+        if trace is None:
+            raise RpcError(INVALID_PARAMS, f"unknown trace_id {params.get('trace_id')!r}")
+        self._traces.move_to_end(trace.trace_id)
+        return trace
+
+    # Drop the least recently used finished traces beyond max_traces.
+    def _evict(self) -> None:
+        for trace_id in list(self._traces):
+            if len(self._traces) <= self.max_traces:
+                break
+            if self._traces[trace_id].done.is_set():
+                del self._traces[trace_id]
+
+    def _work(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            self._run(trace)
+
+    def _run(self, trace: _Trace) -> None:
+        started = time.perf_counter()
+        try:
+            if not trace.cancelled:
+                cache = open_cache(trace.config)
+                stream = trace_iter(trace.code, trace.config, trace.binary_path, cache)
+                for snapshot in stream:
+                    if trace.cancelled:
+                        break
+                    trace.snapshots.append(snapshot)
+                disasm = _collect_disasm(trace.binary_path, trace.output_path, cache)
+                trace.meta = {
+                    **stream.meta,
+                    **_pipeline_meta(trace.binary_path, trace.source_path, disasm),
+                }
+                trace.risks, ast_scan = _collect_risks(trace.source_path, cache, trace.ast_rules)
+                if ast_scan is not None:
+                    trace.meta["ast_scan"] = ast_scan
+        except (OSError, UcError, ValueError, SyntaxError) as exc:
+            trace.error = str(exc)
+        except Exception as exc:  # a bug in one trace must not stop the worker
+            trace.error = f"{type(exc).__name__}: {exc}"
+        trace.seconds = round(time.perf_counter() - started, 4)
+        trace.finish()
+
+
+class _StdioTransport:
+    """Newline-delimited JSON-RPC over a pair of text streams."""
+
+    def __init__(self, server: TraceServer, reader, writer) -> None:
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self._lock = threading.Lock()
+
+    def send(self, message: dict) -> None:
+        text = json.dumps({"jsonrpc": "2.0", **message}, separators=(",", ":"))
+        with self._lock:
+            self.writer.write(text + "\n")
+            self.writer.flush()
+
+    def serve(self) -> None:
+        for line in self.reader:
+            if not line.strip():
+                continue
+            if not self.handle(line):
+                break
+
+    # Dispatch one request line; returns False after "shutdown".
+    def handle(self, line: str) -> bool:
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as exc:
+            self.send({"id": None, "error": {"code": PARSE_ERROR, "message": str(exc)}})
+            return True
+        if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+            self.send({"id": None, "error": {"code": INVALID_REQUEST, "message": "not a request"}})
+            return True
+        request_id = message.get("id")
+        method = message["method"]
+        if method == "shutdown":
+            if request_id is not None:
+                self.send({"id": request_id, "result": None})
+            return False
+        handler = self.server.methods.get(method)
+        try:
+            if handler is None:
+                raise RpcError(METHOD_NOT_FOUND, f"unknown method {method!r}")
+            params = message.get("params") or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            result = handler(params)
+        except RpcError as exc:
+            if request_id is not None:
+                self.send({"id": request_id, "error": {"code": exc.code, "message": str(exc)}})
+            return True
+        if request_id is None:
+            return True
+        if isinstance(result, _Trace):
+            result.when_done(lambda summary: self._reply_trace(request_id, summary))
+        else:
+            self.send({"id": request_id, "result": result})
+        return True
+
+    # A trace that failed before producing any step is an error reply.
+    def _reply_trace(self, request_id: object, summary: dict) -> None:
+        if summary["error"] and not summary["steps"]:
+            error = {"code": TRACE_ERROR, "message": summary["error"], "data": summary}
+            self.send({"id": request_id, "error": error})
+        else:
+            self.send({"id": request_id, "result": summary})
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Trace daemon for the VS Code extension (JSON-RPC 2.0 over stdio)"
+    )
+    parser.add_argument("--max-traces", type=int, default=16, help="Finished traces kept in memory")
+    parser.add_argument("--max-binaries", type=int, default=8, help="Binaries kept in memory")
+    args = parser.parse_args(argv)
+
+    server = TraceServer(args.max_traces, args.max_binaries)
+    transport = _StdioTransport(server, sys.stdin, sys.stdout)
+    try:
+        transport.serve()
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
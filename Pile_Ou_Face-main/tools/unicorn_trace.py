@@ -3,13 +3,18 @@
 
 from __future__ import annotations
 
+import argparse
+import ctypes
+import functools
+import hashlib
 import importlib.util
 import json
 import os
-import shutil
-import subprocess
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 try:
     from unicorn import Uc, UcError
@@ -17,9 +22,11 @@ try:
         UC_ARCH_X86,
         UC_MODE_32,
         UC_MODE_64,
+        UC_HOOK_BLOCK,
         UC_HOOK_CODE,
         UC_HOOK_INSN,
         UC_HOOK_INTR,
+        UC_HOOK_MEM_WRITE,
         UC_PROT_ALL,
     )
     from unicorn.x86_const import (
@@ -54,6 +61,26 @@ try:
 except ImportError as exc:  # pragma: no cover - guard for missing deps
     raise SystemExit("Unicorn is required. Install with: pip install unicorn") from exc
 
+from artifact_cache import DEFAULT_MAX_BYTES, ArtifactCache, default_cache_dir, digest_bytes, digest_file
+from capture_policy import CapturePolicy, branch_mnemonic
+from cyclic import analyze_overflow, cyclic
+from dwarf_lines import DwarfInfo
+from elf_format import (
+    PT_DYNAMIC,
+    SymbolIndex,
+    _parse_elf_header,
+    _parse_program_headers,
+    _read_c_string,
+    build_symbol_index,
+)
+from libc_stubs import LibcStubs
+from trace_checkpoint import CheckpointWriter
+from trace_columnar import write_columnar
+from trace_delta import DeltaEncoder, encode_trace, encoding_header, is_delta_trace
+from trace_index import TraceIndexBuilder, index_path_for
+from trace_profile import TraceProfiler, add_profile_arguments, format_profile, profiler_from_args
+from trace_schema import SCHEMA_V1, SCHEMA_V2, schema_of
+
 
 # Register dump order for UI rendering.
 REG_ORDER_64 = [
@@ -89,6 +116,9 @@ REG_ORDER_32 = [
     ("eip", UC_X86_REG_EIP),
 ]
 
+# Default budget of uninstrumented instructions before the trace window.
+DEFAULT_MAX_OUTSIDE_STEPS = 1_000_000
+
 
 @dataclass
 class TraceConfig:
@@ -118,6 +148,54 @@ class TraceConfig:
     start_symbol: Optional[str]
     # Optional argv[1] string injected into the initial stack.
     argv1: Optional[str]
+    # Emit a delta-encoded trace with a keyframe every N steps (0 = full snapshots).
+    delta_keyframes: int = 0
+    # Snapshot layout: 1 (self-describing register/stack dicts) or 2 (compact
+    # integer arrays, register names in meta; see trace_schema). Delta-encoded
+    # traces are always v1.
+    schema: int = SCHEMA_V2
+    # Feed a cyclic pattern of this length (0 = off) and stop at the first
+    # hijack. Dynamic ELFs then run on the libc stubs unless start_interp.
+    cyclic_length: int = 0
+    # Where the cyclic pattern is injected: "stdin" or "argv1".
+    cyclic_into: str = "stdin"
+    # Start capturing when execution first reaches this symbol/address.
+    trace_from: Optional[str] = None
+    # Stop emulation when execution reaches this symbol/address.
+    trace_until: Optional[str] = None
+    # Only capture inside these ranges ("lo-hi" or a function symbol).
+    trace_ranges: Tuple[str, ...] = ()
+    # Instructions allowed to run uninstrumented outside the trace window
+    # (max_steps only counts traced ones).
+    max_outside_steps: int = DEFAULT_MAX_OUTSIDE_STEPS
+    # Snapshot capture rules (every:N, on:call,ret,..., when:rip in main);
+    # empty captures every step.
+    capture: Tuple[str, ...] = ()
+    # Record a replay checkpoint every N instructions (0 = off) into checkpoint_path.
+    checkpoint_interval: int = 0
+    checkpoint_path: Optional[str] = None
+    # Resolve dynamic imports to Python libc stubs instead of running ld.so.
+    libc_stubs: bool = False
+    # Directory of the per-binary artifact cache (None = no disk cache).
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = DEFAULT_MAX_BYTES
+
+
+# JSON-safe form of a TraceConfig (stored in checkpoint files).
+def config_to_dict(config: TraceConfig) -> dict:
+    data = asdict(config)
+    data["stdin_data"] = config.stdin_data.hex()
+    data["trace_ranges"] = list(config.trace_ranges)
+    data["capture"] = list(config.capture)
+    return data
+
+
+def config_from_dict(data: dict) -> TraceConfig:
+    data = dict(data)
+    data["stdin_data"] = bytes.fromhex(data.get("stdin_data", ""))
+    data["trace_ranges"] = tuple(data.get("trace_ranges", ()))
+    data["capture"] = tuple(data.get("capture", ()))
+    return TraceConfig(**data)
 
 
 def _align_up(value: int, align: int) -> int:
@@ -128,18 +206,111 @@ def _capstone_available() -> bool:
     return importlib.util.find_spec("capstone") is not None
 
 
-def _format_instr(code_bytes: bytes, addr: int, arch_bits: int) -> str:
-    if not code_bytes:
-        return "(no bytes)"
-    if not _capstone_available():
-        return f"{code_bytes.hex()}"
-    from capstone import Cs, CS_ARCH_X86, CS_MODE_32, CS_MODE_64  # type: ignore
-
-    mode = CS_MODE_64 if arch_bits == 64 else CS_MODE_32
-    disasm = Cs(CS_ARCH_X86, mode)
-    for insn in disasm.disasm(code_bytes, addr):
-        return f"{insn.mnemonic} {insn.op_str}".strip()
-    return code_bytes.hex()
+PAGE_SIZE = 0x1000
+
+
+# Per-trace instruction decoder: one Capstone handle per mode and a cache of
+# decoded text keyed by (address, bytes). Cached entries are indexed by code
+# page so writes into a page (self-modifying code) drop them.
+class DecodeEngine:
+    def __init__(self, arch_bits: int) -> None:
+        self.arch_bits = arch_bits
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._use_capstone = _capstone_available()
+        self._disassemblers: Dict[int, object] = {}
+        self._cache: Dict[Tuple[int, bytes], str] = {}
+        self._blocks: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        self._pages: Dict[int, List[tuple]] = {}
+
+    def _disassembler(self, arch_bits: int):
+        disasm = self._disassemblers.get(arch_bits)
+        if disasm is None:
+            from capstone import Cs, CS_ARCH_X86, CS_MODE_32, CS_MODE_64  # type: ignore
+
+            mode = CS_MODE_64 if arch_bits == 64 else CS_MODE_32
+            disasm = Cs(CS_ARCH_X86, mode)
+            self._disassemblers[arch_bits] = disasm
+        return disasm
+
+    def _decode(self, code_bytes: bytes, addr: int) -> str:
+        if not self._use_capstone:
+            return code_bytes.hex()
+        for insn in self._disassembler(self.arch_bits).disasm(code_bytes, addr):
+            return f"{insn.mnemonic} {insn.op_str}".strip()
+        return code_bytes.hex()
+
+    def format(self, code_bytes: bytes, addr: int) -> str:
+        if not code_bytes:
+            return "(no bytes)"
+        key = (addr, code_bytes)
+        text = self._cache.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        self.misses += 1
+        text = self._decode(code_bytes, addr)
+        self._cache[key] = text
+        self._index(key, addr, len(code_bytes))
+        return text
+
+    # Instruction addresses of the basic block at `addr` (used to count
+    # steps that run without a code hook). Without Capstone a block counts
+    # as a single instruction.
+    def block(self, uc: Uc, addr: int, size: int) -> Tuple[int, ...]:
+        key = (addr, size)
+        insns = self._blocks.get(key)
+        if insns is not None:
+            return insns
+        insns = ()
+        if self._use_capstone and size > 0:
+            code = bytes(uc.mem_read(addr, size))
+            disasm = self._disassembler(self.arch_bits)
+            insns = tuple(item[0] for item in disasm.disasm_lite(code, addr))
+        insns = insns or (addr,)
+        self._blocks[key] = insns
+        self._index(key, addr, max(size, 1))
+        return insns
+
+    def _index(self, key: tuple, addr: int, size: int) -> None:
+        first_page = addr // PAGE_SIZE
+        last_page = (addr + size - 1) // PAGE_SIZE
+        for page in range(first_page, last_page + 1):
+            self._pages.setdefault(page, []).append(key)
+
+    def invalidate(self, addr: int, size: int) -> None:
+        if not self._pages:
+            return
+        first_page = addr // PAGE_SIZE
+        last_page = (addr + max(size, 1) - 1) // PAGE_SIZE
+        for page in range(first_page, last_page + 1):
+            keys = self._pages.pop(page, None)
+            if not keys:
+                continue
+            self.invalidations += 1
+            for key in keys:
+                self._cache.pop(key, None)
+                self._blocks.pop(key, None)
+
+    # Watch writes into code ranges so stale decodes are dropped.
+    def attach(self, uc: Uc, ranges: Iterable[Tuple[int, int]]) -> None:
+        def hook_mem_write(
+            _uc: Uc, _access: int, address: int, size: int, _value: int, _user_data: object
+        ) -> None:
+            self.invalidate(address, size)
+
+        for start, end in ranges:
+            if end > start:
+                uc.hook_add(UC_HOOK_MEM_WRITE, hook_mem_write, None, start, end - 1)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._cache),
+        }
 
 
 def _init_stack(uc: Uc, config: TraceConfig) -> int:
@@ -155,6 +326,35 @@ def _init_stack(uc: Uc, config: TraceConfig) -> int:
     return sp
 
 
+# Replace stdin/argv1 with the cyclic pattern once the bitness is known.
+def _with_cyclic(config: TraceConfig) -> TraceConfig:
+    if config.cyclic_length <= 0:
+        return config
+    pattern = cyclic(config.cyclic_length, 8 if config.arch_bits == 64 else 4)
+    if config.cyclic_into == "argv1":
+        return replace(config, argv1=pattern.decode("ascii"))
+    return replace(config, stdin_data=pattern)
+
+
+class StdinFeed:
+    """Injected stdin, shared by read() syscalls and the libc stubs."""
+
+    def __init__(self, data: bytes, pos: int = 0) -> None:
+        self.data = data
+        self.pos = pos
+
+    def peek(self, count: int) -> bytes:
+        return self.data[self.pos : self.pos + max(count, 0)]
+
+    def advance(self, count: int) -> None:
+        self.pos = min(self.pos + count, len(self.data))
+
+    def read(self, count: int) -> bytes:
+        chunk = self.peek(count)
+        self.pos += len(chunk)
+        return chunk
+
+
 def _get_reg_order(config: TraceConfig) -> List[tuple]:
     return REG_ORDER_64 if config.arch_bits == 64 else REG_ORDER_32
 
@@ -165,267 +365,1033 @@ def _get_pc_sp(config: TraceConfig) -> tuple:
     return UC_X86_REG_EIP, UC_X86_REG_ESP
 
 
-# Trace a raw code blob (no ELF parsing).
-def trace_raw(code_bytes: bytes, config: TraceConfig) -> Dict[str, object]:
-    if config.arch_bits == 32 and config.stack_base > 0xFFFFFFFF:
-        config = TraceConfig(
-            base=config.base,
-            stack_base=0xBFF00000,
-            stack_size=config.stack_size,
-            max_steps=config.max_steps,
-            stack_entries=config.stack_entries,
-            arch_bits=config.arch_bits,
-            interp_base=config.interp_base,
-            start_interp=config.start_interp,
-            stdin_data=config.stdin_data,
-            buffer_offset=config.buffer_offset,
-            buffer_size=config.buffer_size,
-            start_symbol=config.start_symbol,
-            argv1=config.argv1,
-        )
-    mode = UC_MODE_64 if config.arch_bits == 64 else UC_MODE_32
-    uc = Uc(UC_ARCH_X86, mode)
+# Call tree nodes kept in meta.call_tree.
+MAX_CALL_NODES = 100000
+# Frame pointer setup recorded as a frame's base.
+_BP_SETUP = frozenset(("mov rbp, rsp", "mov ebp, esp"))
+
+
+# Shadow call stack built from the traced call/ret/leave instructions. It
+# feeds the snapshot "frame"/"depth" fields, meta.call_tree and the
+# return-address checks. Frame 0 is the code running when tracing starts;
+# its return slot is the word at sp. Each call opens a child frame at the
+# next traced step (closed as "untraced" right away when the callee already
+# returned outside the trace window or through a libc stub); push_frame
+# opens one for code entered without a call (the libc stubs jumping to
+# main). A ret pops the frame whose return slot is at sp (frames below sp
+# were abandoned and are closed as "unwound"); a ret that matches no frame
+# is an indirect jump (e.g. ld.so trampolines) and changes nothing. A ret
+# that pops something other than what its call pushed, or that runs with sp
+# outside the stack mapping, is recorded as a control-flow hijack (first
+# one wins). Frame ids stay sequential past MAX_CALL_NODES, but only the
+# first ones are kept in the tree.
+class CallTracker:
+    def __init__(self, word_size: int, stack_range: Tuple[int, int]) -> None:
+        self.word_size = word_size
+        self.stack_range = stack_range
+        self._sp_reg = UC_X86_REG_RSP if word_size == 8 else UC_X86_REG_ESP
+        self.nodes: List[dict] = []
+        self.stack: List[dict] = []
+        self.max_depth = 0
+        self.hijack: Optional[dict] = None
+        self._next_id = 0
+        self._pending: Optional[tuple] = None
+
+    def _open(
+        self, step: int, target: Optional[int], site: Optional[int], slot: int, return_to: Optional[int]
+    ) -> dict:
+        parent = self.stack[-1] if self.stack else None
+        node = {
+            "id": self._next_id,
+            "parent": parent["id"] if parent is not None else None,
+            "depth": len(self.stack),
+            "site": site,
+            "target": target,
+            "entry_step": step,
+            "exit_step": None,
+            "exit": "open",
+            "ret_slot": slot,
+            "return_to": return_to,
+            "frame_base": None,
+            "leave_step": None,
+            "snapshots": None,
+        }
+        self._next_id += 1
+        if len(self.nodes) < MAX_CALL_NODES:
+            self.nodes.append(node)
+        self.stack.append(node)
+        self.max_depth = max(self.max_depth, node["depth"])
+        return node
+
+    def _close(self, node: dict, step: int, how: str) -> None:
+        node["exit_step"] = step
+        node["exit"] = how
+
+    # Enter `target` at `step` with its return address already stored at
+    # `slot`, as if called from the current frame.
+    def push_frame(self, step: int, target: int, slot: int, return_to: int) -> dict:
+        return self._open(step, target, None, slot, return_to)
+
+    # Account for the instruction about to run at `addr`. Returns the frame
+    # it runs in (the caller's for a call, the callee's for its ret) and the
+    # hijack event when it is a hijacked ret.
+    def on_step(
+        self, uc: Uc, step: int, addr: int, size: int, instr_text: str
+    ) -> Tuple[dict, Optional[dict]]:
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            call_step, site, slot, return_to = pending
+            node = self._open(call_step + 1, addr, site, slot, return_to)
+            if addr == return_to and uc.reg_read(self._sp_reg) > slot:
+                self._close(self.stack.pop(), step - 1, "untraced")
+                node["target"] = None
+        elif not self.stack:
+            sp = uc.reg_read(self._sp_reg)
+            self._open(step, addr, None, sp, self._read_word(uc, sp))
+        current = self.stack[-1]
+
+        mnemonic = branch_mnemonic(instr_text)
+        if mnemonic == "call":
+            sp = uc.reg_read(self._sp_reg)
+            self._pending = (step, addr, sp - self.word_size, addr + size)
+        elif mnemonic.startswith("ret"):
+            return current, self._ret(uc, step, addr)
+        elif mnemonic == "leave":
+            current["leave_step"] = step
+        elif mnemonic == "enter":
+            current["frame_base"] = uc.reg_read(self._sp_reg) - self.word_size
+        elif mnemonic == "mov" and instr_text in _BP_SETUP and current["frame_base"] is None:
+            current["frame_base"] = uc.reg_read(self._sp_reg)
+        return current, None
+
+    def _ret(self, uc: Uc, step: int, addr: int) -> Optional[dict]:
+        sp = uc.reg_read(self._sp_reg)
+        if not self.stack_range[0] <= sp < self.stack_range[1]:
+            return self._hijacked(step, addr, sp, None, self._read_word(uc, sp), "stack_pivot")
+        stack = self.stack
+        # Keep frame 0 (and anything else below it) on the stack: sp at the
+        # slot of the root frame means the traced code returns out of the
+        # trace.
+        while len(stack) > 1 and stack[-1]["ret_slot"] < sp:
+            self._close(stack.pop(), step, "unwound")
+        top = stack[-1]
+        if top["ret_slot"] != sp or top["exit"] != "open":
+            return None
+        target = self._read_word(uc, sp)
+        event = None
+        if target != top["return_to"]:
+            event = self._hijacked(step, addr, sp, top["return_to"], target, "overwrite")
+        self._close(top, step, "ret" if event is None else "hijack")
+        if len(stack) > 1:
+            stack.pop()
+        return event
+
+    def _hijacked(
+        self, step: int, addr: int, slot: int, expected: Optional[int], target: Optional[int], kind: str
+    ) -> dict:
+        event = {
+            "step": step,
+            "rip": hex(addr),
+            "slot": hex(slot),
+            "expected": hex(expected) if expected is not None else None,
+            "target": hex(target) if target is not None else None,
+            "kind": kind,
+        }
+        if self.hijack is None:
+            self.hijack = event
+        return event
+
+    # Live frames whose return slot no longer holds the expected address.
+    def overwritten_slots(self, uc: Uc) -> List[dict]:
+        live = [(node["ret_slot"], node["return_to"]) for node in self.stack if node["exit"] == "open"]
+        if self._pending is not None:
+            live.append(self._pending[2:])
+        found = []
+        for slot, expected in live:
+            if expected is None:
+                continue
+            value = self._read_word(uc, slot)
+            if value != expected:
+                found.append(
+                    {
+                        "slot": hex(slot),
+                        "expected": hex(expected),
+                        "value": hex(value) if value is not None else None,
+                    }
+                )
+        return found
+
+    # Snapshot list index range of each frame, for direct jumps.
+    @staticmethod
+    def note_snapshot(node: dict, index: int) -> None:
+        span = node["snapshots"]
+        if span is None:
+            node["snapshots"] = [index, index]
+        else:
+            span[1] = index
 
-    code_size = _align_up(len(code_bytes), 0x1000)
-    uc.mem_map(config.base, code_size, UC_PROT_ALL)
-    uc.mem_write(config.base, code_bytes)
+    def _read_word(self, uc: Uc, addr: int) -> Optional[int]:
+        try:
+            return int.from_bytes(uc.mem_read(addr, self.word_size), "little")
+        except UcError:
+            return None
+
+    # meta.call_tree: nodes indexed by frame id with inclusive ("steps") and
+    # own ("self_steps") instruction counts; open frames run to `last_step`.
+    def to_meta(self, last_step: int) -> dict:
+        nodes = []
+        child_steps: Dict[int, int] = {}
+        for node in self.nodes:
+            end = node["exit_step"] if node["exit_step"] is not None else last_step
+            out = dict(node)
+            out["steps"] = max(0, end - node["entry_step"] + 1)
+            for key in ("site", "target", "ret_slot", "return_to", "frame_base"):
+                if out[key] is not None:
+                    out[key] = hex(out[key])
+            nodes.append(out)
+            if node["parent"] is not None:
+                child_steps[node["parent"]] = child_steps.get(node["parent"], 0) + out["steps"]
+        for out in nodes:
+            out["self_steps"] = out["steps"] - child_steps.get(out["id"], 0)
+        return {
+            "frames": self._next_id,
+            "max_depth": self.max_depth,
+            "truncated": self._next_id > len(self.nodes),
+            "nodes": nodes,
+        }
 
-    _init_stack(uc, config)
 
-    snapshots: List[dict] = []
-    step_counter = 0
-    error: Optional[str] = None
-    pc_reg, sp_reg = _get_pc_sp(config)
-    reg_order = _get_reg_order(config)
-    word_size = 8 if config.arch_bits == 64 else 4
-    stdin_pos = 0
-
-    # Minimal read(0, buf, count) emulation using --stdin bytes.
-    def handle_read_syscall(uc_engine: Uc, fd: int, buf: int, count: int) -> int:
-        nonlocal stdin_pos
-        if fd != 0:
-            return -1
-        remaining = len(config.stdin_data) - stdin_pos
-        to_copy = min(count, max(remaining, 0))
-        if to_copy > 0:
-            chunk = config.stdin_data[stdin_pos : stdin_pos + to_copy]
-            uc_engine.mem_write(buf, chunk)
-            stdin_pos += to_copy
-        return to_copy
-
-    # 32-bit syscall entry via int 0x80.
-    def hook_intr(uc_engine: Uc, intno: int, _user_data: object) -> None:
-        if config.arch_bits != 32:
-            return
-        if intno != 0x80:
-            return
-        syscall_no = uc_engine.reg_read(UC_X86_REG_EAX)
-        if syscall_no == 3:  # sys_read
-            fd = uc_engine.reg_read(UC_X86_REG_EBX)
-            buf = uc_engine.reg_read(UC_X86_REG_ECX)
-            count = uc_engine.reg_read(UC_X86_REG_EDX)
-            result = handle_read_syscall(uc_engine, fd, buf, count)
-            uc_engine.reg_write(UC_X86_REG_EAX, result)
-            eip = uc_engine.reg_read(UC_X86_REG_EIP)
-            uc_engine.reg_write(UC_X86_REG_EIP, eip + 2)
-
-    # 64-bit syscall entry via syscall instruction.
-    def hook_syscall(uc_engine: Uc, _user_data: object) -> None:
-        if config.arch_bits != 64:
-            return
-        syscall_no = uc_engine.reg_read(UC_X86_REG_RAX)
-        if syscall_no == 0:  # sys_read
-            fd = uc_engine.reg_read(UC_X86_REG_RDI)
-            buf = uc_engine.reg_read(UC_X86_REG_RSI)
-            count = uc_engine.reg_read(UC_X86_REG_RDX)
-            result = handle_read_syscall(uc_engine, fd, buf, count)
-            uc_engine.reg_write(UC_X86_REG_RAX, result)
-
-    def hook_code(uc_engine: Uc, addr: int, size: int, _user_data: object) -> None:
-        nonlocal step_counter
-        if step_counter >= config.max_steps:
-            uc_engine.emu_stop()
+# Shadow copy of the stack mapping kept current by UC_HOOK_MEM_WRITE, plus
+# the step that last wrote each word. The captured stack window is rebuilt
+# only when sp moved or a word inside it was written; otherwise the previous
+# lists are reused as is.
+class StackTracker:
+    def __init__(self, uc: Uc, base: int, size: int, word_size: int, entries: int) -> None:
+        self.base = base
+        self.end = base + size
+        self.word_size = word_size
+        self.entries = entries
+        # Step of the instruction currently executing (set by the hooks).
+        self.step = 0
+        # Outside the trace window steps are counted per block: the block's
+        # uninstrumented instructions run as steps first_step + 1, + 2, ...
+        # (see enter_block); writes look their step up by pc.
+        self._block_steps: Optional[Dict[int, int]] = None
+        self._pc_reg = UC_X86_REG_RIP if word_size == 8 else UC_X86_REG_EIP
+        self.built = 0
+        self.reused = 0
+        self._shadow = bytearray(uc.mem_read(base, size))
+        self._written_at: Dict[int, int] = {}
+        # Ranges written by accesses wider than the hook value (re-read lazily).
+        self._stale: List[Tuple[int, int]] = []
+        self._view_sp: Optional[int] = None
+        self._words: Tuple[List[int], List[Optional[int]]] = ([], [])
+        self._view: Optional[List[dict]] = None
+        self._dirty = True
+
+    def attach(self, uc: Uc) -> None:
+        def hook_mem_write(
+            _uc: Uc, _access: int, address: int, size: int, value: int, _user_data: object
+        ) -> None:
+            step = self.step
+            if self._block_steps is not None:
+                step = self._block_steps.get(_uc.reg_read(self._pc_reg), step)
+            if size > 8:
+                self._stale.append((address, size))
+                self._mark(address, size, step)
+                return
+            data = (value & ((1 << (8 * size)) - 1)).to_bytes(size, "little")
+            self._store(address, data, step)
+
+        uc.hook_add(UC_HOOK_MEM_WRITE, hook_mem_write, None, self.base, self.end - 1)
+
+    # `insns` are the addresses of the block instructions that run without
+    # the code hook, after `first_step`; None once every step is hooked.
+    def enter_block(self, first_step: int, insns: Optional[List[int]]) -> None:
+        if insns is None:
+            self._block_steps = None
+        else:
+            self._block_steps = {addr: first_step + i for i, addr in enumerate(insns, 1)}
+
+    # Writes done through the API (e.g. emulated read()) bypass the hook.
+    # They come from syscalls and stub traps, which end their block, so
+    # `step` is already theirs.
+    def write(self, address: int, data: bytes) -> None:
+        start = max(address, self.base)
+        stop = min(address + len(data), self.end)
+        if start < stop:
+            self._store(start, data[start - address : stop - address], self.step)
+
+    def _store(self, address: int, data: bytes, step: int) -> None:
+        offset = address - self.base
+        size = min(len(data), len(self._shadow) - offset)
+        if offset < 0 or size <= 0:
             return
-        step_counter += 1
+        self._shadow[offset : offset + size] = data[:size]
+        self._mark(address, size, step)
+
+    def _mark(self, address: int, size: int, step: int) -> None:
+        ws = self.word_size
+        for word in range(address - address % ws, address + size, ws):
+            self._written_at[word] = step
+        if self._view_sp is not None:
+            view_end = self._view_sp + self.entries * ws
+            if address < view_end and address + size > self._view_sp:
+                self._dirty = True
+
+    def covers(self, sp: int) -> bool:
+        return self.base <= sp and sp + self.entries * self.word_size <= self.end
+
+    # Word values and last-write steps for the window at `sp` (caller
+    # checks covers(sp) first).
+    def words(self, uc: Uc, sp: int) -> Tuple[List[int], List[Optional[int]]]:
+        if sp == self._view_sp and not self._dirty:
+            self.reused += 1
+            return self._words
+        if self._stale:
+            for address, size in self._stale:
+                offset = address - self.base
+                self._shadow[offset : offset + size] = uc.mem_read(address, size)
+            self._stale = []
+        self.built += 1
+        ws = self.word_size
+        offset = sp - self.base
+        values = []
+        written_at = []
+        for i in range(self.entries):
+            addr = sp + i * ws
+            chunk = self._shadow[offset + i * ws : offset + (i + 1) * ws]
+            written = self._written_at.get(addr - addr % ws)
+            if addr % ws:
+                later = self._written_at.get(addr - addr % ws + ws)
+                if later is not None and (written is None or later > written):
+                    written = later
+            values.append(int.from_bytes(chunk, "little"))
+            written_at.append(written)
+        self._view_sp = sp
+        self._words = (values, written_at)
+        self._view = None
+        self._dirty = False
+        return self._words
+
+    # Stack items (v1 layout) for the window at `sp`.
+    def view(self, uc: Uc, sp: int) -> List[dict]:
+        values, written_at = self.words(uc, sp)
+        if self._view is None:
+            ws = self.word_size
+            self._view = [
+                {
+                    "id": i,
+                    "addr": hex(sp + i * ws),
+                    "pos": i * ws,
+                    "size": ws,
+                    "value": hex(value),
+                    "written_at": written,
+                }
+                for i, (value, written) in enumerate(zip(values, written_at))
+            ]
+        return self._view
+
+    def stats(self) -> dict:
+        return {"built": self.built, "reused": self.reused}
+
+
+# Index of each register in the CPU state's GPR block (regs[16] then the
+# instruction pointer, 64-bit slots in both modes).
+_GPR_SLOTS = {
+    "rax": 0, "rcx": 1, "rdx": 2, "rbx": 3, "rsp": 4, "rbp": 5, "rsi": 6, "rdi": 7,
+    "r8": 8, "r9": 9, "r10": 10, "r11": 11, "r12": 12, "r13": 13, "r14": 14, "r15": 15,
+    "rip": 16,
+    "eax": 0, "ecx": 1, "edx": 2, "ebx": 3, "esp": 4, "ebp": 5, "esi": 6, "edi": 7, "eip": 16,
+}
+_GPR_BLOCK = struct.Struct("<17Q")
+
+
+# Offset of the GPR block inside a saved context for this mode, found by
+# writing marker values on a scratch engine (None if the layout does not
+# match, e.g. another Unicorn build).
+@functools.lru_cache(maxsize=None)
+def _context_gpr_offset(arch_bits: int) -> Optional[int]:
+    reg_order = REG_ORDER_64 if arch_bits == 64 else REG_ORDER_32
+    uc = Uc(UC_ARCH_X86, UC_MODE_64 if arch_bits == 64 else UC_MODE_32)
+    markers = {}
+    for idx, (name, reg_id) in enumerate(reg_order):
+        markers[name] = 0x5A5A0000 + idx * 0x101
+        uc.reg_write(reg_id, markers[name])
+    blob = bytes(uc.context_save())
+    first = markers[reg_order[0][0]].to_bytes(8, "little")
+    offset = blob.find(first) - _GPR_SLOTS[reg_order[0][0]] * 8
+    if offset < 0 or offset + _GPR_BLOCK.size > len(blob):
+        return None
+    slots = _GPR_BLOCK.unpack_from(blob, offset)
+    if any(slots[_GPR_SLOTS[name]] != value for name, value in markers.items()):
+        return None
+    return offset
+
+
+# Register capture for snapshots. A captured step costs one context save
+# into a reused context plus one copy of the packed GPR block, instead of a
+# reg_read per register; the block is unpacked when the chunk is handed
+# out. Falls back to reg_read when the context layout is not recognised.
+class RegisterCapture:
+    def __init__(self, uc: Uc, arch_bits: int, reg_order: List[tuple]) -> None:
+        self.reg_order = reg_order
+        self._mask = (1 << arch_bits) - 1
+        self._slots = [_GPR_SLOTS[name] for name, _reg_id in reg_order]
+        self._sp_slot = _GPR_SLOTS["rsp"]
+        self._sp_index = [name for name, _reg_id in reg_order].index("rsp" if arch_bits == 64 else "esp")
+        offset = _context_gpr_offset(arch_bits)
+        self.bulk = offset is not None
+        if self.bulk:
+            self._context = uc.context_save()
+            self._address = self._context.context.value + offset
+
+    # Packed register state of the current step.
+    def grab(self, uc: Uc) -> object:
+        if self.bulk:
+            uc.context_update(self._context)
+            return ctypes.string_at(self._address, _GPR_BLOCK.size)
+        return [uc.reg_read(reg_id) for _name, reg_id in self.reg_order]
+
+    def sp(self, block: object) -> int:
+        if self.bulk:
+            slot = self._sp_slot * 8
+            return int.from_bytes(block[slot : slot + 8], "little") & self._mask
+        return block[self._sp_index]
+
+    # Register values in reg_order.
+    def decode(self, block: object) -> List[int]:
+        if not self.bulk:
+            return block
+        slots = _GPR_BLOCK.unpack(block)
+        mask = self._mask
+        return [slots[slot] & mask for slot in self._slots]
+
+    # Register items in the v1 snapshot layout.
+    def items(self, block: object) -> List[dict]:
+        return [
+            {"name": name, "value": hex(value), "pos": idx}
+            for idx, ((name, _reg_id), value) in enumerate(zip(self.reg_order, self.decode(block)))
+        ]
+
+
+# Snapshots are handed out in chunks of this many steps while emulating.
+STREAM_CHUNK_STEPS = 512
+
+
+# Resolved --trace-from/--trace-until/--trace-range as runtime addresses.
+# Ranges are half-open; no ranges means "everything once tracing started".
+@dataclass
+class _TraceWindow:
+    start: Optional[int] = None
+    until: Optional[int] = None
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
 
-        instr_bytes = bytes(uc_engine.mem_read(addr, size)) if size > 0 else b""
-        instr_text = _format_instr(instr_bytes, addr, config.arch_bits)
+    @property
+    def active(self) -> bool:
+        return self.start is not None or self.until is not None or bool(self.ranges)
 
-        regs = []
-        for idx, (name, reg_id) in enumerate(reg_order):
-            value = uc_engine.reg_read(reg_id)
-            regs.append({"name": name, "value": hex(value), "pos": idx})
+    def contains(self, addr: int) -> bool:
+        if not self.ranges:
+            return True
+        return any(lo <= addr < hi for lo, hi in self.ranges)
 
-        sp_local = uc_engine.reg_read(sp_reg)
-        stack_items: List[dict] = []
-        try:
-            raw = bytes(
-                uc_engine.mem_read(sp_local, config.stack_entries * word_size)
-            )
-            for i in range(config.stack_entries):
-                chunk = raw[i * word_size : (i + 1) * word_size]
-                value = int.from_bytes(chunk, byteorder="little", signed=False)
-                stack_items.append(
-                    {
-                        "id": i,
-                        "addr": hex(sp_local + i * word_size),
-                        "pos": i * word_size,
-                        "size": word_size,
-                        "value": hex(value),
-                    }
-                )
-        except UcError:
-            pass
-
-        snapshots.append(
-            {
-                "step": step_counter,
-                "rip": hex(addr),
-                "rsp": hex(sp_local),
-                "instr": instr_text,
-                "stack": stack_items,
-                "registers": regs,
-            }
-        )
+    def to_meta(self, reached: bool) -> dict:
+        return {
+            "from": hex(self.start) if self.start is not None else None,
+            "until": hex(self.until) if self.until is not None else None,
+            "ranges": [[hex(lo), hex(hi)] for lo, hi in self.ranges],
+            "reached": reached,
+        }
 
-    uc.hook_add(UC_HOOK_CODE, hook_code)
-    uc.hook_add(UC_HOOK_INTR, hook_intr)
-    uc.hook_add(UC_HOOK_INSN, hook_syscall, None, 1, 0, UC_X86_INS_SYSCALL)
 
-    try:
-        uc.emu_start(config.base, config.base + len(code_bytes))
-    except UcError as exc:
-        error = str(exc)
+# Loaded emulator plus the addresses needed to run it.
+@dataclass
+class _TraceSession:
+    uc: Uc
+    config: TraceConfig
+    start_addr: int
+    end_addr: int
+    code_ranges: List[Tuple[int, int]]
+    # Loader-specific meta fields (base, ELF info, ...).
+    meta: dict
+    # Interpreter entry retried when the first fetch faults.
+    fallback_addr: Optional[int] = None
+    # Binary used for symbol/DWARF annotation (ELF only).
+    binary_path: Optional[str] = None
+    base_adjust: int = 0
+    # Config as requested (before loader adjustments) and the file it was
+    # loaded from; needed to rebuild the session for replay.
+    requested: Optional[TraceConfig] = None
+    source_path: Optional[str] = None
+    # Import stubs installed by the ELF loader (--libc-stubs).
+    stubs: Optional[LibcStubs] = None
+    cache: Optional[ArtifactCache] = None
+    profiler: Optional[TraceProfiler] = None
+
+
+class TraceStream:
+    """Iterates snapshots while Unicorn runs; `meta` is final after iteration."""
+
+    # `debug_info`, when given, is loaded elsewhere (a pipeline stage) and
+    # only needs a result() returning load_debug_info()'s tuple.
+    def __init__(self, session: _TraceSession, debug_info=None) -> None:
+        self._session = session
+        self._window = _resolve_window(session)
+        self._capture = CapturePolicy.parse(
+            session.config.capture, lambda spec: _resolve_range(spec, session)
+        )
+        self._started = False
+        self._debug_info = debug_info
+        self._debug_loaded = False
+        self._addr_cache: Dict[object, Optional[Dict[str, object]]] = {}
+        # False: snapshots come out without file/line/func; call annotate()
+        # on the collected list instead.
+        self.annotate_inline = True
+        self.meta: dict = {}
+
+    # Effective config (after loader adjustments such as ELF bitness).
+    @property
+    def config(self) -> TraceConfig:
+        return self._session.config
+
+    @property
+    def word_size(self) -> int:
+        return 8 if self._session.config.arch_bits == 64 else 4
+
+    # Snapshot layout produced (delta-encoded traces are built from v1).
+    @property
+    def schema(self) -> int:
+        config = self._session.config
+        return SCHEMA_V2 if config.schema == SCHEMA_V2 and config.delta_keyframes <= 0 else SCHEMA_V1
+
+    @property
+    def profiler(self) -> TraceProfiler:
+        return self._session.profiler or TraceProfiler.disabled()
+
+    @property
+    def reg_names(self) -> List[str]:
+        return [name for name, _reg_id in _get_reg_order(self._session.config)]
+
+    def __iter__(self) -> Iterator[dict]:
+        if self._started:
+            raise RuntimeError("TraceStream can only be iterated once")
+        self._started = True
+        if self.annotate_inline:
+            self._load_debug_info()
+        for chunk in self._emulate():
+            if self.annotate_inline:
+                self.annotate(chunk)
+            yield from chunk
+
+    # (symbols, lines) for annotation, or None for raw blobs.
+    def _load_debug_info(self) -> Optional[Tuple[SymbolIndex, DwarfInfo]]:
+        if not self._debug_loaded:
+            binary_path = self._session.binary_path
+            if self._debug_info is not None:
+                info = self._debug_info.result()
+                self._debug_info = info if binary_path else None
+            elif binary_path:
+                with self.profiler.phase("debug_info"):
+                    self._debug_info = load_debug_info(binary_path, self._session.cache)
+            self._debug_loaded = True
+        return self._debug_info
+
+    # Fill file/line/func on snapshots of this trace.
+    def annotate(self, snapshots: List[dict]) -> None:
+        info = self._load_debug_info()
+        if info is not None:
+            with self.profiler.phase("annotate"):
+                _annotate_snapshots(snapshots, self._session.base_adjust, self._addr_cache, *info)
+
+    def _checkpoint_writer(self) -> Optional[CheckpointWriter]:
+        session = self._session
+        config = session.config
+        if config.checkpoint_interval <= 0:
+            return None
+        if not config.checkpoint_path:
+            raise ValueError("checkpoint_interval needs a checkpoint_path")
+        if session.requested is None or not session.source_path:
+            raise ValueError("Checkpoints need the traced binary path (use trace_iter)")
+        if self._window.ranges:
+            # Replay re-executes every instruction; rdtsc outside the ranges
+            # would go unrecorded.
+            raise ValueError("Checkpoints cannot be combined with --trace-range")
+        with open(session.source_path, "rb") as handle:
+            digest = hashlib.sha256(handle.read()).hexdigest()
+        header = {
+            "binary": os.path.abspath(session.source_path),
+            # Path as given to the loader; it ends up in argv[0] on the stack.
+            "binary_arg": session.source_path,
+            "sha256": digest,
+            "config": config_to_dict(session.requested),
+            "arch_bits": config.arch_bits,
+        }
+        return CheckpointWriter(config.checkpoint_path, config.checkpoint_interval, header)
+
+    # Run the emulator, pausing every STREAM_CHUNK_STEPS to hand out snapshots.
+    def _emulate(self) -> Iterator[List[dict]]:
+        session = self._session
+        uc = session.uc
+        config = session.config
+
+        decoder = DecodeEngine(config.arch_bits)
+        decoder.attach(uc, session.code_ranges)
+        calls = CallTracker(
+            8 if config.arch_bits == 64 else 4,
+            (config.stack_base, config.stack_base + config.stack_size),
+        )
 
-    return {
-        "snapshots": snapshots,
-        "meta": {
+        stacks = StackTracker(
+            uc,
+            config.stack_base,
+            config.stack_size,
+            8 if config.arch_bits == 64 else 4,
+            config.stack_entries,
+        )
+        stacks.attach(uc)
+        registers = RegisterCapture(uc, config.arch_bits, _get_reg_order(config))
+        recorder = self._checkpoint_writer()
+        window = self._window
+        capture = self._capture
+        pending: List[dict] = []
+        paused = False
+        # All executed instructions; `traced` counts the instrumented ones
+        # and `captured` those that produced a snapshot.
+        step_counter = 0
+        traced = 0
+        captured = 0
+        outside_steps = 0
+        outside_exhausted = False
+        stack_written = False
+        tsc_step = 0
+        tsc_regs = (
+            [("rax", UC_X86_REG_RAX), ("rdx", UC_X86_REG_RDX), ("rcx", UC_X86_REG_RCX)]
+            if config.arch_bits == 64
+            else [("eax", UC_X86_REG_EAX), ("edx", UC_X86_REG_EDX), ("ecx", UC_X86_REG_ECX)]
+        )
+        tracing = window.start is None
+        error: Optional[str] = None
+        pc_reg, sp_reg = _get_pc_sp(config)
+        reg_order = _get_reg_order(config)
+        word_size = 8 if config.arch_bits == 64 else 4
+        compact = self.schema == SCHEMA_V2
+        profiler = self.profiler
+        timed = profiler.enabled
+        hook_times = profiler.hook
+        clock = time.perf_counter
+        feed = StdinFeed(config.stdin_data)
+        stubs = session.stubs
+
+        # API writes bypass UC_HOOK_MEM_WRITE; keep the stack views in sync
+        # and flag stack-window writes here.
+        def note_write(addr: int, data: bytes) -> None:
+            nonlocal stack_written
+            stacks.write(addr, data)
+            if recorder is not None:
+                recorder.mark(addr, len(data))
+            sp_now = uc.reg_read(sp_reg)
+            if addr < sp_now + config.stack_entries * word_size and addr + len(data) > sp_now - word_size:
+                stack_written = True
+
+        # Minimal read(0, buf, count) emulation using --stdin bytes.
+        def handle_read_syscall(uc_engine: Uc, fd: int, buf: int, count: int) -> int:
+            if fd != 0:
+                if recorder is not None:
+                    recorder.log_read(step_counter, fd, buf, b"", -1)
+                return -1
+            pending_data = feed.peek(count)
+            copied = 0
+            # Copy page by page and stop at the first unmapped page, like the
+            # kernel does; an oversized (e.g. cyclic) input must not abort the trace.
+            while copied < len(pending_data):
+                page_left = PAGE_SIZE - ((buf + copied) % PAGE_SIZE)
+                chunk = pending_data[copied : copied + page_left]
+                try:
+                    uc_engine.mem_write(buf + copied, chunk)
+                except UcError:
+                    break
+                copied += len(chunk)
+            if pending_data and copied == 0:
+                if recorder is not None:
+                    recorder.log_read(step_counter, fd, buf, b"", -14)
+                return -14  # -EFAULT
+            if recorder is not None:
+                recorder.log_read(step_counter, fd, buf, pending_data[:copied], copied)
+            feed.advance(copied)
+            note_write(buf, pending_data[:copied])
+            return copied
+
+        # 32-bit syscall entry via int 0x80.
+        def hook_intr(uc_engine: Uc, intno: int, _user_data: object) -> None:
+            if config.arch_bits != 32:
+                return
+            if intno != 0x80:
+                return
+            syscall_no = uc_engine.reg_read(UC_X86_REG_EAX)
+            if syscall_no == 3:  # sys_read
+                fd = uc_engine.reg_read(UC_X86_REG_EBX)
+                buf = uc_engine.reg_read(UC_X86_REG_ECX)
+                count = uc_engine.reg_read(UC_X86_REG_EDX)
+                result = handle_read_syscall(uc_engine, fd, buf, count)
+                uc_engine.reg_write(UC_X86_REG_EAX, result)
+                # EIP already points past "int 0x80" when the hook runs.
+
+        # 64-bit syscall entry via syscall instruction.
+        def hook_syscall(uc_engine: Uc, _user_data: object) -> None:
+            if config.arch_bits != 64:
+                return
+            syscall_no = uc_engine.reg_read(UC_X86_REG_RAX)
+            if syscall_no == 0:  # sys_read
+                fd = uc_engine.reg_read(UC_X86_REG_RDI)
+                buf = uc_engine.reg_read(UC_X86_REG_RSI)
+                count = uc_engine.reg_read(UC_X86_REG_RDX)
+                result = handle_read_syscall(uc_engine, fd, buf, count)
+                uc_engine.reg_write(UC_X86_REG_RAX, result)
+
+        # Count instructions that run outside the window without a code hook;
+        # stop once they exceed max_outside_steps.
+        def hook_block(uc_engine: Uc, addr: int, size: int, _user_data: object) -> None:
+            nonlocal step_counter, outside_steps, outside_exhausted
+            insns = decoder.block(uc_engine, addr, size)
+            if tracing:
+                insns = [insn for insn in insns if not window.contains(insn)]
+            elif window.start is not None and addr <= window.start < addr + size:
+                # Emulation stops at the window start, mid-block.
+                insns = [insn for insn in insns if insn < window.start]
+            stacks.enter_block(step_counter, insns)
+            count = len(insns)
+            step_counter += count
+            outside_steps += count
+            stacks.step = step_counter
+            if outside_steps > config.max_outside_steps:
+                outside_exhausted = True
+                uc_engine.emu_stop()
+
+        # Flag writes into the captured stack window for on:stack-write.
+        def hook_stack_write(
+            uc_engine: Uc, _access: int, address: int, _size: int, _value: int, _user_data: object
+        ) -> None:
+            nonlocal stack_written
+            sp_now = uc_engine.reg_read(sp_reg)
+            if sp_now - word_size <= address < sp_now + config.stack_entries * word_size:
+                stack_written = True
+
+        def hook_code(uc_engine: Uc, addr: int, size: int, _user_data: object) -> None:
+            nonlocal step_counter, traced, captured, paused, stack_written, tsc_step
+            if traced >= config.max_steps:
+                uc_engine.emu_stop()
+                return
+            if len(pending) >= STREAM_CHUNK_STEPS:
+                # Stopping here does not execute the instruction; it is
+                # traced again when emulation resumes at the same pc.
+                paused = True
+                uc_engine.emu_stop()
+                return
+            step_counter += 1
+            traced += 1
+            stacks.step = step_counter
+            if recorder is not None:
+                if tsc_step:
+                    # rdtsc has run; its host-dependent result is replay input.
+                    values = {name: uc_engine.reg_read(reg_id) for name, reg_id in tsc_regs}
+                    recorder.log_tsc(tsc_step, values)
+                    tsc_step = 0
+                if recorder.due(step_counter):
+                    recorder.checkpoint(
+                        uc_engine,
+                        step_counter,
+                        feed.pos,
+                        stubs.state() if stubs is not None else None,
+                    )
+
+            if timed:
+                started = clock()
+            instr_bytes = bytes(uc_engine.mem_read(addr, size)) if size > 0 else b""
+            instr_text = decoder.format(instr_bytes, addr)
+            if timed:
+                hook_times["decode"] += clock() - started
+            if recorder is not None and instr_text.startswith("rdtsc"):
+                tsc_step = step_counter
+            frame, hijack = calls.on_step(uc_engine, step_counter, addr, size, instr_text)
+
+            wrote, stack_written = stack_written, False
+            if hijack is None and not capture.wants(step_counter, addr, instr_text, wrote):
+                return
+            CallTracker.note_snapshot(frame, captured)
+            captured += 1
+
+            if timed:
+                started = clock()
+            reg_block = registers.grab(uc_engine)
+            if timed:
+                split = clock()
+                hook_times["registers"] += split - started
+                started = split
+            sp_local = registers.sp(reg_block)
+            if compact:
+                if stacks.covers(sp_local):
+                    values, written_at = stacks.words(uc_engine, sp_local)
+                else:
+                    # sp left the stack mapping (pivot): read the window directly.
+                    values, written_at = [], []
+                    try:
+                        raw = bytes(uc_engine.mem_read(sp_local, config.stack_entries * word_size))
+                        values = [
+                            int.from_bytes(raw[i : i + word_size], "little")
+                            for i in range(0, len(raw), word_size)
+                        ]
+                        written_at = [None] * len(values)
+                    except UcError:
+                        pass
+                if timed:
+                    split = clock()
+                    hook_times["stack"] += split - started
+                    started = split
+                pending.append(
+                    {
+                        "step": step_counter,
+                        "rip": addr,
+                        "rsp": sp_local,
+                        "instr": instr_text,
+                        "regs": reg_block,
+                        "stack_base": sp_local,
+                        "stack": values,
+                        "written": written_at,
+                        "frame": frame["id"],
+                        "depth": frame["depth"],
+                    }
+                )
+            else:
+                if stacks.covers(sp_local):
+                    stack_items = stacks.view(uc_engine, sp_local)
+                else:
+                    # sp left the stack mapping (pivot): read the window directly.
+                    stack_items = []
+                    try:
+                        raw = bytes(
+                            uc_engine.mem_read(sp_local, config.stack_entries * word_size)
+                        )
+                        for i in range(config.stack_entries):
+                            chunk = raw[i * word_size : (i + 1) * word_size]
+                            value = int.from_bytes(chunk, byteorder="little", signed=False)
+                            stack_items.append(
+                                {
+                                    "id": i,
+                                    "addr": hex(sp_local + i * word_size),
+                                    "pos": i * word_size,
+                                    "size": word_size,
+                                    "value": hex(value),
+                                    "written_at": None,
+                                }
+                            )
+                    except UcError:
+                        pass
+
+                if timed:
+                    split = clock()
+                    hook_times["stack"] += split - started
+                    started = split
+                pending.append(
+                    {
+                        "step": step_counter,
+                        "rip": hex(addr),
+                        "rsp": hex(sp_local),
+                        "instr": instr_text,
+                        "stack": stack_items,
+                        "registers": reg_block,
+                        "frame": frame["id"],
+                        "depth": frame["depth"],
+                    }
+                )
+            if timed:
+                hook_times["snapshot"] += clock() - started
+            if hijack is not None and config.cyclic_length > 0:
+                # Control flow is pattern-driven from here on; nothing left to learn.
+                uc_engine.emu_stop()
+
+        # Outside the window only blocks are hooked so Unicorn runs at full
+        # speed; the code hook is limited to the trace ranges.
+        def start_tracing() -> None:
+            if window.ranges:
+                for lo, hi in window.ranges:
+                    uc.hook_add(UC_HOOK_CODE, hook_code, None, lo, hi - 1)
+            else:
+                uc.hook_add(UC_HOOK_CODE, hook_code)
+                if block_hook is not None:
+                    uc.hook_del(block_hook)
+                    stacks.enter_block(step_counter, None)
+
+        uc.hook_add(UC_HOOK_INTR, hook_intr)
+        uc.hook_add(UC_HOOK_INSN, hook_syscall, None, 1, 0, UC_X86_INS_SYSCALL)
+        if stubs is not None:
+            # main entered by __libc_start_main runs from the next step.
+            stubs.attach(
+                uc,
+                feed,
+                note_write,
+                lambda: step_counter,
+                lambda slot, target, return_to: calls.push_frame(step_counter + 1, target, slot, return_to),
+            )
+        if capture.wants_stack_writes:
+            uc.hook_add(
+                UC_HOOK_MEM_WRITE,
+                hook_stack_write,
+                None,
+                config.stack_base,
+                config.stack_base + config.stack_size - 1,
+            )
+        block_hook = None
+        if window.start is not None or window.ranges:
+            block_hook = uc.hook_add(UC_HOOK_BLOCK, hook_block)
+        if tracing:
+            start_tracing()
+
+        if recorder is not None:
+            recorder.start(uc)
+
+        stop_addr = window.until if window.until is not None else session.end_addr
+        addr = session.start_addr
+        fallback_addr = session.fallback_addr
+        while True:
+            paused = False
+            try:
+                with profiler.phase("emulate"):
+                    uc.emu_start(addr, stop_addr if tracing else window.start)
+            except UcError as exc:
+                error = str(exc)
+                if (
+                    fallback_addr is not None
+                    and step_counter == 0
+                    and "UC_ERR_FETCH_UNMAPPED" in error
+                ):
+                    addr = fallback_addr
+                    fallback_addr = None
+                    error = None
+                    continue
+            if pending:
+                # Registers are unpacked here, once per chunk.
+                with profiler.phase("registers"):
+                    if compact:
+                        for snap in pending:
+                            snap["regs"] = registers.decode(snap["regs"])
+                    else:
+                        for snap in pending:
+                            snap["registers"] = registers.items(snap["registers"])
+                yield pending
+                pending = []
+            if error is None and stubs is not None:
+                error = stubs.fault
+            if error is None and outside_exhausted:
+                error = f"Stopped after {outside_steps} steps outside the trace window (--max-outside-steps)"
+            if error is not None:
+                break
+            addr = uc.reg_read(pc_reg)
+            if not tracing:
+                if addr != window.start:
+                    break
+                tracing = True
+                start_tracing()
+                continue
+            if not paused:
+                break
+
+        reached = tracing and (not window.ranges or traced > 0)
+        if error is None and window.active and not reached:
+            error = "Trace window never reached"
+        overwritten = calls.overwritten_slots(uc)
+        self.meta = {
             "steps": step_counter,
+            "steps_traced": traced,
+            "steps_outside": outside_steps,
+            "steps_captured": captured,
             "error": error,
-            "base": hex(config.base),
-            "stack_base": hex(config.stack_base),
-            "stack_size": config.stack_size,
-            "arch_bits": config.arch_bits,
+            **session.meta,
             "word_size": word_size,
             "buffer_offset": config.buffer_offset,
             "buffer_size": config.buffer_size,
             "stdin_len": len(config.stdin_data),
-        },
-    }
-
-
-def _read_u16(data: bytes, offset: int) -> int:
-    return int.from_bytes(data[offset : offset + 2], "little")
+            "decode_cache": decoder.stats(),
+            "stack_views": stacks.stats(),
+            "register_capture": "context" if registers.bulk else "reg_read",
+            "ret_overwritten": calls.hijack is not None or bool(overwritten),
+            "ret_hijack": calls.hijack,
+            "ret_slots_overwritten": overwritten,
+            "call_tree": calls.to_meta(step_counter),
+        }
+        if compact:
+            self.meta["schema"] = SCHEMA_V2
+            self.meta["registers"] = self.reg_names
+        if window.active:
+            self.meta["trace_window"] = window.to_meta(reached)
+        if not capture.captures_all:
+            self.meta["capture"] = list(capture.specs)
+        if recorder is not None:
+            self.meta["checkpoints"] = recorder.close()
+        if stubs is not None:
+            self.meta["libc_stubs"] = stubs.meta()
+        if session.cache is not None:
+            self.meta["cache"] = session.cache.stats()
+        if timed:
+            self.meta["profile"] = profiler.report(step_counter)
+        if config.cyclic_length > 0:
+            self.meta["overflow"] = analyze_overflow(
+                cyclic(config.cyclic_length, word_size),
+                word_size,
+                calls.hijack,
+                [(name, uc.reg_read(reg_id)) for name, reg_id in reg_order],
+                "rbp" if config.arch_bits == 64 else "ebp",
+            )
 
 
-def _read_u32(data: bytes, offset: int) -> int:
-    return int.from_bytes(data[offset : offset + 4], "little")
+def _collect(stream: TraceStream) -> Dict[str, object]:
+    snapshots = list(stream)
+    return {"snapshots": snapshots, "meta": stream.meta}
 
 
-def _read_u64(data: bytes, offset: int) -> int:
-    return int.from_bytes(data[offset : offset + 8], "little")
+def _prepare_raw(code_bytes: bytes, config: TraceConfig) -> _TraceSession:
+    if config.arch_bits == 32 and config.stack_base > 0xFFFFFFFF:
+        config = replace(config, stack_base=0xBFF00000)
+    config = _with_cyclic(config)
+    mode = UC_MODE_64 if config.arch_bits == 64 else UC_MODE_32
+    uc = Uc(UC_ARCH_X86, mode)
 
+    code_size = _align_up(len(code_bytes), 0x1000)
+    uc.mem_map(config.base, code_size, UC_PROT_ALL)
+    uc.mem_write(config.base, code_bytes)
 
-def _parse_elf_header(blob: bytes) -> dict:
-    if len(blob) < 16 or blob[:4] != b"\x7fELF":
-        raise ValueError("Not an ELF file")
-    elf_class = blob[4]
-    endian = blob[5]
-    if endian != 1:
-        raise ValueError("Only little-endian ELF supported")
+    _init_stack(uc, config)
 
-    if elf_class == 1:
-        e_type = _read_u16(blob, 16)
-        e_machine = _read_u16(blob, 18)
-        e_entry = _read_u32(blob, 24)
-        e_phoff = _read_u32(blob, 28)
-        e_phentsize = _read_u16(blob, 42)
-        e_phnum = _read_u16(blob, 44)
-        return {
-            "class": 32,
-            "type": e_type,
-            "machine": e_machine,
-            "entry": e_entry,
-            "phoff": e_phoff,
-            "phentsize": e_phentsize,
-            "phnum": e_phnum,
-        }
-    if elf_class == 2:
-        e_type = _read_u16(blob, 16)
-        e_machine = _read_u16(blob, 18)
-        e_entry = _read_u64(blob, 24)
-        e_phoff = _read_u64(blob, 32)
-        e_phentsize = _read_u16(blob, 54)
-        e_phnum = _read_u16(blob, 56)
-        return {
-            "class": 64,
-            "type": e_type,
-            "machine": e_machine,
-            "entry": e_entry,
-            "phoff": e_phoff,
-            "phentsize": e_phentsize,
-            "phnum": e_phnum,
-        }
-    raise ValueError("Unsupported ELF class")
-
-
-def _parse_program_headers(blob: bytes, header: dict) -> List[dict]:
-    phoff = header["phoff"]
-    phentsize = header["phentsize"]
-    phnum = header["phnum"]
-    entries = []
-
-    for idx in range(phnum):
-        offset = phoff + idx * phentsize
-        if header["class"] == 32:
-            p_type = _read_u32(blob, offset)
-            p_offset = _read_u32(blob, offset + 4)
-            p_vaddr = _read_u32(blob, offset + 8)
-            p_paddr = _read_u32(blob, offset + 12)
-            p_filesz = _read_u32(blob, offset + 16)
-            p_memsz = _read_u32(blob, offset + 20)
-            p_flags = _read_u32(blob, offset + 24)
-            p_align = _read_u32(blob, offset + 28)
-        else:
-            p_type = _read_u32(blob, offset)
-            p_flags = _read_u32(blob, offset + 4)
-            p_offset = _read_u64(blob, offset + 8)
-            p_vaddr = _read_u64(blob, offset + 16)
-            p_paddr = _read_u64(blob, offset + 24)
-            p_filesz = _read_u64(blob, offset + 32)
-            p_memsz = _read_u64(blob, offset + 40)
-            p_align = _read_u64(blob, offset + 48)
-
-        entries.append(
-            {
-                "type": p_type,
-                "offset": p_offset,
-                "vaddr": p_vaddr,
-                "paddr": p_paddr,
-                "filesz": p_filesz,
-                "memsz": p_memsz,
-                "flags": p_flags,
-                "align": p_align,
-            }
-        )
-    return entries
+    return _TraceSession(
+        uc=uc,
+        config=config,
+        start_addr=config.base,
+        end_addr=config.base + len(code_bytes),
+        code_ranges=[(config.base, config.base + code_size)],
+        meta={
+            "base": hex(config.base),
+            "stack_base": hex(config.stack_base),
+            "stack_size": config.stack_size,
+            "arch_bits": config.arch_bits,
+        },
+    )
 
 
-def _read_c_string(blob: bytes, offset: int) -> str:
-    end = blob.find(b"\x00", offset)
-    if end == -1:
-        end = len(blob)
-    return blob[offset:end].decode("utf-8", errors="replace")
+# Trace a raw code blob (no ELF parsing).
+def trace_raw(code_bytes: bytes, config: TraceConfig) -> Dict[str, object]:
+    return _collect(TraceStream(_prepare_raw(code_bytes, config)))
 
 
-# Build a Linux-like initial stack (argc/argv/envp/auxv).
+# Build a Linux-like initial stack (argc/argv/envp/auxv + strings).
+# Returns (sp, argv pointer, envp pointer); sp points at argc.
 def _build_initial_stack(
     uc: Uc,
     config: TraceConfig,
     argv: List[str],
     env: List[str],
     auxv: List[Tuple[int, int]],
-) -> int:
+) -> Tuple[int, int, int]:
     word_size = 8 if config.arch_bits == 64 else 4
     sp = config.stack_base + config.stack_size
 
@@ -435,29 +1401,72 @@ def _build_initial_stack(
         uc.mem_write(sp, data)
         return sp
 
-    def push_ptr(value: int) -> None:
-        nonlocal sp
-        sp -= word_size
+    def pack_ptr(value: int) -> bytes:
         masked = value & ((1 << (word_size * 8)) - 1)
-        uc.mem_write(sp, masked.to_bytes(word_size, "little", signed=False))
+        return masked.to_bytes(word_size, "little", signed=False)
+
+    env_ptrs = [push_bytes(item.encode("utf-8") + b"\x00") for item in reversed(env)][::-1]
+    argv_ptrs = [push_bytes(item.encode("utf-8") + b"\x00") for item in reversed(argv)][::-1]
+    random_ptr = push_bytes(bytes(range(16)))  # AT_RANDOM bytes (fixed for reproducibility)
+    auxv = list(auxv) + [(25, random_ptr)]  # AT_RANDOM
+    if argv_ptrs:
+        auxv.append((31, argv_ptrs[0]))  # AT_EXECFN
+
+    words = [len(argv_ptrs)]
+    words += argv_ptrs + [0]
+    words += env_ptrs + [0]
+    for key, value in auxv:
+        words += [key, value]
+    words += [0, 0]  # AT_NULL
 
-    push_ptr(0)  # envp terminator
-    push_ptr(0)  # argv terminator
-    push_ptr(1)  # argc
+    sp &= ~0xF
+    sp -= len(words) * word_size
+    sp &= ~0xF
+    uc.mem_write(sp, b"".join(pack_ptr(word) for word in words))
+    argv_addr = sp + word_size
+    envp_addr = argv_addr + (len(argv_ptrs) + 1) * word_size
+    return sp, argv_addr, envp_addr
 
-    for key, value in auxv:
-        push_ptr(key)
-        push_ptr(value)
-    push_ptr(0)
-    push_ptr(0)
 
-    sp &= ~(word_size - 1)
+# Enter a function as if called with (argc, argv, envp) and `return_addr`
+# (null by default), following the SysV calling convention for the bitness.
+def _setup_call_frame(
+    uc: Uc,
+    config: TraceConfig,
+    sp: int,
+    argc: int,
+    argv_addr: int,
+    envp_addr: int,
+    return_addr: int = 0,
+) -> int:
+    if config.arch_bits == 64:
+        uc.reg_write(UC_X86_REG_RDI, argc)
+        uc.reg_write(UC_X86_REG_RSI, argv_addr)
+        uc.reg_write(UC_X86_REG_RDX, envp_addr)
+        sp = (sp & ~0xF) - 8
+        uc.mem_write(sp, return_addr.to_bytes(8, "little"))
+        return sp
+    sp = (sp & ~0xF) - 4  # keep the argument block 16-byte aligned
+    args = [argc, argv_addr, envp_addr]
+    sp -= 4 * len(args) + 4
+    uc.mem_write(sp, b"".join(value.to_bytes(4, "little") for value in [return_addr] + args))
     return sp
 
 
-# Trace an ELF file (PT_LOAD + optional PT_INTERP).
-def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]) -> Dict[str, object]:
-    header = _parse_elf_header(code_bytes)
+# Load an ELF file (PT_LOAD + optional PT_INTERP) into a fresh emulator.
+# With config.libc_stubs a dynamic executable is linked against the Python
+# libc stubs instead and the interpreter is not mapped.
+def _prepare_elf(
+    code_bytes: bytes,
+    config: TraceConfig,
+    binary_path: Optional[str],
+    cache: Optional[ArtifactCache] = None,
+    profiler: Optional[TraceProfiler] = None,
+    argv0: Optional[str] = None,
+) -> _TraceSession:
+    cache = cache or open_cache(config)
+    profiler = profiler or TraceProfiler.disabled()
+    header, phdrs = _elf_layout(code_bytes, cache)
     if header["machine"] != 3 and header["machine"] != 62:
         raise ValueError("Only x86/x86_64 ELF supported")
 
@@ -469,10 +1478,10 @@ def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]
     is_pie = header["type"] == 3  # ET_DYN
     base = config.base if is_pie else 0
 
-    phdrs = _parse_program_headers(code_bytes, header)
     page_size = 0x1000
     interp_path = None
     phdr_vaddr = base + header["phoff"]
+    code_ranges: List[Tuple[int, int]] = []
 
     for ph in phdrs:
         if ph["type"] == 3:  # PT_INTERP
@@ -484,72 +1493,63 @@ def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]
         map_start = seg_start & ~(page_size - 1)
         map_end = _align_up(seg_end, page_size)
         uc.mem_map(map_start, map_end - map_start, UC_PROT_ALL)
+        if ph["flags"] & 1:  # PF_X
+            code_ranges.append((map_start, map_end))
         if ph["filesz"] > 0:
             data = code_bytes[ph["offset"] : ph["offset"] + ph["filesz"]]
             uc.mem_write(seg_start, data)
 
+    is_dynamic = any(ph["type"] == PT_DYNAMIC for ph in phdrs)
+    stubs = None
+    # Cyclic runs must get past the PLT to reach the vulnerable ret, so they
+    # use the stubs unless the interpreter is started explicitly.
+    use_stubs = config.libc_stubs or (config.cyclic_length > 0 and not config.start_interp)
+    if use_stubs and is_dynamic:
+        stubs = LibcStubs(uc, arch_bits)
+        stubs.link(code_bytes, base)
+
     interp_entry = None
     interp_base = None
-    if interp_path:
+    if interp_path and stubs is None:
         if not os.path.isabs(interp_path) and binary_path:
             candidate = os.path.join(os.path.dirname(binary_path), interp_path)
             if os.path.exists(candidate):
                 interp_path = candidate
         if os.path.exists(interp_path):
-            interp_blob = _load_code(interp_path)
-            interp_header = _parse_elf_header(interp_blob)
-            interp_phdrs = _parse_program_headers(interp_blob, interp_header)
-            interp_base = config.interp_base
-            if interp_header["type"] != 3:
-                interp_base = 0
-            for ph in interp_phdrs:
-                if ph["type"] != 1:
-                    continue
-                seg_start = interp_base + ph["vaddr"]
-                seg_end = seg_start + ph["memsz"]
-                map_start = seg_start & ~(page_size - 1)
-                map_end = _align_up(seg_end, page_size)
-                uc.mem_map(map_start, map_end - map_start, UC_PROT_ALL)
-                if ph["filesz"] > 0:
-                    data = interp_blob[ph["offset"] : ph["offset"] + ph["filesz"]]
-                    uc.mem_write(seg_start, data)
-            interp_entry = interp_base + interp_header["entry"]
+            with profiler.phase("load_interp"):
+                interp_blob = _load_interp(interp_path)
+                interp_header, interp_phdrs = _elf_layout(interp_blob, cache)
+                interp_base = config.interp_base
+                if interp_header["type"] != 3:
+                    interp_base = 0
+                for ph in interp_phdrs:
+                    if ph["type"] != 1:
+                        continue
+                    seg_start = interp_base + ph["vaddr"]
+                    seg_end = seg_start + ph["memsz"]
+                    map_start = seg_start & ~(page_size - 1)
+                    map_end = _align_up(seg_end, page_size)
+                    uc.mem_map(map_start, map_end - map_start, UC_PROT_ALL)
+                    if ph["flags"] & 1:  # PF_X
+                        code_ranges.append((map_start, map_end))
+                    if ph["filesz"] > 0:
+                        data = interp_blob[ph["offset"] : ph["offset"] + ph["filesz"]]
+                        uc.mem_write(seg_start, data)
+                interp_entry = interp_base + interp_header["entry"]
 
     effective_interp_base = config.interp_base
     if arch_bits == 32 and effective_interp_base > 0xFFFFFFFF:
         effective_interp_base = 0xF7000000
 
-    config = TraceConfig(
+    config = replace(
+        config,
         base=base + entry,
-        stack_base=config.stack_base,
-        stack_size=config.stack_size,
-        max_steps=config.max_steps,
-        stack_entries=config.stack_entries,
         arch_bits=arch_bits,
         interp_base=effective_interp_base,
-        start_interp=config.start_interp,
-        stdin_data=config.stdin_data,
-        buffer_offset=config.buffer_offset,
-        buffer_size=config.buffer_size,
-        start_symbol=config.start_symbol,
-        argv1=config.argv1,
     )
     if config.arch_bits == 32 and config.stack_base > 0xFFFFFFFF:
-        config = TraceConfig(
-            base=config.base,
-            stack_base=0xBFF00000,
-            stack_size=config.stack_size,
-            max_steps=config.max_steps,
-            stack_entries=config.stack_entries,
-            arch_bits=config.arch_bits,
-            interp_base=config.interp_base,
-            start_interp=config.start_interp,
-            stdin_data=config.stdin_data,
-            buffer_offset=config.buffer_offset,
-            buffer_size=config.buffer_size,
-            start_symbol=config.start_symbol,
-            argv1=config.argv1,
-        )
+        config = replace(config, stack_base=0xBFF00000)
+    config = _with_cyclic(config)
     _init_stack(uc, config)
     auxv = [
         (3, phdr_vaddr),  # AT_PHDR
@@ -563,116 +1563,10 @@ def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]
         auxv = [(k, interp_base if k == 7 else v) for k, v in auxv]
     else:
         auxv = [(k, 0 if k == 7 else v) for k, v in auxv]
-    argv0 = binary_path or "a.out"
-    argv = [argv0]
+    argv = [argv0 or binary_path or "a.out"]
     if config.argv1 is not None:
         argv.append(config.argv1)
-    sp = _build_initial_stack(uc, config, argv, [], auxv)
-    if config.arch_bits == 64:
-        uc.reg_write(UC_X86_REG_RSP, sp)
-    else:
-        uc.reg_write(UC_X86_REG_ESP, sp)
-
-    snapshots: List[dict] = []
-    step_counter = 0
-    error: Optional[str] = None
-    pc_reg, sp_reg = _get_pc_sp(config)
-    reg_order = _get_reg_order(config)
-    word_size = 8 if config.arch_bits == 64 else 4
-    stdin_pos = 0
-
-    # Minimal read(0, buf, count) emulation using --stdin bytes.
-    def handle_read_syscall(uc_engine: Uc, fd: int, buf: int, count: int) -> int:
-        nonlocal stdin_pos
-        if fd != 0:
-            return -1
-        remaining = len(config.stdin_data) - stdin_pos
-        to_copy = min(count, max(remaining, 0))
-        if to_copy > 0:
-            chunk = config.stdin_data[stdin_pos : stdin_pos + to_copy]
-            uc_engine.mem_write(buf, chunk)
-            stdin_pos += to_copy
-        return to_copy
-
-    # 32-bit syscall entry via int 0x80.
-    def hook_intr(uc_engine: Uc, intno: int, _user_data: object) -> None:
-        if config.arch_bits != 32:
-            return
-        if intno != 0x80:
-            return
-        syscall_no = uc_engine.reg_read(UC_X86_REG_EAX)
-        if syscall_no == 3:  # sys_read
-            fd = uc_engine.reg_read(UC_X86_REG_EBX)
-            buf = uc_engine.reg_read(UC_X86_REG_ECX)
-            count = uc_engine.reg_read(UC_X86_REG_EDX)
-            result = handle_read_syscall(uc_engine, fd, buf, count)
-            uc_engine.reg_write(UC_X86_REG_EAX, result)
-            eip = uc_engine.reg_read(UC_X86_REG_EIP)
-            uc_engine.reg_write(UC_X86_REG_EIP, eip + 2)
-
-    # 64-bit syscall entry via syscall instruction.
-    def hook_syscall(uc_engine: Uc, _user_data: object) -> None:
-        if config.arch_bits != 64:
-            return
-        syscall_no = uc_engine.reg_read(UC_X86_REG_RAX)
-        if syscall_no == 0:  # sys_read
-            fd = uc_engine.reg_read(UC_X86_REG_RDI)
-            buf = uc_engine.reg_read(UC_X86_REG_RSI)
-            count = uc_engine.reg_read(UC_X86_REG_RDX)
-            result = handle_read_syscall(uc_engine, fd, buf, count)
-            uc_engine.reg_write(UC_X86_REG_RAX, result)
-
-
-    def hook_code(uc_engine: Uc, addr: int, size: int, _user_data: object) -> None:
-        nonlocal step_counter
-        if step_counter >= config.max_steps:
-            uc_engine.emu_stop()
-            return
-        step_counter += 1
-
-        instr_bytes = bytes(uc_engine.mem_read(addr, size)) if size > 0 else b""
-        instr_text = _format_instr(instr_bytes, addr, config.arch_bits)
-
-        regs = []
-        for idx, (name, reg_id) in enumerate(reg_order):
-            value = uc_engine.reg_read(reg_id)
-            regs.append({"name": name, "value": hex(value), "pos": idx})
-
-        sp_local = uc_engine.reg_read(sp_reg)
-        stack_items: List[dict] = []
-        try:
-            raw = bytes(
-                uc_engine.mem_read(sp_local, config.stack_entries * word_size)
-            )
-            for i in range(config.stack_entries):
-                chunk = raw[i * word_size : (i + 1) * word_size]
-                value = int.from_bytes(chunk, byteorder="little", signed=False)
-                stack_items.append(
-                    {
-                        "id": i,
-                        "addr": hex(sp_local + i * word_size),
-                        "pos": i * word_size,
-                        "size": word_size,
-                        "value": hex(value),
-                    }
-                )
-        except UcError:
-            pass
-
-        snapshots.append(
-            {
-                "step": step_counter,
-                "rip": hex(addr),
-                "rsp": hex(sp_local),
-                "instr": instr_text,
-                "stack": stack_items,
-                "registers": regs,
-            }
-        )
-
-    uc.hook_add(UC_HOOK_CODE, hook_code)
-    uc.hook_add(UC_HOOK_INTR, hook_intr)
-    uc.hook_add(UC_HOOK_INSN, hook_syscall, None, 1, 0, UC_X86_INS_SYSCALL)
+    sp, argv_addr, envp_addr = _build_initial_stack(uc, config, argv, [], auxv)
 
     start_addr = config.base
     if binary_path and config.start_symbol:
@@ -680,46 +1574,29 @@ def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]
             binary_path,
             config.start_symbol,
             base if is_pie else 0,
+            cache,
         )
         if symbol_addr is not None:
             start_addr = symbol_addr
     if config.start_interp and interp_entry is not None:
         start_addr = interp_entry
+    elif start_addr != config.base:
+        # With stubs, returning from the start symbol exits cleanly.
+        return_addr = stubs.main_return if stubs is not None else 0
+        sp = _setup_call_frame(uc, config, sp, len(argv), argv_addr, envp_addr, return_addr)
+    if config.arch_bits == 64:
+        uc.reg_write(UC_X86_REG_RSP, sp)
+    else:
+        uc.reg_write(UC_X86_REG_ESP, sp)
     end_addr = 0xFFFFFFFF if config.arch_bits == 32 else 0xFFFFFFFFFFFFFFFF
-    try:
-        uc.emu_start(start_addr, end_addr)
-    except UcError as exc:
-        error = str(exc)
-        if (
-            not config.start_interp
-            and interp_entry is not None
-            and not snapshots
-            and "UC_ERR_FETCH_UNMAPPED" in error
-        ):
-            try:
-                uc.emu_start(interp_entry, end_addr)
-                error = None
-            except UcError as exc2:
-                error = str(exc2)
 
-    if binary_path and snapshots and shutil.which("addr2line"):
-        addr_map = _addr2line_map(
-            binary_path,
-            [snap["rip"] for snap in snapshots if "rip" in snap],
-            base if is_pie else 0,
-        )
-        for snap in snapshots:
-            info = addr_map.get(snap.get("rip"))
-            if info:
-                snap["file"] = info.get("file")
-                snap["line"] = info.get("line")
-                snap["func"] = info.get("func")
-
-    return {
-        "snapshots": snapshots,
-        "meta": {
-            "steps": step_counter,
-            "error": error,
+    return _TraceSession(
+        uc=uc,
+        config=config,
+        start_addr=start_addr,
+        end_addr=end_addr,
+        code_ranges=code_ranges,
+        meta={
             "base": hex(base),
             "stack_base": hex(config.stack_base),
             "stack_size": config.stack_size,
@@ -728,109 +1605,161 @@ def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]
             "elf_pie": is_pie,
             "elf_interp": interp_path,
             "elf_interp_started": bool(config.start_interp and interp_entry is not None),
-            "word_size": word_size,
-            "buffer_offset": config.buffer_offset,
-            "buffer_size": config.buffer_size,
-            "stdin_len": len(config.stdin_data),
+            "elf_libc_stubs": stubs is not None,
         },
-    }
+        fallback_addr=interp_entry if not config.start_interp else None,
+        binary_path=binary_path,
+        base_adjust=base if is_pie else 0,
+        stubs=stubs,
+        cache=cache,
+    )
 
 
-# Map runtime addresses to source file/line via addr2line.
-def _addr2line_map(
-    binary_path: str, addresses: List[str], base_adjust: int
-) -> Dict[str, Dict[str, object]]:
-    unique = []
-    seen = set()
-    for addr in addresses:
-        if not isinstance(addr, str) or not addr.startswith("0x"):
-            continue
-        if addr in seen:
+# Trace an ELF file (PT_LOAD + optional PT_INTERP).
+def trace_elf(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]) -> Dict[str, object]:
+    return _collect(TraceStream(_prepare_elf(code_bytes, config, binary_path)))
+
+
+# Fill file/line/func on a chunk of snapshots, resolving only new addresses.
+# DWARF gives file/line/function; the symbol index names functions in
+# binaries built without -g.
+def _annotate_snapshots(
+    snapshots: List[dict],
+    base_adjust: int,
+    cache: Dict[object, Optional[Dict[str, object]]],
+    symbols: SymbolIndex,
+    lines: DwarfInfo,
+) -> None:
+    for snap in snapshots:
+        addr = snap.get("rip")
+        if addr in cache or not isinstance(addr, (int, str)):
             continue
-        seen.add(addr)
-        unique.append(addr)
+        link_addr = (addr if isinstance(addr, int) else int(addr, 16)) - base_adjust
+        info = lines.lookup(link_addr)
+        if info is None or info["func"] is None:
+            func = symbols.function_at(link_addr)
+            if func is not None:
+                info = dict(info or {"file": None, "line": None})
+                info["func"] = func
+        cache[addr] = info
+    for snap in snapshots:
+        info = cache.get(snap.get("rip"))
+        if info:
+            snap["file"] = info.get("file")
+            snap["line"] = info.get("line")
+            snap["func"] = info.get("func")
+
+
+# Disk cache configured for a run (stats only when disabled).
+def open_cache(config: TraceConfig) -> ArtifactCache:
+    return ArtifactCache(config.cache_dir, config.cache_max_bytes)
+
+
+# ELF header and program headers, cached by content (binary or interpreter).
+def _elf_layout(blob: bytes, cache: ArtifactCache) -> Tuple[dict, List[dict]]:
+    def build() -> dict:
+        header = _parse_elf_header(blob)
+        return {"header": header, "phdrs": _parse_program_headers(blob, header)}
+
+    layout = cache.fetch(digest_bytes(blob), "elf", build)
+    return layout["header"], layout["phdrs"]
+
+
+# Symbol table of an ELF (.symtab + .dynsym), parsed in-process once per
+# binary content; used by --start-symbol, the trace window and `func`.
+def _symbol_index(binary_path: str, cache: Optional[ArtifactCache] = None) -> SymbolIndex:
+    try:
+        digest = digest_file(binary_path)
+    except OSError:
+        return SymbolIndex([])
+
+    def build() -> SymbolIndex:
+        blob = _load_code(binary_path)
+        return build_symbol_index(blob) if _is_elf(blob) else SymbolIndex([])
+
+    return (cache or ArtifactCache(None)).fetch(
+        digest, "symbols", build, SymbolIndex.to_data, SymbolIndex.from_data
+    )
+
 
-    if not unique:
-        return {}
+# Symbols and DWARF tables used to annotate snapshots of `binary_path`.
+def load_debug_info(
+    binary_path: str, cache: Optional[ArtifactCache] = None
+) -> Tuple[SymbolIndex, DwarfInfo]:
+    return _symbol_index(binary_path, cache), _dwarf_info(binary_path, cache)
 
-    adjusted = []
-    for addr in unique:
-        value = int(addr, 16) - base_adjust
-        if value < 0:
-            value = 0
-        adjusted.append(f"0x{value:x}")
 
+# DWARF line/function tables, decoded once per binary content.
+def _dwarf_info(binary_path: str, cache: Optional[ArtifactCache] = None) -> DwarfInfo:
     try:
-        result = subprocess.run(
-            ["addr2line", "-e", binary_path, "-f", "-C", "-a", *adjusted],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        digest = digest_file(binary_path)
     except OSError:
-        return {}
-
-    if result.returncode != 0:
-        return {}
-
-    lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-    mapping: Dict[str, Dict[str, object]] = {}
-    idx = 0
-    for orig_addr in unique:
-        if idx + 2 >= len(lines):
-            break
-        addr_line = lines[idx]
-        func_line = lines[idx + 1]
-        file_line = lines[idx + 2]
-        idx += 3
-
-        file_path = None
-        line_no = None
-        if file_line != "??:0" and ":" in file_line:
-            file_path, line_str = file_line.rsplit(":", 1)
-            if line_str.isdigit():
-                line_no = int(line_str)
-
-        mapping[orig_addr] = {
-            "file": file_path,
-            "line": line_no,
-            "func": None if func_line == "??" else func_line,
-        }
+        return DwarfInfo()
 
-    return mapping
+    def build() -> DwarfInfo:
+        try:
+            blob = _load_code(binary_path)
+            if _is_elf(blob):
+                return DwarfInfo(blob)
+        except (OSError, ValueError, IndexError, KeyError):
+            # Unreadable or malformed debug info: annotate from symbols only.
+            pass
+        return DwarfInfo()
+
+    return (cache or ArtifactCache(None)).fetch(
+        digest, "dwarf", build, DwarfInfo.to_data, DwarfInfo.from_data
+    )
 
 
-# Resolve a symbol address using nm (used by --start-symbol).
 def _resolve_symbol_addr(
-    binary_path: str, symbol: str, base_adjust: int
+    binary_path: str, symbol: str, base_adjust: int, cache: Optional[ArtifactCache] = None
 ) -> Optional[int]:
-    if not shutil.which("nm"):
-        return None
-    try:
-        result = subprocess.run(
-            ["nm", "-n", "--defined-only", binary_path],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return None
-    if result.returncode != 0:
+    entry = _symbol_index(binary_path, cache).get(symbol)
+    if entry is None:
         return None
+    return entry[0] + base_adjust
 
-    for line in result.stdout.splitlines():
-        parts = line.strip().split()
-        if len(parts) < 3:
-            continue
-        addr_str, _stype, name = parts[0], parts[1], parts[2]
-        if name != symbol:
-            continue
-        try:
-            addr_val = int(addr_str, 16)
-        except ValueError:
-            continue
-        return addr_val + base_adjust
-    return None
+
+# Resolve an address ("0x401136") or symbol ("main") to (runtime address, size).
+def _resolve_location(spec: str, session: _TraceSession) -> Tuple[int, int]:
+    spec = spec.strip()
+    try:
+        return int(spec, 0), 0
+    except ValueError:
+        pass
+    if not session.binary_path:
+        raise ValueError(f"Cannot resolve symbol {spec!r} without an ELF binary")
+    entry = _symbol_index(session.binary_path, session.cache).get(spec)
+    if entry is None:
+        raise ValueError(f"Unknown symbol: {spec}")
+    return entry[0] + session.base_adjust, entry[1]
+
+
+# "lo-hi" (addresses or symbols) or a single sized symbol such as "main".
+def _resolve_range(spec: str, session: _TraceSession) -> Tuple[int, int]:
+    lo_spec, sep, hi_spec = spec.partition("-")
+    if sep and lo_spec.strip() and hi_spec.strip():
+        lo = _resolve_location(lo_spec, session)[0]
+        hi = _resolve_location(hi_spec, session)[0]
+    else:
+        lo, size = _resolve_location(spec, session)
+        if size <= 0:
+            raise ValueError(f"Range {spec!r} has no size; use lo-hi")
+        hi = lo + size
+    if hi <= lo:
+        raise ValueError(f"Empty trace range: {spec}")
+    return lo, hi
+
+
+def _resolve_window(session: _TraceSession) -> _TraceWindow:
+    config = session.config
+    window = _TraceWindow()
+    if config.trace_from:
+        window.start = _resolve_location(config.trace_from, session)[0]
+    if config.trace_until:
+        window.until = _resolve_location(config.trace_until, session)[0]
+    window.ranges = [_resolve_range(spec, session) for spec in config.trace_ranges]
+    return window
 
 
 def _load_code(path: str) -> bytes:
@@ -838,27 +1767,222 @@ def _load_code(path: str) -> bytes:
         return handle.read()
 
 
+# The interpreter is the same for every run in a process; read it once.
+@functools.lru_cache(maxsize=4)
+def _load_interp(path: str) -> bytes:
+    return _load_code(path)
+
+
 def _is_elf(blob: bytes) -> bool:
     return len(blob) >= 4 and blob[:4] == b"\x7fELF"
 
 
-def trace_binary(code_bytes: bytes, config: TraceConfig, binary_path: Optional[str]) -> Dict[str, object]:
-    if _is_elf(code_bytes):
-        return trace_elf(code_bytes, config, binary_path)
-    return trace_raw(code_bytes, config)
+# Stream snapshots as the emulator produces them (raw blob or ELF).
+# `cache` lets a caller share one artifact cache (and its stats) with the trace.
+def trace_iter(
+    code_bytes: bytes,
+    config: TraceConfig,
+    binary_path: Optional[str] = None,
+    cache: Optional[ArtifactCache] = None,
+    profiler: Optional[TraceProfiler] = None,
+    debug_info=None,
+) -> TraceStream:
+    return TraceStream(_prepare_session(code_bytes, config, binary_path, cache, profiler), debug_info)
+
+
+# Load a raw blob or ELF into a fresh emulator session. `argv0` replaces
+# `binary_path` as the program name on the stack (replays load the
+# absolute path but must lay out the stack exactly like the trace).
+def _prepare_session(
+    code_bytes: bytes,
+    config: TraceConfig,
+    binary_path: Optional[str] = None,
+    cache: Optional[ArtifactCache] = None,
+    profiler: Optional[TraceProfiler] = None,
+    argv0: Optional[str] = None,
+) -> _TraceSession:
+    cache = cache or open_cache(config)
+    profiler = profiler or TraceProfiler.disabled()
+    with profiler.phase("load"):
+        if _is_elf(code_bytes):
+            session = _prepare_elf(code_bytes, config, binary_path, cache, profiler, argv0)
+        else:
+            session = _prepare_raw(code_bytes, config)
+            session.cache = cache
+    session.profiler = profiler
+    session.requested = config
+    session.source_path = binary_path
+    return session
 
 
-def _main(argv: Optional[Iterable[str]] = None) -> int:
-    import argparse
+def trace_binary(
+    code_bytes: bytes,
+    config: TraceConfig,
+    binary_path: Optional[str],
+    cache: Optional[ArtifactCache] = None,
+    profiler: Optional[TraceProfiler] = None,
+) -> Dict[str, object]:
+    trace = _collect(trace_iter(code_bytes, config, binary_path, cache, profiler))
+    if config.delta_keyframes > 0:
+        trace = encode_trace(trace, config.delta_keyframes)
+    return trace
+
+
+# Write a trace payload; delta-encoded and schema v2 traces are written
+# without indentation. With an enabled profiler the body is encoded (and
+# timed as "serialize") before meta, so meta.profile includes it.
+def write_trace_json(
+    payload: dict, output_path: str, profiler: Optional[TraceProfiler] = None
+) -> None:
+    if is_delta_trace(payload) or schema_of(payload) == SCHEMA_V2:
+        options: dict = {"separators": (",", ":")}
+    else:
+        options = {"indent": 2}
+    if profiler is None or not profiler.enabled or "meta" not in payload:
+        with open(output_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, **options)
+        return
+
+    with profiler.phase("serialize"):
+        body = json.dumps({key: value for key, value in payload.items() if key != "meta"}, **options)
+    meta = {**payload["meta"], "profile": profiler.report(payload["meta"].get("steps"))}
+    meta_text = json.dumps(meta, **options)
+    if "indent" in options:
+        head = body[:-2] + ',\n  "meta": ' if body != "{}" else '{\n  "meta": '
+        text = head + meta_text.replace("\n", "\n  ") + "\n}"
+    else:
+        head = body[:-1] + ',"meta":' if body != "{}" else '{"meta":'
+        text = head + meta_text + "}"
+    with open(output_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+
+
+# Write one JSON record per step as it is produced, then the trailing
+# records (e.g. risks) and finally {"meta": ...}. With delta_keyframes the
+# steps are delta frames, announced by a leading {"encoding": ...} record.
+# `index_path` also receives the step-offset sidecar read by trace_index.
+# `extra_records` / `extra_meta` may be callables, resolved once the steps
+# are written (run_pipeline joins its concurrent stages there).
+def write_trace_ndjson(
+    stream: TraceStream,
+    output_path: str,
+    extra_records: Union[None, List[dict], Callable[[], List[dict]]] = None,
+    extra_meta: Union[None, dict, Callable[[], dict]] = None,
+    index_path: Optional[str] = None,
+) -> dict:
+    keyframes = stream.config.delta_keyframes
+    encoder = DeltaEncoder(keyframes, stream.word_size) if keyframes > 0 else None
+    index = TraceIndexBuilder()
+    offset = 0
+    with open(output_path, "w", encoding="utf-8") as handle:
+
+        # json.dumps escapes non-ASCII, so characters and bytes line up.
+        def emit(record: dict) -> int:
+            nonlocal offset
+            start = offset
+            text = json.dumps(record, separators=(",", ":")) + "\n"
+            handle.write(text)
+            offset += len(text)
+            return start
+
+        if encoder is not None:
+            header = encoding_header(keyframes, stream.word_size)
+            index.add_record("encoding", emit({"encoding": header}))
+        profiler = stream.profiler
+        for snap in profiler.consumer(stream, "serialize"):
+            index.add_step(emit(encoder.push(snap) if encoder is not None else snap))
+        extra_records = _resolve_extra(extra_records)
+        extra_meta = _resolve_extra(extra_meta)
+        with profiler.phase("serialize"):
+            for record in extra_records or []:
+                start = emit(record)
+                for key in record:
+                    index.add_record(key, start)
+        meta = {**stream.meta, **(extra_meta or {})}
+        if profiler.enabled:
+            meta["profile"] = profiler.report(meta.get("steps"))
+        index.add_record("meta", emit({"meta": meta}))
+    if index_path:
+        index.write(index_path, offset)
+    return meta
+
+
+# Write the stream straight into the columnar binary container; extra
+# top-level records (e.g. risks) and meta are stored in its JSON extras.
+def write_trace_columnar(
+    stream: TraceStream,
+    output_path: str,
+    extra_records: Union[None, List[dict], Callable[[], List[dict]]] = None,
+    extra_meta: Union[None, dict, Callable[[], dict]] = None,
+) -> dict:
+    # The container has its own register table and reads back as v1.
+    def extras() -> dict:
+        nonlocal extra_meta
+        extra_meta = _resolve_extra(extra_meta)
+        payload: Dict[str, object] = {}
+        for record in _resolve_extra(extra_records) or []:
+            payload.update(record)
+        meta = {**stream.meta, **(extra_meta or {})}
+        meta.pop("schema", None)
+        meta.pop("registers", None)
+        if stream.profiler.enabled:
+            meta["profile"] = stream.profiler.report(meta.get("steps"))
+        payload["meta"] = meta
+        return payload
+
+    write_columnar(
+        output_path,
+        stream.profiler.consumer(stream, "serialize"),
+        stream.config.stack_entries,
+        stream.word_size,
+        extras,
+        stream.reg_names,
+    )
+    return {**stream.meta, **(_resolve_extra(extra_meta) or {})}
+
+
+def _resolve_extra(value):
+    return value() if callable(value) else value
+
+
+# Load an NDJSON trace back into the {snapshots, meta, ...} layout.
+def read_trace_ndjson(path: str) -> dict:
+    payload: Dict[str, object] = {"snapshots": []}
+    steps: List[dict] = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "step" in record:
+                steps.append(record)
+            else:
+                payload.update(record)
+    if is_delta_trace(payload):
+        del payload["snapshots"]
+        payload["frames"] = steps
+    else:
+        payload["snapshots"] = steps
+    return payload
 
-    parser = argparse.ArgumentParser(description="Trace raw/ELF x86 binaries with Unicorn")
-    parser.add_argument("--input", required=True, help="Path to raw x86 or ELF binary")
-    parser.add_argument("--output", required=True, help="Output JSON file")
-    parser.add_argument("--base", default="0x400000", help="Base address")
-    parser.add_argument("--stack-base", default="0x7ffffffde000", help="Stack base address")
-    parser.add_argument("--stack-size", type=int, default=0x20000, help="Stack size in bytes")
-    parser.add_argument("--max-steps", type=int, default=200, help="Max instructions to trace")
-    parser.add_argument("--stack-entries", type=int, default=24, help="Stack entries to capture")
+
+# argparse type for --capture: malformed rules become usage errors.
+def _capture_rule(text: str) -> str:
+    try:
+        return CapturePolicy.check_spec(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+# Emulation options shared by every tracing CLI (this one, run_pipeline,
+# batch_trace, trace_server's config parser and the benchmarks).
+def add_trace_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--base", default="0x400000", help="Base address for raw/PIE binaries")
+    parser.add_argument("--stack-base", default="0x7ffffffde000", help="Stack base")
+    parser.add_argument("--stack-size", type=int, default=0x20000, help="Stack size bytes")
+    parser.add_argument("--max-steps", type=int, default=200, help="Max instructions")
+    parser.add_argument("--stack-entries", type=int, default=24, help="Stack entries")
     parser.add_argument(
         "--arch-bits",
         type=int,
@@ -903,21 +2027,119 @@ def _main(argv: Optional[Iterable[str]] = None) -> int:
         default=None,
         help="Set argv[1] for the emulated program",
     )
-    args = parser.parse_args(argv)
+    parser.add_argument(
+        "--delta-keyframes",
+        type=int,
+        default=0,
+        help="Delta-encode snapshots with a keyframe every N steps (0 = off)",
+    )
+    parser.add_argument(
+        "--schema",
+        type=int,
+        default=TraceConfig.schema,
+        choices=[SCHEMA_V1, SCHEMA_V2],
+        help="Snapshot layout: 2 = compact integer arrays (default), 1 = legacy per-step dicts",
+    )
+    parser.add_argument(
+        "--cyclic",
+        type=int,
+        default=0,
+        help="Inject a cyclic pattern of N bytes, stop at the first hijacked ret and report "
+        "overflow offsets in meta (implies --libc-stubs for dynamic ELFs unless --start-interp)",
+    )
+    parser.add_argument(
+        "--cyclic-into",
+        default="stdin",
+        choices=["stdin", "argv1"],
+        help="Where the cyclic pattern is injected",
+    )
+    parser.add_argument(
+        "--trace-from",
+        default=None,
+        help="Run uninstrumented until this symbol/address, then start tracing",
+    )
+    parser.add_argument(
+        "--trace-until",
+        default=None,
+        help="Stop emulation when this symbol/address is reached",
+    )
+    parser.add_argument(
+        "--trace-range",
+        action="append",
+        default=[],
+        help="Only trace inside lo-hi or a function symbol (repeatable)",
+    )
+    parser.add_argument(
+        "--max-outside-steps",
+        type=int,
+        default=DEFAULT_MAX_OUTSIDE_STEPS,
+        help="Instructions allowed to run outside --trace-from/--trace-range before giving up",
+    )
+    parser.add_argument(
+        "--capture",
+        action="append",
+        default=[],
+        type=_capture_rule,
+        help="Snapshot rule, repeatable: every:N, on:call,ret,syscall,stack-write, "
+        "when:rip in main (default: every step)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=0,
+        help="Record a replay checkpoint every N instructions (see trace_replay.py)",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        default=None,
+        help="Checkpoint file (default: <output>.ckpt)",
+    )
+    parser.add_argument(
+        "--libc-stubs",
+        action="store_true",
+        help="Resolve libc imports to built-in stubs instead of running ld.so",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Artifact cache directory (default: $POF_CACHE_DIR or ~/.cache/pile-ou-face)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Cache size cap in MiB (least recently used entries are evicted)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the artifact cache",
+    )
 
-    stdin_data = args.stdin.encode("utf-8", errors="ignore")
-    if args.stdin_hex:
-        cleaned = args.stdin_hex.replace(" ", "").replace("\n", "")
-        if cleaned.startswith("0x"):
-            cleaned = cleaned[2:]
-        try:
-            stdin_data = bytes.fromhex(cleaned)
-        except ValueError:
-            raise SystemExit("Invalid --stdin-hex (expected hex bytes)")
 
-    code = _load_code(args.input)
+def parse_stdin_hex(text: str) -> bytes:
+    cleaned = text.replace(" ", "").replace("\n", "")
+    if cleaned.startswith("0x"):
+        cleaned = cleaned[2:]
+    try:
+        return bytes.fromhex(cleaned)
+    except ValueError:
+        raise SystemExit("Invalid --stdin-hex (expected hex bytes)")
 
-    config = TraceConfig(
+
+def config_from_args(args: argparse.Namespace) -> TraceConfig:
+    stdin_data = args.stdin.encode("utf-8", errors="ignore")
+    if args.stdin_hex:
+        stdin_data = parse_stdin_hex(args.stdin_hex)
+    try:
+        capture = CapturePolicy.check_specs(args.capture)
+    except ValueError as exc:
+        raise SystemExit(f"Invalid --capture: {exc}")
+    checkpoint_path = args.checkpoints
+    if checkpoint_path is None and getattr(args, "output", None):
+        checkpoint_path = f"{args.output}.ckpt"
+
+    return TraceConfig(
         base=int(args.base, 16),
         stack_base=int(args.stack_base, 16),
         stack_size=args.stack_size,
@@ -931,12 +2153,57 @@ def _main(argv: Optional[Iterable[str]] = None) -> int:
         buffer_size=args.buffer_size,
         start_symbol=args.start_symbol,
         argv1=args.argv1,
+        delta_keyframes=args.delta_keyframes,
+        schema=args.schema,
+        cyclic_length=args.cyclic,
+        cyclic_into=args.cyclic_into,
+        trace_from=args.trace_from,
+        trace_until=args.trace_until,
+        trace_ranges=tuple(args.trace_range),
+        max_outside_steps=args.max_outside_steps,
+        capture=capture,
+        checkpoint_interval=args.checkpoint_every,
+        checkpoint_path=checkpoint_path,
+        libc_stubs=args.libc_stubs,
+        cache_dir=None if args.no_cache else (args.cache_dir or default_cache_dir()),
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+    )
+
+
+def _main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Trace raw/ELF x86 binaries with Unicorn")
+    parser.add_argument("--input", required=True, help="Path to raw x86 or ELF binary")
+    parser.add_argument("--output", required=True, help="Output JSON file")
+    add_trace_arguments(parser)
+    parser.add_argument(
+        "--format",
+        default="json",
+        choices=["json", "ndjson", "columnar"],
+        help="Output format (ndjson streams one step per line, meta last; "
+        "columnar writes the mmap-able binary container)",
     )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
 
-    trace = trace_binary(code, config, args.input)
+    profiler = profiler_from_args(args)
+    code = _load_code(args.input)
+    config = config_from_args(args)
 
-    with open(args.output, "w", encoding="utf-8") as handle:
-        json.dump(trace, handle, indent=2)
+    if args.format == "ndjson":
+        meta = write_trace_ndjson(
+            trace_iter(code, config, args.input, profiler=profiler),
+            args.output,
+            index_path=index_path_for(args.output),
+        )
+    elif args.format == "columnar":
+        meta = write_trace_columnar(trace_iter(code, config, args.input, profiler=profiler), args.output)
+    else:
+        trace = trace_binary(code, config, args.input, profiler=profiler)
+        write_trace_json(trace, args.output, profiler)
+        meta = trace["meta"]
+    profiler.stop()
+    if profiler.enabled:
+        print(format_profile(profiler.report(meta.get("steps"))), file=sys.stderr)
     return 0
 
 